@@ -1,4 +1,7 @@
 # import base dependencies
+import shutil
+import numpy as np
+import pandas as pd
 import xarray as xr
 import geopandas as gpd
 import pydaymet
@@ -22,6 +25,7 @@ def main(
     test_pysheds: bool = True,
     test_taudem: bool = True,
     test_pour_points: bool = True,
+    test_update_fcpg: bool = True,
 ) -> bool:
 
     # get all necessary paths for in/out data
@@ -118,6 +122,38 @@ def main(
         'pour_point_values': [[999999]],
     }
 
+    # incrementally update a FCPG time series w/ consecutive calls
+    if test_update_fcpg:
+        print('Native: Updating .zarr and .nc FCPG time series one step at a time')
+        times = pd.date_range('2021-01-01', periods=4, freq='MS')
+        precip_series = xr.concat(
+            [us_precip.squeeze(drop=True) * (i + 1) for i in range(len(times))],
+            dim='time',
+        ).assign_coords(time=times)
+        full_fcpg = fcpgtools.make_fcpg(
+            fcpgtools.accumulate_parameter(us_fdr, precip_series, engine='native'),
+            fcpgtools.accumulate_flow(us_fdr, engine='native'),
+        )
+        for old_path in out_data_dir.glob('test_update_fcpg*'):
+            if old_path.is_dir():
+                shutil.rmtree(old_path)
+            else:
+                old_path.unlink()
+        for suffix in ['.zarr', '.nc']:
+            series_path = out_data_dir / Path(f'test_update_fcpg{suffix}')
+            for time_slice in [[0, 1], [2], [3]]:
+                updated_fcpg = fcpgtools.update_fcpg(
+                    us_fdr,
+                    precip_series.isel(time=time_slice),
+                    series_path,
+                    engine='native',
+                )
+            assert updated_fcpg.dims == full_fcpg.dims
+            assert 'band' not in updated_fcpg.coords
+            assert np.array_equal(updated_fcpg.time.values, full_fcpg.time.values)
+            assert np.allclose(updated_fcpg.values, full_fcpg.values, equal_nan=True)
+        print('Done\n')
+
     # use the pysheds engine
     if test_pysheds:
 
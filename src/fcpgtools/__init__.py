@@ -13,64 +13,88 @@ https://usgs.github.io/water-fcpg-tools/build/html/index.html
 __version__ = '2.0.4'
 
 from fcpgtools.tools import (
+    accumulate_cascade,
     accumulate_flow,
+    accumulate_flow_tiled,
     accumulate_parameter,
     adjust_parameter_raster,
     align_raster,
     binarize_categorical_raster,
     binarize_nodata,
     check_function_kwargs,
+    clear_result_cache,
     clip,
     convert_fdr_formats,
     d8_to_dinfinity,
     decay_accumulation,
+    disable_result_cache,
     distance_to_stream,
+    enable_result_cache,
+    extreme_upslope_min_max,
     extreme_upslope_values,
     find_basin_pour_points,
     find_fac_pour_point,
     get_pour_point_values,
+    load_flow_graph,
     load_raster,
     load_shapefile,
     make_decay_raster,
     make_fac_weights,
     make_fcpg,
+    make_fcpg_from_fdr,
+    make_fcpgs,
     mask_streams,
+    prepare_flow_graph,
     reproject_raster,
     reproject_shapefile,
     resample,
+    save_flow_graph,
     save_raster,
     save_shapefile,
     spatial_mask,
+    update_fcpg,
     value_mask,
 )
 __all__ = [
+    'accumulate_cascade',
     'accumulate_flow',
+    'accumulate_flow_tiled',
     'accumulate_parameter',
     'adjust_parameter_raster',
     'align_raster',
     'binarize_categorical_raster',
     'binarize_nodata',
     'check_function_kwargs',
+    'clear_result_cache',
     'clip',
     'convert_fdr_formats',
     'd8_to_dinfinity',
     'decay_accumulation',
+    'disable_result_cache',
     'distance_to_stream',
+    'enable_result_cache',
+    'extreme_upslope_min_max',
     'extreme_upslope_values',
     'find_basin_pour_points',
     'find_fac_pour_point',
     'get_pour_point_values',
+    'load_flow_graph',
     'load_raster',
     'load_shapefile',
     'make_decay_raster',
     'make_fac_weights',
     'make_fcpg',
+    'make_fcpg_from_fdr',
+    'make_fcpgs',
     'mask_streams',
+    'prepare_flow_graph',
     'reproject_raster',
     'reproject_shapefile',
     'resample',
+    'save_flow_graph',
     'save_raster',
     'save_shapefile',
     'spatial_mask',
+    'update_fcpg',
     'value_mask',
 ]
@@ -3,12 +3,14 @@
 This module contains custom types (i.e. "Raster") that are used repeatably 
 in FCPGtools function as well as supported file formats (i.e. "RasterSuffixes).
 Additionally, this module contains "D8ConversionDicts" which stores all 
-supported D8 Flow Direction Raster (FDR) integer encodings.
+supported D8 Flow Direction Raster (FDR) integer encodings, and 
+"RasterWriteProfiles" which stores GeoTIFF creation options for saving rasters.
+"BatchExecutors" lists the executors supported by tools.make_fcpgs().
 Finally, kwargs and command line input dicts (for TauDEM) are type-specified 
 as typing.TypedDict classes.
 """
 from pathlib import Path
-from typing import Union, List, Tuple, TypedDict
+from typing import Union, List, Tuple, TypedDict, Optional
 from xarray import DataArray
 from geopandas import GeoDataFrame
 from numpy import ndarray
@@ -18,9 +20,12 @@ from pysheds.view import Raster as PyShedsRaster
 
 Raster = Union[DataArray, str, Path]
 Shapefile = Union[GeoDataFrame, str, Path]
-RasterSuffixes = ('.tif')
+RasterSuffixes = ('.tif', '.zarr', '.nc')
 ShapefileSuffixes = ('.shp')
 
+# executors supported by tools.make_fcpgs()
+BatchExecutors = ('serial', 'threads', 'processes', 'dask')
+
 # create D8 conversion dictionaries
 D8ConversionDicts = {
     'taudem': {
@@ -47,6 +52,50 @@ D8ConversionDicts = {
     }
 }
 
+# GeoTIFF creation option profiles for tools.save_raster()
+# note: predictor='auto' is resolved per dtype (i.e. floating point prediction for floats)
+RasterWriteProfiles = {
+    'tiled': {
+        'tiled': True,
+        'blockxsize': 512,
+        'blockysize': 512,
+        'compress': 'DEFLATE',
+        'predictor': 'auto',
+        'bigtiff': 'IF_SAFER',
+        'num_threads': 'ALL_CPUS',
+    },
+    'zstd': {
+        'tiled': True,
+        'blockxsize': 512,
+        'blockysize': 512,
+        'compress': 'ZSTD',
+        'zstd_level': 9,
+        'predictor': 'auto',
+        'bigtiff': 'IF_SAFER',
+        'num_threads': 'ALL_CPUS',
+    },
+    'lzw': {
+        'tiled': True,
+        'blockxsize': 256,
+        'blockysize': 256,
+        'compress': 'LZW',
+        'predictor': 'auto',
+        'bigtiff': 'IF_SAFER',
+        'num_threads': 'ALL_CPUS',
+    },
+    'cog': {
+        'driver': 'COG',
+        'blocksize': 512,
+        'compress': 'DEFLATE',
+        'predictor': 'auto',
+        'bigtiff': 'IF_SAFER',
+        'num_threads': 'ALL_CPUS',
+        'overviews': 'AUTO',
+        'overview_resampling': 'NEAREST',
+    },
+    'none': {},
+}
+
 
 class PourPointLocationsDict(TypedDict):
     """Custom type hint dict for storing basin pour point locations.
@@ -70,12 +119,43 @@ class PourPointValuesDict(PourPointLocationsDict):
     pour_point_values: List[List[Union[float, int]]]
 
 
+class CascadeRegionOutputDict(TypedDict):
+    """Custom type hint dict for storing the outputs of one region from tools.accumulate_cascade().
+
+    Attributes: 
+        fac: The region's Flow Accumulation Cell (FAC) raster, including flow from upstream regions.
+        accumulate_parameter: The region's parameter accumulation raster, including upstream regions.
+            None if no parameter raster was provided.
+        fcpg: The region's Flow Conditioned Parameter Grid. None if no parameter raster was provided.
+    """
+    fac: DataArray
+    accumulate_parameter: Optional[DataArray]
+    fcpg: Optional[DataArray]
+
+
+class FCPGManifestDict(TypedDict):
+    """Custom type hint dict for the manifest stored alongside tools.update_fcpg() outputs.
+
+    Attributes: 
+        dim: The band/time dimension name the output is appended along.
+        fac_path: The path of the cached Flow Accumulation Cell (FAC) raster.
+        processed: String labels of the band/time index values already in the output.
+    """
+    dim: str
+    fac_path: str
+    processed: List[str]
+
+
 class PyShedsInputDict(TypedDict):
     input_array: ndarray
     raster: PyShedsRaster
     grid: Grid
 
 
+class NumbaDecayKwargsDict(TypedDict):
+    dinf_fdr: Raster
+
+
 class PyShedsFACkwargsDict(TypedDict):
     fdir: PyShedsRaster
     weights: PyShedsRaster
@@ -93,6 +173,11 @@ class TaudemFACInputDict(TypedDict):
     cores: int
     mpiCall: str
     mpiArg: str
+    temp_dir: str
+
+
+class TaudemBandsFACInputDict(TaudemFACInputDict):
+    max_cores: int
 
 
 class TaudemDistance_to_streamInputDict(TypedDict):
@@ -103,6 +188,7 @@ class TaudemDistance_to_streamInputDict(TypedDict):
     cores: int
     mpiCall: str
     mpiArg: str
+    temp_dir: str
 
 
 class TaudemMaxUpslopeInputDict(TypedDict):
@@ -113,6 +199,11 @@ class TaudemMaxUpslopeInputDict(TypedDict):
     cores: int
     mpiCall: str
     mpiArg: str
+    temp_dir: str
+
+
+class TaudemBandsMaxUpslopeInputDict(TaudemMaxUpslopeInputDict):
+    max_cores: int
 
 
 TauDEMDict = Union[
@@ -2,3 +2,5 @@
 
 from fcpgtools.terrainengine.taudem_engine import TauDEMEngine
 from fcpgtools.terrainengine.pysheds_engine import PyShedsEngine
+from fcpgtools.terrainengine.numba_engine import NumbaEngine
+from fcpgtools.terrainengine.flow_graph import FlowGraph
@@ -6,11 +6,13 @@ requiring one (i.e. accumulate_parameter()) supports the given function.
 """
 from fcpgtools.terrainengine.taudem_engine import TauDEMEngine
 from fcpgtools.terrainengine.pysheds_engine import PyShedsEngine
+from fcpgtools.terrainengine.numba_engine import NumbaEngine
 import functools
 
 NameToTerrainEngineDict = {
     'taudem': TauDEMEngine,
     'pysheds': PyShedsEngine,
+    'native': NumbaEngine,
 }
 
 
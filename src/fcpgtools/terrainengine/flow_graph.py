@@ -0,0 +1,375 @@
+"""Reusable D8 flow graph built once from a Flow Direction Raster.
+
+class:FlowGraph stores a D8 Flow Direction Raster (FDR) after format
+identification and cleaning, along with a flat downstream (receiver) cell
+index array, a valid cell mask, and a topological (upstream -> downstream)
+ordering of valid cells. Any tools.py function that takes a D8 FDR also
+accepts a FlowGraph, which allows the FDR preparation to be skipped when
+many parameters are run against the same FDR.
+
+FlowGraph objects also cache per-engine derived inputs (i.e. the FDR
+converted to another D8 format, or PySheds Grid objects) so that they are
+only created once.
+
+FlowGraphs saved via FlowGraph.to_memmap() are backed by read-only memory-mapped
+.npy files, and are pickled as their directory path. Worker processes (i.e. in a
+ProcessPoolExecutor or dask cluster) therefore attach to the same pages of the FDR
+and graph arrays instead of each receiving a copy.
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import numpy as np
+import xarray as xr
+import numba
+import fcpgtools.tools as tools
+import fcpgtools.utilities as utilities
+from fcpgtools.custom_types import Raster, D8ConversionDicts
+
+# memory-mapped FlowGraphs attached by this process, keyed by (directory, save time)
+_ATTACHED_GRAPHS: Dict[Tuple[str, int], 'FlowGraph'] = {}
+_ATTACHED_GRAPHS_LOCK = threading.Lock()
+_GRAPH_ARRAYS = ('receivers', 'valid', 'order')
+
+# (row, column) offsets of each named D8 direction (rows increase southward)
+D8_OFFSETS = {
+    'east': (0, 1),
+    'southeast': (1, 1),
+    'south': (1, 0),
+    'southwest': (1, -1),
+    'west': (0, -1),
+    'northwest': (-1, -1),
+    'north': (-1, 0),
+    'northeast': (-1, 1),
+}
+
+
+def _d8_offset_lookup(
+    d8_format: str,
+) -> np.ndarray:
+    """Builds a (256, 2) array mapping D8 cell values to (row, column) offsets. Invalid values are (0, 0)."""
+    lookup = np.zeros((256, 2), dtype=np.int64)
+    for direction, value in D8ConversionDicts[d8_format].items():
+        if direction in D8_OFFSETS:
+            lookup[value] = D8_OFFSETS[direction]
+    return lookup
+
+
+@numba.njit(cache=True, nogil=True)
+def _d8_receivers(
+    fdr: np.ndarray,
+    offset_lookup: np.ndarray,
+):
+    """Returns the flat downstream cell index of each cell (-1 if none) and a valid cell mask."""
+    n_rows, n_cols = fdr.shape
+    receivers = np.full(n_rows * n_cols, -1, dtype=np.int64)
+    valid = np.zeros(n_rows * n_cols, dtype=np.bool_)
+
+    for row in range(n_rows):
+        for col in range(n_cols):
+            value = fdr[row, col]
+            if value < 0 or value > 255:
+                continue
+            d_row = offset_lookup[value, 0]
+            d_col = offset_lookup[value, 1]
+            if d_row == 0 and d_col == 0:
+                continue
+            valid[row * n_cols + col] = True
+
+    for row in range(n_rows):
+        for col in range(n_cols):
+            i = row * n_cols + col
+            if not valid[i]:
+                continue
+            value = fdr[row, col]
+            ds_row = row + offset_lookup[value, 0]
+            ds_col = col + offset_lookup[value, 1]
+            if ds_row < 0 or ds_row >= n_rows or ds_col < 0 or ds_col >= n_cols:
+                continue
+            j = ds_row * n_cols + ds_col
+            if valid[j]:
+                receivers[i] = j
+    return receivers, valid
+
+
+@numba.njit(cache=True, nogil=True)
+def _topological_order(
+    receivers: np.ndarray,
+    valid: np.ndarray,
+) -> np.ndarray:
+    """Orders valid cells from upstream to downstream (Kahn's algorithm). Cells in flow cycles are excluded."""
+    n_cells = receivers.size
+    in_degree = np.zeros(n_cells, dtype=np.int32)
+    for i in range(n_cells):
+        if receivers[i] >= 0:
+            in_degree[receivers[i]] += 1
+
+    order = np.empty(n_cells, dtype=np.int64)
+    tail = 0
+    for i in range(n_cells):
+        if valid[i] and in_degree[i] == 0:
+            order[tail] = i
+            tail += 1
+
+    head = 0
+    while head < tail:
+        i = order[head]
+        head += 1
+        j = receivers[i]
+        if j >= 0:
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                order[tail] = j
+                tail += 1
+    return order[:tail]
+
+
+@numba.njit(cache=True, nogil=True)
+def _transpose_valid(
+    flat_array: np.ndarray,
+    valid: np.ndarray,
+    out_array: np.ndarray,
+) -> None:
+    """Writes a (N cells, bands) matrix into a (bands, N cells) array, with invalid cells set to np.nan."""
+    n_bands = flat_array.shape[1]
+    for i in range(flat_array.shape[0]):
+        if valid[i]:
+            for b in range(n_bands):
+                out_array[b, i] = flat_array[i, b]
+        else:
+            for b in range(n_bands):
+                out_array[b, i] = np.nan
+
+
+class FlowGraph:
+    """A D8 Flow Direction Raster prepared once for repeated use.
+
+    Attributes:
+        d8_fdr: The cleaned D8 Flow Direction Raster.
+        d8_format: The D8 format of param:d8_fdr (a key in custom_types.D8ConversionDicts).
+        receivers: A flat array storing each cell's downstream cell index (-1 if there is none).
+        valid: A flat boolean array, True for cells with a valid D8 flow direction.
+        order: A flat array of valid cell indices in topological (upstream -> downstream) order.
+    """
+
+    def __init__(
+        self,
+        d8_fdr: xr.DataArray,
+        d8_format: str,
+        receivers: np.ndarray,
+        valid: np.ndarray,
+        order: np.ndarray,
+    ) -> None:
+        self.d8_fdr = d8_fdr
+        self.d8_format = d8_format
+        self.receivers = receivers
+        self.valid = valid
+        self.order = order
+        self._engine_inputs: Dict[Any, Any] = {d8_format: d8_fdr}
+        self._memmap_dir: Optional[Path] = None
+
+    def __reduce_ex__(
+        self,
+        protocol: int,
+    ) -> Tuple[Any, ...]:
+        """Pickles memory-mapped FlowGraphs as their directory path, see FlowGraph.to_memmap()."""
+        if self._memmap_dir is not None:
+            return (FlowGraph.from_memmap, (str(self._memmap_dir),))
+        return super().__reduce_ex__(protocol)
+
+    @classmethod
+    def from_raster(
+        cls,
+        d8_fdr: Raster,
+        d8_format: Optional[str] = None,
+    ) -> 'FlowGraph':
+        """Builds a FlowGraph from a D8 Flow Direction Raster.
+
+        Args:
+            d8_fdr: A D8 Flow Direction Raster (dtype=Int).
+            d8_format: A valid D8 flow direction format name in custom_types.D8ConversionDicts.keys()
+                that overrides the auto-recognized format from param:d8_fdr.
+
+        Returns:
+            A FlowGraph storing the cleaned FDR and its topological ordering.
+        """
+        if isinstance(d8_fdr, FlowGraph):
+            return d8_fdr
+
+        d8_fdr = tools.load_raster(d8_fdr)
+        if d8_format is None:
+            d8_format = utilities._id_d8_format(d8_fdr)
+        d8_format = d8_format.lower()
+        if d8_format not in D8ConversionDicts.keys():
+            raise TypeError(
+                f'param:d8_format = {d8_format} which is not in '
+                f'{list(D8ConversionDicts.keys())}'
+            )
+        d8_fdr = utilities._remove_unexpected_d8_values(d8_fdr, d8_format)
+
+        fdr_values = d8_fdr.values
+        if not np.issubdtype(fdr_values.dtype, np.integer):
+            fdr_values = np.nan_to_num(fdr_values, nan=-1).astype(np.int64)
+
+        receivers, valid = _d8_receivers(
+            np.ascontiguousarray(fdr_values),
+            _d8_offset_lookup(d8_format),
+        )
+        return cls(
+            d8_fdr,
+            d8_format,
+            receivers,
+            valid,
+            _topological_order(receivers, valid),
+        )
+
+    @classmethod
+    def from_memmap(
+        cls,
+        in_dir: Union[str, Path],
+    ) -> 'FlowGraph':
+        """Attaches to a FlowGraph saved via FlowGraph.to_memmap() without reading it into memory.
+
+        Each saved FlowGraph is only attached once per process, so engine specific inputs
+        derived from it (i.e. PySheds Grid objects) are also only created once per process.
+
+        Args:
+            in_dir: The directory the FlowGraph was saved to.
+
+        Returns:
+            A FlowGraph backed by read-only memory-mapped arrays.
+        """
+        in_dir = Path(in_dir).resolve()
+        meta_path = in_dir / 'flow_graph.json'
+        if not meta_path.exists():
+            raise FileNotFoundError(
+                f'{str(in_dir)} does not store a FlowGraph saved via FlowGraph.to_memmap()!'
+            )
+        key = (str(in_dir), meta_path.stat().st_mtime_ns)
+
+        with _ATTACHED_GRAPHS_LOCK:
+            if key not in _ATTACHED_GRAPHS.keys():
+                # forget previous saves to the same directory
+                for old_key in [k for k in _ATTACHED_GRAPHS.keys() if k[0] == key[0]]:
+                    del _ATTACHED_GRAPHS[old_key]
+                with open(meta_path, 'r') as f:
+                    meta = json.load(f)
+                flow_graph = cls(
+                    utilities._load_memmap_raster(in_dir / 'd8_fdr'),
+                    meta['d8_format'],
+                    *[np.load(in_dir / f'{i}.npy', mmap_mode='r') for i in _GRAPH_ARRAYS],
+                )
+                flow_graph._memmap_dir = in_dir
+                _ATTACHED_GRAPHS[key] = flow_graph
+            return _ATTACHED_GRAPHS[key]
+
+    def to_memmap(
+        self,
+        out_dir: Union[str, Path],
+    ) -> 'FlowGraph':
+        """Saves the FDR and graph arrays as .npy files, returning a FlowGraph that memory-maps them.
+
+        Args:
+            out_dir: A directory to save the FlowGraph to (created if necessary).
+
+        Returns:
+            A FlowGraph backed by read-only memory-mapped arrays, see FlowGraph.from_memmap().
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        utilities._save_memmap_raster(self.d8_fdr, out_dir / 'd8_fdr')
+        for name in _GRAPH_ARRAYS:
+            utilities._save_npy(getattr(self, name), out_dir / f'{name}.npy')
+
+        # the metadata file is written last, marking the FlowGraph as complete
+        with open(out_dir / 'flow_graph.json', 'w') as f:
+            json.dump({'d8_format': self.d8_format}, f)
+        return FlowGraph.from_memmap(out_dir)
+
+    @property
+    def memmap_dir(self) -> Optional[Path]:
+        """The directory of a memory-mapped FlowGraph, or None if it is stored in memory."""
+        return self._memmap_dir
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """The (y, x) shape of the FDR."""
+        return self.d8_fdr.shape
+
+    def as_format(
+        self,
+        d8_format: str,
+    ) -> xr.DataArray:
+        """Returns the FDR in a given D8 format. Conversions are cached."""
+        d8_format = d8_format.lower()
+        if d8_format not in self._engine_inputs.keys():
+            self._engine_inputs[d8_format] = tools.convert_fdr_formats(
+                self.d8_fdr,
+                out_format=d8_format,
+                in_format=self.d8_format,
+            )
+        return self._engine_inputs[d8_format]
+
+    def get_engine_input(
+        self,
+        key: str,
+        prep_function: Callable[['FlowGraph'], Any],
+    ) -> Any:
+        """Returns an engine specific input derived from the graph, calling param:prep_function only once per key."""
+        if key not in self._engine_inputs.keys():
+            self._engine_inputs[key] = prep_function(self)
+        return self._engine_inputs[key]
+
+    def to_xarray(
+        self,
+        flat_array: np.ndarray,
+        name: str = 'flow_graph_output',
+        like: Optional[xr.DataArray] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> xr.DataArray:
+        """Converts a flat cell array into a DataArray matching the FDR, with invalid cells set to np.nan.
+
+        Args:
+            flat_array: A flat array of length N cells, or a (N cells, bands) matrix.
+            name: The name of the output DataArray.
+            like: A (band, y, x) raster used to get the band dimension of multi-band outputs.
+            mask: A flat boolean array of length N cells. If provided, cells where it is False are also set to np.nan.
+
+        Returns:
+            A (y, x) DataArray, or a (band, y, x) DataArray if param:flat_array has more than one band.
+        """
+        valid = self.valid if mask is None else self.valid & mask
+        if flat_array.ndim == 2 and flat_array.shape[1] == 1:
+            flat_array = flat_array[:, 0]
+
+        if flat_array.ndim == 1:
+            data = np.where(valid, flat_array, np.nan).reshape(self.shape)
+            coords = self.d8_fdr.coords
+            dims = self.d8_fdr.dims
+        else:
+            n_bands = flat_array.shape[1]
+            data = np.empty(
+                (n_bands, flat_array.shape[0]),
+                dtype=np.result_type(flat_array, np.nan),
+            )
+            _transpose_valid(flat_array, valid, data)
+            data = data.reshape((n_bands,) + self.shape)
+            if like is not None and len(like.shape) == 3:
+                coords = like.coords
+                dims = like.dims
+            else:
+                coords = dict(self.d8_fdr.coords)
+                coords['band'] = np.arange(1, n_bands + 1)
+                dims = ('band',) + self.d8_fdr.dims
+
+        out_raster = xr.DataArray(
+            data,
+            coords=coords,
+            dims=dims,
+            name=name,
+            attrs=self.d8_fdr.attrs,
+        )
+        out_raster.rio.write_nodata(np.nan, inplace=True)
+        return out_raster
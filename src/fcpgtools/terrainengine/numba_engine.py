@@ -0,0 +1,952 @@
+"""Native (Numba) terrain engine implementation.
+
+class:NumbaEngine stores concrete implementation of all terrain engine
+protocols, Numba specific helper functions, the engines required D8 format,
+and a dictionary with valid function kwargs.
+
+Unlike the TauDEM engine, all functions run in-process on NumPy arrays,
+meaning no temporary files are written and no subprocesses are launched.
+The D8 flow graph is represented as a flat array of downstream (receiver)
+cell indices, and all tools are computed with a single pass over a
+topological (upstream -> downstream) ordering of valid cells.
+
+For more information on Numba see the projects documentation:
+https://numba.readthedocs.io/en/stable/
+"""
+import warnings
+from pathlib import Path
+from typing import Union, Optional, Tuple, List
+import numpy as np
+import xarray as xr
+import numba
+import fcpgtools.tools as tools
+import fcpgtools.utilities as utilities
+import fcpgtools.custom_types as custom_types
+from fcpgtools.custom_types import Raster, PourPointValuesDict
+from fcpgtools.terrainengine.flow_graph import FlowGraph
+
+
+@numba.njit(cache=True, nogil=True)
+def _accumulate(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    weights: np.ndarray,
+) -> np.ndarray:
+    """Accumulates flat cell weights downstream in topological order."""
+    accumulated = weights.copy()
+    for k in range(order.size):
+        i = order[k]
+        j = receivers[i]
+        if j >= 0:
+            accumulated[j] += accumulated[i]
+    return accumulated
+
+
+@numba.njit(cache=True, nogil=True)
+def _accumulate_bands(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    weights: np.ndarray,
+) -> np.ndarray:
+    """Accumulates a (cells, bands) weight matrix downstream with a single topological traversal."""
+    accumulated = weights.copy()
+    n_bands = accumulated.shape[1]
+    for k in range(order.size):
+        i = order[k]
+        j = receivers[i]
+        if j >= 0:
+            for b in range(n_bands):
+                accumulated[j, b] += accumulated[i, b]
+    return accumulated
+
+
+@numba.njit(cache=True, nogil=True)
+def _accumulate_fcpg(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    weights: np.ndarray,
+    fac: np.ndarray,
+) -> np.ndarray:
+    """Accumulates a (cells, bands) weight matrix and flat FAC weights in one topological traversal (in place).
+
+    The accumulated weights are then divided in place by (FAC + 1), matching tools.make_fcpg().
+    """
+    n_bands = weights.shape[1]
+    for k in range(order.size):
+        i = order[k]
+        j = receivers[i]
+        if j >= 0:
+            fac[j] += fac[i]
+            for b in range(n_bands):
+                weights[j, b] += weights[i, b]
+
+    for i in range(fac.size):
+        for b in range(n_bands):
+            weights[i, b] /= fac[i] + 1.0
+    return weights
+
+
+# (row, column) offsets of the D-Infinity facet edges, counterclockwise from east
+DINF_OFFSETS = np.array(
+    [[0, 1], [-1, 1], [-1, 0], [-1, -1], [0, -1], [1, -1], [1, 0], [1, 1]],
+    dtype=np.int64,
+)
+
+
+@numba.njit(cache=True, nogil=True)
+def _dinf_receivers(
+    angles: np.ndarray,
+    valid: np.ndarray,
+    offsets: np.ndarray,
+):
+    """Returns the two flat downstream cell indices (-1 if none) of each cell, and the proportion of flow sent to each.
+
+    Flow is split between the two neighbors bounding the D-Infinity angle's facet, in
+    proportion to the angle's closeness to each (matching TauDEM). Angles within 1e-6 facets
+    of a cardinal/diagonal direction are snapped to it, so D8 derived angles are not split.
+    """
+    n_rows, n_cols = angles.shape
+    facet = np.pi / 4
+    receivers = np.full((n_rows * n_cols, 2), -1, dtype=np.int64)
+    proportions = np.zeros((n_rows * n_cols, 2), dtype=np.float64)
+
+    for row in range(n_rows):
+        for col in range(n_cols):
+            i = row * n_cols + col
+            if not valid[i]:
+                continue
+            position = angles[row, col] / facet
+            if abs(position - np.round(position)) < 1e-6:
+                position = np.round(position)
+            k = int(np.floor(position)) % 8
+            second = position - np.floor(position)
+
+            for s in range(2):
+                share = 1.0 - second if s == 0 else second
+                if share <= 0.0:
+                    continue
+                direction = (k + s) % 8
+                ds_row = row + offsets[direction, 0]
+                ds_col = col + offsets[direction, 1]
+                if ds_row < 0 or ds_row >= n_rows or ds_col < 0 or ds_col >= n_cols:
+                    continue
+                j = ds_row * n_cols + ds_col
+                if valid[j]:
+                    receivers[i, s] = j
+                    proportions[i, s] = share
+    return receivers, proportions
+
+
+@numba.njit(cache=True, nogil=True)
+def _multi_topological_order(
+    receivers: np.ndarray,
+    valid: np.ndarray,
+) -> np.ndarray:
+    """Orders valid cells upstream -> downstream when each cell has multiple (N cells, receivers) downstream cells."""
+    n_cells, n_receivers = receivers.shape
+    in_degree = np.zeros(n_cells, dtype=np.int64)
+    for i in range(n_cells):
+        for s in range(n_receivers):
+            j = receivers[i, s]
+            if j >= 0:
+                in_degree[j] += 1
+
+    order = np.empty(n_cells, dtype=np.int64)
+    tail = 0
+    for i in range(n_cells):
+        if valid[i] and in_degree[i] == 0:
+            order[tail] = i
+            tail += 1
+
+    head = 0
+    while head < tail:
+        i = order[head]
+        head += 1
+        for s in range(n_receivers):
+            j = receivers[i, s]
+            if j >= 0:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    order[tail] = j
+                    tail += 1
+    return order[:tail]
+
+
+@numba.njit(cache=True, nogil=True)
+def _decay_accumulate_bands(
+    receivers: np.ndarray,
+    proportions: np.ndarray,
+    order: np.ndarray,
+    weights: np.ndarray,
+    decay: np.ndarray,
+) -> np.ndarray:
+    """Accumulates a (cells, bands) weight matrix downstream with a single topological traversal (in place).
+
+    Flow leaving each cell is multiplied by its decay value, and split between its
+    (N cells, receivers) downstream cells via param:proportions.
+    """
+    n_receivers = receivers.shape[1]
+    n_bands = weights.shape[1]
+    for k in range(order.size):
+        i = order[k]
+        for s in range(n_receivers):
+            j = receivers[i, s]
+            if j < 0:
+                continue
+            factor = proportions[i, s] * decay[i]
+            for b in range(n_bands):
+                weights[j, b] += factor * weights[i, b]
+    return weights
+
+
+@numba.njit(cache=True, nogil=True)
+def _extreme_upslope_bands(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    minimum: np.ndarray,
+    maximum: np.ndarray,
+    get_min: bool,
+    get_max: bool,
+) -> None:
+    """Propagates the running min and/or max of (cells, bands) value matrices downstream in one traversal (in place).
+
+    Both matrices start as copies of the cell values, and np.nan values are ignored.
+    """
+    n_bands = minimum.shape[1]
+    for k in range(order.size):
+        i = order[k]
+        j = receivers[i]
+        if j < 0:
+            continue
+        for b in range(n_bands):
+            if get_min:
+                value = minimum[i, b]
+                if not np.isnan(value) and (np.isnan(minimum[j, b]) or value < minimum[j, b]):
+                    minimum[j, b] = value
+            if get_max:
+                value = maximum[i, b]
+                if not np.isnan(value) and (np.isnan(maximum[j, b]) or value > maximum[j, b]):
+                    maximum[j, b] = value
+
+
+@numba.njit(cache=True, nogil=True)
+def _distance_to_stream(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    fac: np.ndarray,
+    thresholds: np.ndarray,
+    n_cols: int,
+    cell_width: float,
+    cell_height: float,
+) -> np.ndarray:
+    """Finds the D8 flow path distance from each cell to the first downstream stream cell (np.nan if none).
+
+    Streams are cells with FAC >= each threshold, and all thresholds are handled with a single
+    (downstream -> upstream) traversal, returning a (N cells, thresholds) distance matrix.
+    """
+    diagonal = np.sqrt(cell_width ** 2 + cell_height ** 2)
+    n_thresholds = thresholds.size
+    distance = np.full((receivers.size, n_thresholds), np.nan)
+    for k in range(order.size - 1, -1, -1):
+        i = order[k]
+        j = receivers[i]
+        step = 0.0
+        if j >= 0:
+            if j // n_cols == i // n_cols:
+                step = cell_width
+            elif j % n_cols == i % n_cols:
+                step = cell_height
+            else:
+                step = diagonal
+        for t in range(n_thresholds):
+            if fac[i] >= thresholds[t]:
+                distance[i, t] = 0.0
+            elif j >= 0 and not np.isnan(distance[j, t]):
+                distance[i, t] = distance[j, t] + step
+    return distance
+
+
+class NumbaEngine:
+
+    d8_format = 'esri'
+
+    supports_flow_graph = True
+
+    function_kwargs = {
+        'decay_accumulation': custom_types.NumbaDecayKwargsDict.__annotations__,
+    }
+
+    @staticmethod
+    def _prep_fdr(
+        d8_fdr: Union[Raster, FlowGraph],
+    ) -> FlowGraph:
+        """Converts a D8 Flow Direction Raster into a FlowGraph (a flat receiver array, a valid cell mask, and a topological ordering).
+
+        Args:
+            d8_fdr: A D8 Flow Direction Raster, or a FlowGraph made via tools.prepare_flow_graph().
+
+        Returns:
+            A FlowGraph. If param:d8_fdr is already a FlowGraph it is returned as is.
+        """
+        if isinstance(d8_fdr, FlowGraph):
+            return d8_fdr
+        return FlowGraph.from_raster(
+            d8_fdr,
+            d8_format=NumbaEngine.d8_format,
+        )
+
+    @staticmethod
+    def _flatten_weights(
+        raster: xr.DataArray,
+        valid: np.ndarray,
+    ) -> np.ndarray:
+        """Converts a single band raster into flat float64 weights, with nodata and out of bounds cells set to 0."""
+        weights = raster.values.astype(np.float64).ravel()
+        nodata = raster.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            weights[weights == nodata] = 0.0
+        weights[np.isnan(weights) | ~valid] = 0.0
+        return weights
+
+    @staticmethod
+    def _weight_matrix(
+        raster: xr.DataArray,
+        valid: np.ndarray,
+    ) -> np.ndarray:
+        """Converts a (band, y, x) or (y, x) raster into a contiguous (cells, bands) float64 weight matrix.
+
+        Nodata and out of bounds cells are set to 0.
+        """
+        values = raster.values
+        if values.ndim == 2:
+            values = values[np.newaxis, :, :]
+        # always copy, since a single band float64 raster would otherwise be a view
+        weights = np.array(
+            values.reshape(values.shape[0], -1).T,
+            dtype=np.float64,
+            order='C',
+        )
+        nodata = raster.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            weights[weights == nodata] = 0.0
+        weights[np.isnan(weights)] = 0.0
+        weights[~valid, :] = 0.0
+        return weights
+
+    @staticmethod
+    def _flatten_values(
+        raster: xr.DataArray,
+        valid: np.ndarray,
+    ) -> np.ndarray:
+        """Converts a single band raster into flat float64 values, with nodata and out of bounds cells set to np.nan."""
+        values = raster.values.astype(np.float64).ravel()
+        nodata = raster.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            values[values == nodata] = np.nan
+        values[~valid] = np.nan
+        return values
+
+    @staticmethod
+    def _value_matrix(
+        raster: xr.DataArray,
+        valid: np.ndarray,
+    ) -> np.ndarray:
+        """Converts a (band, y, x) or (y, x) raster into a contiguous (cells, bands) float64 value matrix.
+
+        Nodata and out of bounds cells are set to np.nan.
+        """
+        values = raster.values
+        if values.ndim == 2:
+            values = values[np.newaxis, :, :]
+        values = np.array(
+            values.reshape(values.shape[0], -1).T,
+            dtype=np.float64,
+            order='C',
+        )
+        nodata = raster.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            values[values == nodata] = np.nan
+        values[~valid, :] = np.nan
+        return values
+
+    @staticmethod
+    def _stream_mask(
+        mask_streams: Optional[Raster],
+        flow_graph: FlowGraph,
+    ) -> Optional[np.ndarray]:
+        """Converts a tools.mask_streams() raster into a flat boolean array (True for stream cells), or None if it does not align."""
+        if mask_streams is None:
+            return None
+        mask_streams = tools.load_raster(mask_streams)
+        if not utilities._verify_alignment(flow_graph.d8_fdr, mask_streams):
+            warnings.warn(
+                message=(
+                    'Stream mask does not align with extreme upslope value output! '
+                    'No mask is applied.'
+                ),
+                category=UserWarning,
+            )
+            return None
+        return (mask_streams.notnull() & (mask_streams != mask_streams.rio.nodata)).values.ravel()
+
+    @staticmethod
+    def _extreme_upslope_raster(
+        d8_fdr: Union[Raster, FlowGraph],
+        parameter_raster: Raster,
+        mask_streams: Optional[Raster],
+        stats: Tuple[str, ...],
+    ) -> xr.DataArray:
+        """Finds the upslope min and/or max of all parameter raster bands with a single traversal of the flow graph.
+
+        Args:
+            d8_fdr: A flow direction raster in ESRI format, or a FlowGraph.
+            parameter_raster: A parameter raster to find the extreme values from.
+            mask_streams: A stream mask raster from tools.mask_streams(), applied as the output is made.
+            stats: The statistics to return, 'min' and/or 'max'.
+
+        Returns:
+            A raster matching param:parameter_raster's dimensions if a single statistic is requested,
+                otherwise a raster with an additional leading 'stat' dimension.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        parameter_raster = tools.load_raster(parameter_raster)
+        values = NumbaEngine._value_matrix(parameter_raster, flow_graph.valid)
+
+        # the bands of each statistic are stored side by side, so one output array is made
+        n_bands = values.shape[1]
+        extremes = np.empty((values.shape[0], len(stats) * n_bands))
+        stat_values = {}
+        for i, stat in enumerate(stats):
+            stat_values[stat] = extremes[:, i * n_bands:(i + 1) * n_bands]
+            stat_values[stat][:] = values
+        del values
+
+        _extreme_upslope_bands(
+            flow_graph.receivers,
+            flow_graph.order,
+            stat_values.get('min', extremes),
+            stat_values.get('max', extremes),
+            'min' in stats,
+            'max' in stats,
+        )
+
+        stream_mask = NumbaEngine._stream_mask(mask_streams, flow_graph)
+        if len(stats) == 1:
+            return flow_graph.to_xarray(
+                extremes,
+                like=parameter_raster,
+                mask=stream_mask,
+            )
+
+        # split the (stat x band, y, x) output into a (stat, band, y, x) raster
+        stacked = flow_graph.to_xarray(
+            extremes,
+            mask=stream_mask,
+        )
+        like = parameter_raster if len(parameter_raster.shape) == 3 else flow_graph.d8_fdr
+        out_raster = xr.DataArray(
+            stacked.data.reshape((len(stats),) + like.shape),
+            coords=like.coords,
+            dims=('stat',) + like.dims,
+            attrs=stacked.attrs,
+        )
+        out_raster['stat'] = list(stats)
+        out_raster.rio.write_nodata(np.nan, inplace=True)
+        return out_raster
+
+    @staticmethod
+    def accumulate_flow(
+        d8_fdr: Union[Raster, FlowGraph],
+        upstream_pour_points: Optional[PourPointValuesDict] = None,
+        weights: Optional[xr.DataArray] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Create a Flow Accumulation Cell (FAC) raster from a ESRI format D8 Flow Direction Raster.
+
+        Args:
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
+            upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated cell values as the second [1].
+                This allows the FAC to be made with boundary conditions such as upstream basin pour points.
+            weights: A grid defining the value to accumulate from each cell. Default is a grid of 1s.
+            out_path: Defines a path to save the output raster.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            The output Flow Accumulation Cells (FAC) raster.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        d8_fdr = flow_graph.d8_fdr
+        valid = flow_graph.valid
+
+        # add weights if necessary
+        if weights is None and upstream_pour_points is not None:
+            weights = xr.zeros_like(
+                d8_fdr,
+                dtype=np.dtype('float64'),
+            ) + 1
+            weights = tools.adjust_parameter_raster(
+                weights,
+                d8_fdr,
+                upstream_pour_points,
+            )
+        if weights is not None:
+            flat_weights = NumbaEngine._flatten_weights(
+                tools.load_raster(weights),
+                valid,
+            )
+        else:
+            flat_weights = valid.astype(np.float64)
+
+        accumulated = _accumulate(
+            flow_graph.receivers,
+            flow_graph.order,
+            flat_weights,
+        )
+
+        out_raster = flow_graph.to_xarray(
+            accumulated,
+            name='accumulate',
+        )
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def accumulate_parameter(
+        d8_fdr: Union[Raster, FlowGraph],
+        parameter_raster: Raster,
+        upstream_pour_points: Optional[PourPointValuesDict] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Create a parameter accumulation raster from a ESRI format D8 Flow Direction Raster and a parameter raster.
+
+        A key aspect of this function is that the output DataArray will have dimensions matching param:parameter_raster.
+        NOTE: All bands of a multi-dimensional parameter raster are accumulated in a single traversal of the flow graph.
+
+        Args:
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
+            parameter_raster: A parameter raster aligned via tools.align_raster() with the us_fdr.
+                This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
+            upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated cell values as the second [1].
+                This allows the FAC to be made with boundary conditions such as upstream basin pour points.
+            out_path: Defines a path to save the output raster.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            The output parameter accumulation raster.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        d8_fdr = flow_graph.d8_fdr
+        parameter_raster = tools.load_raster(parameter_raster)
+
+        # add any pour point accumulation via tools.adjust_parameter_raster()
+        if upstream_pour_points is not None:
+            parameter_raster = tools.adjust_parameter_raster(
+                parameter_raster,
+                d8_fdr,
+                upstream_pour_points,
+            )
+
+        # accumulate all bands with a single traversal of the flow graph
+        accumulated = _accumulate_bands(
+            flow_graph.receivers,
+            flow_graph.order,
+            NumbaEngine._weight_matrix(parameter_raster, flow_graph.valid),
+        )
+        out_raster = flow_graph.to_xarray(
+            accumulated,
+            like=parameter_raster,
+        )
+        out_raster.name = 'accumulate_parameter'
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def make_fcpg_from_fdr(
+        d8_fdr: Union[Raster, FlowGraph],
+        parameter_raster: Raster,
+        fac_upstream_pour_points: Optional[PourPointValuesDict] = None,
+        parameter_upstream_pour_points: Optional[PourPointValuesDict] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Creates a Flow Conditioned Parameter Grid (FCPG) from a ESRI format D8 Flow Direction Raster and a parameter raster.
+
+        The FAC and all parameter bands are accumulated in a single traversal of the flow graph, and
+        the FCPG (parameter accumulation / (FAC + 1)) is calculated in place, so no separate FAC or
+        parameter accumulation rasters are kept in memory.
+
+        Args:
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
+            parameter_raster: A parameter raster aligned via tools.align_raster() with the us_fdr.
+                This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
+            fac_upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated FAC cell values as the second [1].
+            parameter_upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated parameter accumulation cell values as the second [1].
+            out_path: Defines a path to save the output raster.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            The output FCPG raster.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        d8_fdr = flow_graph.d8_fdr
+        valid = flow_graph.valid
+        parameter_raster = tools.load_raster(parameter_raster)
+
+        # add any pour point accumulation via tools.adjust_parameter_raster()
+        if parameter_upstream_pour_points is not None:
+            parameter_raster = tools.adjust_parameter_raster(
+                parameter_raster,
+                flow_graph,
+                parameter_upstream_pour_points,
+            )
+        if fac_upstream_pour_points is not None:
+            fac_weights = xr.zeros_like(
+                d8_fdr,
+                dtype=np.dtype('float64'),
+            ) + 1
+            fac_weights = NumbaEngine._flatten_weights(
+                tools.adjust_parameter_raster(
+                    fac_weights,
+                    flow_graph,
+                    fac_upstream_pour_points,
+                ),
+                valid,
+            )
+        else:
+            fac_weights = valid.astype(np.float64)
+
+        # accumulate the FAC and all bands with a single traversal, then divide in place
+        fcpg = _accumulate_fcpg(
+            flow_graph.receivers,
+            flow_graph.order,
+            NumbaEngine._weight_matrix(parameter_raster, valid),
+            fac_weights,
+        )
+        out_raster = flow_graph.to_xarray(
+            fcpg,
+            name='FCPG',
+            like=parameter_raster,
+        )
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def distance_to_stream(
+        d8_fdr: Union[Raster, FlowGraph],
+        fac_raster: Raster,
+        accum_threshold: Union[int, List[int]],
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Calculates distance each cell is from a stream (as defined by a cell accumulation threshold).
+
+        Distances are measured along the D8 flow path in the units of the raster's CRS.
+        Stream cells are given a value of 0, and cells that do not drain to a stream are np.nan.
+        NOTE: A list of thresholds is handled with a single traversal of the flow graph.
+
+        Args:
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
+            fac_raster: A Flow Accumulation Cell (FAC) raster output from accumulate_flow().
+            accum_threshold: The # of upstream/accumulated cells to consider a cell a stream.
+                If a list of thresholds is provided, a (accum_threshold, y, x) output is returned.
+            out_path: Defines a path to save the output raster.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            A raster with values of D8 flow distance from each cell to the nearest stream.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        d8_fdr = flow_graph.d8_fdr
+        fac_raster = tools.load_raster(fac_raster)
+
+        if not utilities._verify_shape_match(d8_fdr, fac_raster):
+            raise TypeError(
+                'The D8 FDR raster and the FAC raster must have the same shape.'
+            )
+
+        # get FAC values (ignoring nodata) to identify stream cells
+        fac_values = NumbaEngine._flatten_values(
+            fac_raster,
+            flow_graph.valid,
+        )
+        thresholds = np.atleast_1d(accum_threshold).astype(np.float64)
+
+        cell_width, cell_height = d8_fdr.rio.resolution(recalc=True)
+        distance = _distance_to_stream(
+            flow_graph.receivers,
+            flow_graph.order,
+            fac_values,
+            thresholds,
+            flow_graph.shape[-1],
+            float(np.abs(cell_width)),
+            float(np.abs(cell_height)),
+        )
+
+        out_raster = flow_graph.to_xarray(
+            distance,
+            name='distance_to_stream',
+        )
+
+        # add a threshold dimension for threshold sweeps
+        if not np.isscalar(accum_threshold):
+            if len(out_raster.shape) == 2:
+                out_raster = out_raster.expand_dims('band')
+            out_raster = out_raster.rename({'band': 'accum_threshold'})
+            out_raster['accum_threshold'] = list(accum_threshold)
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def extreme_upslope_values(
+        d8_fdr: Union[Raster, FlowGraph],
+        parameter_raster: Raster,
+        mask_streams: Optional[Raster] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        get_min_upslope: bool = False,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Finds the max (or min if get_min_upslope=True) value of a parameter grid upstream from each cell in a D8 FDR raster.
+
+        Args:
+            d8_fdr: A flow direction raster in ESRI format, or a FlowGraph.
+            parameter_raster: A parameter raster to find the max values from.
+            mask_streams: A stream mask raster from tools.mask_streams(). If provided, the output will be masked to only stream cells.
+            out_path: Defines a path to save the output raster.
+            get_min_upslope: If True, the minimum upslope value is assigned to each cell.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            A raster with max (or min) upstream value of the parameter grid as each cell's value.
+        """
+        # all bands are handled with a single traversal, and the stream mask is applied to the output
+        accum_type_str = 'min' if get_min_upslope else 'max'
+        out_raster = NumbaEngine._extreme_upslope_raster(
+            d8_fdr,
+            parameter_raster,
+            mask_streams,
+            (accum_type_str,),
+        )
+        out_raster.name = f'{accum_type_str}_upslope_values'
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def extreme_upslope_min_max(
+        d8_fdr: Union[Raster, FlowGraph],
+        parameter_raster: Raster,
+        mask_streams: Optional[Raster] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Finds both the min and max value of a parameter grid upstream from each cell in a D8 FDR raster.
+
+        The running min and max of all parameter bands are propagated together in a single
+        traversal of the flow graph, and the stream mask is applied as the output is made.
+
+        Args:
+            d8_fdr: A flow direction raster in ESRI format, or a FlowGraph.
+            parameter_raster: A parameter raster to find the min/max values from.
+                This can be multi-dimensional (i.e. f(x, y, t)).
+            mask_streams: A stream mask raster from tools.mask_streams(). If provided, the output will be masked to only stream cells.
+            out_path: Defines a path to save the output raster.
+            **kwargs: The native engine does not take kwargs.
+
+        Returns:
+            A (stat, y, x) or (stat, band, y, x) raster with min and max upstream values as stat='min'/'max'.
+        """
+        # (stat, band, y, x) outputs can't be saved as a GeoTIFF, so check before computing
+        parameter_raster = tools.load_raster(parameter_raster)
+        if (
+            out_path is not None
+            and len(parameter_raster.shape) == 3
+            and Path(out_path).suffix not in ('.zarr', '.nc')
+        ):
+            raise ValueError(
+                'param:out_path must be a .zarr or .nc path for a multi-dimensional param:parameter_raster, '
+                f'not {Path(out_path).suffix}!'
+            )
+
+        out_raster = NumbaEngine._extreme_upslope_raster(
+            d8_fdr,
+            parameter_raster,
+            mask_streams,
+            ('min', 'max'),
+        )
+        out_raster.name = 'min_max_upslope_values'
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
+
+    @staticmethod
+    def _prep_dinf(
+        flow_graph: FlowGraph,
+        dinf_fdr: xr.DataArray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Builds D-Infinity routing from a D-Infinity angle raster aligned with a FlowGraph's FDR.
+
+        Cells are valid if they have both a valid D8 flow direction and a D-Infinity angle within [0, 2pi].
+
+        Args:
+            flow_graph: A FlowGraph.
+            dinf_fdr: A D-Infinity flow direction raster (angles in radians counterclockwise from east).
+
+        Returns:
+            A (N cells, 2) receiver index array, a (N cells, 2) flow proportion array, 
+            a topological (upstream -> downstream) ordering of valid cells, and a valid cell mask.
+        """
+        if not utilities._verify_shape_match(flow_graph.d8_fdr, dinf_fdr):
+            raise TypeError(
+                'The D-Infinity FDR shape does not match the D8 FDR shape! '
+                'Please align the rasters via tools.align_raster().'
+            )
+        angles = dinf_fdr.values.astype(np.float64)
+        nodata = dinf_fdr.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            angles[angles == nodata] = np.nan
+        valid = flow_graph.valid & ((angles >= 0) & (angles <= 2 * np.pi)).ravel()
+
+        receivers, proportions = _dinf_receivers(
+            np.ascontiguousarray(angles),
+            valid,
+            DINF_OFFSETS,
+        )
+        return (
+            receivers,
+            proportions,
+            _multi_topological_order(receivers, valid),
+            valid,
+        )
+
+    @staticmethod
+    def decay_accumulation(
+        d8_fdr: Union[Raster, FlowGraph],
+        decay_raster: Raster,
+        upstream_pour_points: Optional[PourPointValuesDict] = None,
+        parameter_raster: Optional[Raster] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Creates a decayed accumulation raster (parameter or cell accumulation) via a decay multiplier raster.
+
+        Flow leaving each cell is multiplied by that cell's decay value before being added downstream.
+        By default flow is routed via the D8 FDR, which matches D-Infinity accumulation of the FDR converted
+        via tools.d8_to_dinfinity(). If a D-Infinity FDR is passed in as kwargs['dinf_fdr'] (i.e. made from a DEM 
+        with TauDEM:DinfFlowDir), flow is split between the two neighbors bounding each cell's angle in 
+        proportion to the angle's closeness to each, matching TauDEM:DinfDecayAccum.
+        NOTE: All bands of a multi-dimensional parameter raster are accumulated in a single traversal.
+
+        Args:
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
+            decay_raster: A decay 'multiplier' raster calculated from distance to stream via tools.make_decay_raster().
+            upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated cell values as the second [1].
+                This allows the FAC to be made with boundary conditions such as upstream basin pour points.
+            parameter_raster: A parameter raster aligned via tools.align_raster() with the us_fdr.
+                This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
+            out_path: Defines a path to save the output raster.
+            **kwargs: Can pass in a D-Infinity flow direction raster (radians counterclockwise from east) 
+                aligned with param:d8_fdr using "dinf_fdr" as the key.
+
+        Returns:
+            The output decayed accumulation raster.
+        """
+        flow_graph = NumbaEngine._prep_fdr(d8_fdr)
+        d8_fdr = flow_graph.d8_fdr
+
+        # get D8 routing, or proportional D-Infinity routing (made once per FlowGraph)
+        dinf_fdr = kwargs.get('dinf_fdr', None)
+        if dinf_fdr is None:
+            receivers = flow_graph.receivers[:, np.newaxis]
+            proportions = np.ones(receivers.shape)
+            order = flow_graph.order
+            valid = flow_graph.valid
+        else:
+            dinf_fdr = tools.load_raster(dinf_fdr)
+            receivers, proportions, order, valid = flow_graph.get_engine_input(
+                f'dinf:{utilities._fingerprint(dinf_fdr)}',
+                lambda flow_graph: NumbaEngine._prep_dinf(flow_graph, dinf_fdr),
+            )
+        decay = NumbaEngine._flatten_weights(
+            tools.load_raster(decay_raster),
+            valid,
+        )
+
+        # prep parameter raster and boundary conditions
+        if parameter_raster is not None:
+            weights = tools.load_raster(parameter_raster)
+        else:
+            weights = xr.zeros_like(
+                d8_fdr,
+                dtype=np.dtype('float64'),
+            ) + 1
+        if upstream_pour_points is not None:
+            weights = tools.adjust_parameter_raster(
+                weights,
+                d8_fdr,
+                upstream_pour_points,
+            )
+
+        # accumulate all bands with a single traversal
+        accumulated = _decay_accumulate_bands(
+            receivers,
+            proportions,
+            order,
+            NumbaEngine._weight_matrix(weights, valid),
+            decay,
+        )
+        if dinf_fdr is not None:
+            accumulated[~valid, :] = np.nan
+        out_raster = flow_graph.to_xarray(
+            accumulated,
+            like=weights,
+        )
+        out_raster.name = 'decay_accumulation_raster'
+
+        # save if necessary
+        if out_path is not None:
+            tools.save_raster(
+                out_raster,
+                out_path,
+            )
+        return out_raster
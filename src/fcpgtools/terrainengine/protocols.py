@@ -12,7 +12,7 @@ https://peps.python.org/pep-0544/
 import abc
 from pathlib import Path
 import xarray as xr
-from typing import Protocol, Union, Optional, runtime_checkable
+from typing import Protocol, Union, Optional, List, runtime_checkable
 from fcpgtools.custom_types import Raster, PourPointValuesDict
 
 
@@ -105,6 +105,32 @@ class SupportsExtremeUpslopeValues(Protocol):
         raise NotImplementedError
 
 
+@runtime_checkable
+class SupportsExtremeUpslopeMinMax(Protocol):
+
+    @abc.abstractmethod
+    def extreme_upslope_min_max(
+        d8_fdr: Raster,
+        parameter_raster: Raster,
+        mask_streams: Optional[Raster] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Finds both the min and max value of a parameter grid upstream from each cell in a D8 FDR raster.
+
+        Args:
+            d8_fdr: A flow direction raster.
+            parameter_raster: A parameter raster to find the min/max values from.
+            mask_streams: A stream mask raster from tools.mask_streams(). If provided, the output will be masked to only stream cells.
+            out_path: Defines a path to save the output raster.
+            **kwargs: keyword arguments, specific options depend on the engine being used.
+
+        Returns:
+            A (stat, y, x) or (stat, band, y, x) raster with min and max upstream values as stat='min'/'max'.
+        """
+        raise NotImplementedError
+
+
 @runtime_checkable
 class SupportsDistanceToStream(Protocol):
 
@@ -112,7 +138,7 @@ class SupportsDistanceToStream(Protocol):
     def distance_to_stream(
         d8_fdr: Raster,
         fac_raster: Raster,
-        accum_threshold: int,
+        accum_threshold: Union[int, List[int]],
         out_path: Optional[Union[str, Path]] = None,
         **kwargs,
     ) -> xr.DataArray:
@@ -124,6 +150,7 @@ class SupportsDistanceToStream(Protocol):
             d8_fdr: A D8 Flow Direction Raster (dtype=Int).
             fac_raster: A Flow Accumulation Cell (FAC) raster output from accumulate_flow().
             accum_threshold: The # of upstream/accumulated cells to consider a cell a stream.
+                If a list of thresholds is provided, a (accum_threshold, y, x) output is returned.
             out_path: Defines a path to save the output raster.
             **kwargs: keyword arguments, specific options depend on the engine being used.
 
@@ -164,3 +191,34 @@ class SupportsDecayAccumulation(Protocol):
             The output decayed accumulation raster.
         """
         raise NotImplementedError
+
+
+@runtime_checkable
+class SupportsMakeFCPGFromFDR(Protocol):
+
+    @abc.abstractmethod
+    def make_fcpg_from_fdr(
+        d8_fdr: Raster,
+        parameter_raster: Raster,
+        fac_upstream_pour_points: Optional[PourPointValuesDict] = None,
+        parameter_upstream_pour_points: Optional[PourPointValuesDict] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Creates a Flow Conditioned Parameter Grid (FCPG) directly from a D8 Flow Direction Raster and a parameter raster.
+
+        Args:
+            d8_fdr: A D8 Flow Direction Raster (dtype=Int).
+            parameter_raster: A parameter raster aligned via tools.align_raster() with the us_fdr. 
+                This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
+            fac_upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated FAC cell values as the second [1].
+            parameter_upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated parameter accumulation cell values as the second [1].
+            out_path: Defines a path to save the output raster.
+            **kwargs: keyword arguments, specific options depend on the engine being used.
+
+        Returns:
+            The output FCPG raster.
+        """
+        raise NotImplementedError
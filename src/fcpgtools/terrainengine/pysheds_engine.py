@@ -19,12 +19,15 @@ import fcpgtools.tools as tools
 import fcpgtools.utilities as utilities
 import fcpgtools.custom_types as custom_types
 from fcpgtools.custom_types import Raster, PyShedsInputDict, PourPointValuesDict
+from fcpgtools.terrainengine.flow_graph import FlowGraph
 
 
 class PyShedsEngine:
 
     d8_format = 'esri'
 
+    supports_flow_graph = True
+
     function_kwargs = {
         'accumulate_flow': custom_types.PyShedsFACkwargsDict.__annotations__,
         'accumulate_parameter': custom_types.PyShedsFACkwargsDict.__annotations__,
@@ -47,13 +50,12 @@ class PyShedsEngine:
         array.rio.write_transform()
         affine = array.rio.transform()
 
-        # get nodata value
+        # get nodata value (a view, the FDR dtype i.e. uint8 is kept)
         nodata_val = array.rio.nodata
-        array_np = array.values.astype(dtype=str(array.dtype)).squeeze()
+        array_np = array.values.squeeze()
 
         # make a mask for the grid object
-        mask = array.astype('bool')
-        mask = mask.where(array != array.rio.nodata, False).values
+        mask = array_np != nodata_val
 
         view = ViewFinder(
             shape=array_np.shape,
@@ -76,6 +78,31 @@ class PyShedsEngine:
 
         return out_dict
 
+    @staticmethod
+    def _pysheds_input(
+        d8_fdr: Union[Raster, FlowGraph],
+    ) -> PyShedsInputDict:
+        """Converts FDR nodata values to 0 and preps the FDR for pysheds. For FlowGraph inputs the result is cached on the graph."""
+        if isinstance(d8_fdr, FlowGraph):
+            return d8_fdr.get_engine_input(
+                'pysheds',
+                lambda flow_graph: PyShedsEngine._pysheds_input(
+                    flow_graph.as_format(PyShedsEngine.d8_format),
+                ),
+            )
+        d8_fdr = tools.load_raster(d8_fdr)
+
+        # convert nodata values to 0 for pysheds (keeping the FDR dtype)
+        d8_fdr = d8_fdr.copy(
+            data=np.where(
+                d8_fdr.values != d8_fdr.rio.nodata,
+                d8_fdr.values,
+                np.zeros(1, dtype=d8_fdr.dtype),
+            ),
+        )
+        d8_fdr.rio.write_nodata(0, inplace=True)
+        return PyShedsEngine._prep_fdr_for_pysheds(d8_fdr)
+
     @staticmethod
     def _pysheds_to_xarray(
         pysheds_io_dict: PyShedsInputDict,
@@ -93,7 +120,7 @@ class PyShedsEngine:
 
     @staticmethod
     def accumulate_flow(
-        d8_fdr: Raster,
+        d8_fdr: Union[Raster, FlowGraph],
         upstream_pour_points: Optional[PourPointValuesDict] = None,
         weights: Optional[xr.DataArray] = None,
         out_path: Optional[Union[str, Path]] = None,
@@ -104,7 +131,7 @@ class PyShedsEngine:
         NOTE: Replaces tools.tauFlowAccum() from V1 FCPGtools.
 
         Args:
-            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int).
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
             upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
                 and updated cell values as the second [1].
                 This allows the FAC to be made with boundary conditions such as upstream basin pour points.
@@ -115,15 +142,8 @@ class PyShedsEngine:
         Returns:
             The output Flow Accumulation Cells (FAC) raster.
         """
-        d8_fdr = tools.load_raster(d8_fdr)
-
-        # convert nodata values to 0 for pysheds
-        d8_fdr = d8_fdr.where(
-            (d8_fdr.values != d8_fdr.rio.nodata),
-            0,
-        )
-        d8_fdr.rio.write_nodata(0, inplace=True)
-        pysheds_input_dict = PyShedsEngine._prep_fdr_for_pysheds(d8_fdr)
+        pysheds_input_dict = PyShedsEngine._pysheds_input(d8_fdr)
+        d8_fdr = pysheds_input_dict['input_array']
 
         # prep kwargs to be passed into accumulate_flow()
         if 'kwargs' in kwargs.keys():
@@ -193,7 +213,7 @@ class PyShedsEngine:
 
     @staticmethod
     def accumulate_parameter(
-        d8_fdr: Raster,
+        d8_fdr: Union[Raster, FlowGraph],
         parameter_raster: Raster,
         upstream_pour_points: Optional[PourPointValuesDict] = None,
         out_path: Optional[Union[str, Path]] = None,
@@ -205,7 +225,7 @@ class PyShedsEngine:
         NOTE: Replaces tools.accumulateParam() from V1 FCPGtools.
 
         Args:
-            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int).
+            d8_fdr: A ESRI format D8 Flow Direction Raster (dtype=Int), or a FlowGraph.
             parameter_raster: A parameter raster aligned via tools.align_raster() with the us_fdr. 
                 This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
             upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
@@ -217,7 +237,8 @@ class PyShedsEngine:
         Returns:
             The output parameter accumulation raster.
         """
-        d8_fdr = tools.load_raster(d8_fdr)
+        if not isinstance(d8_fdr, FlowGraph):
+            d8_fdr = tools.load_raster(d8_fdr)
         parameter_raster = tools.load_raster(parameter_raster)
 
         # add any pour point accumulation via utilities.tools.adjust_parameter_raster()
@@ -0,0 +1,262 @@
+"""Opt-in persistent on-disk cache of terrain engine outputs.
+
+pyfunc:cache_result is used as a decorator in tools.py (below
+engine_validator.validate_engine) on the accumulate_flow(),
+accumulate_parameter(), distance_to_stream(), extreme_upslope_values(),
+extreme_upslope_min_max(), and decay_accumulation() dispatchers. Once enabled
+via tools.enable_result_cache(), outputs (with up to 3 dimensions) are saved as
+compressed GeoTIFFs keyed by a fingerprint of all raster inputs, the engine name,
+and the engine kwargs, and repeat calls with identical inputs load the cached
+raster instead of re-running the engine.
+
+The least recently used rasters are deleted once the cache directory exceeds
+its size limit. The cache directory can be shared between processes and
+persists between sessions (i.e. when re-running a pipeline after a failure).
+"""
+import os
+import json
+import uuid
+import hashlib
+import inspect
+import functools
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+import numpy as np
+import xarray as xr
+from rasterio.errors import RasterioIOError
+import fcpgtools.tools as tools
+import fcpgtools.utilities as utilities
+from fcpgtools.terrainengine import engine_validator
+from fcpgtools.terrainengine.flow_graph import FlowGraph
+
+# cache settings, see tools.enable_result_cache()
+CacheSettings = {
+    'cache_dir': None,
+    'max_size_bytes': 10 * 1024 ** 3,
+}
+_CACHE_LOCK = threading.Lock()
+
+# arguments that do not change an engine's output
+_IGNORED_ARGUMENTS = ('engine', 'out_path', 'kwargs')
+_IGNORED_KWARGS = ('temp_dir',)
+
+
+def enable(
+    cache_dir: Union[str, Path],
+    max_size_gb: float = 10.0,
+) -> None:
+    """Enables the result cache in param:cache_dir (created if necessary)."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    CacheSettings['cache_dir'] = cache_dir
+    CacheSettings['max_size_bytes'] = int(max_size_gb * 1024 ** 3)
+
+
+def disable() -> None:
+    """Disables the result cache. Cached files are kept."""
+    CacheSettings['cache_dir'] = None
+
+
+def clear() -> None:
+    """Deletes all cached results."""
+    cache_dir = CacheSettings['cache_dir']
+    if cache_dir is None:
+        return None
+    with _CACHE_LOCK:
+        for path in list(Path(cache_dir).glob('result_*')) + list(Path(cache_dir).glob('temp_*')):
+            path.unlink(missing_ok=True)
+
+
+def _engine_name(
+    engine: object,
+) -> str:
+    """Returns the engine_validator.NameToTerrainEngineDict key of an engine class."""
+    for name, engine_class in engine_validator.NameToTerrainEngineDict.items():
+        if engine is engine_class:
+            return name
+    return getattr(engine, '__name__', str(engine))
+
+
+def _argument_token(
+    value: Any,
+) -> str:
+    """Returns a string uniquely identifying a function argument's content."""
+    if isinstance(value, FlowGraph):
+        return f'flow_graph:{utilities._fingerprint(value.d8_fdr)}'
+    if isinstance(value, xr.DataArray):
+        return f'raster:{utilities._fingerprint(value)}'
+    if isinstance(value, (str, Path)) and Path(value).is_file():
+        stat = Path(value).stat()
+        return f'file:{Path(value).resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _normalize_kwargs(
+    function: Callable,
+    engine_name: str,
+    kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Keeps only engine kwargs that are valid per tools.check_function_kwargs(), sorted by name and converted to tokens."""
+    if 'kwargs' in kwargs.keys():
+        kwargs = kwargs['kwargs']
+    try:
+        allowed = tools.check_function_kwargs(function, engine_name).keys()
+    except ValueError:
+        return {}
+    return {
+        k: _argument_token(kwargs[k]) for k in sorted(kwargs.keys())
+        if k in allowed and k not in _IGNORED_KWARGS
+    }
+
+
+def _cache_key(
+    function: Callable,
+    bound_arguments: inspect.BoundArguments,
+) -> str:
+    """Hashes a function name, engine name, input fingerprints, and normalized engine kwargs."""
+    arguments = bound_arguments.arguments
+    engine_name = _engine_name(arguments['engine'])
+
+    tokens = [function.__name__, engine_name]
+    for name, value in arguments.items():
+        if name in _IGNORED_ARGUMENTS:
+            continue
+        tokens.append(f'{name}={_argument_token(value)}')
+    engine_kwargs = _normalize_kwargs(
+        function,
+        engine_name,
+        arguments.get('kwargs', {}),
+    )
+    tokens.append(json.dumps(engine_kwargs, sort_keys=True, default=str))
+
+    return hashlib.sha1('\n'.join(tokens).encode()).hexdigest()
+
+
+def _load_result(
+    cache_dir: Path,
+    key: str,
+) -> Optional[xr.DataArray]:
+    """Loads a cached result, or returns None if it is not cached. Hits are marked as recently used."""
+    raster_path = cache_dir / f'result_{key}.tif'
+    meta_path = cache_dir / f'result_{key}.json'
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        out_raster = tools.load_raster(raster_path).load()
+        os.utime(raster_path)
+    except (FileNotFoundError, ValueError, RasterioIOError):
+        return None
+
+    # restore the band/time index lost in the GeoTIFF
+    if meta['dim'] is not None:
+        out_raster = out_raster.rename({out_raster.dims[0]: meta['dim']})
+        out_raster[meta['dim']] = np.array(meta['index'], dtype=meta['index_dtype'])
+
+    # drop scalar coordinates added by the GeoTIFF (i.e. 'band') that the computed result did not have
+    if 'coords' in meta.keys():
+        out_raster = out_raster.drop_vars([
+            k for k in out_raster.coords.keys()
+            if k not in out_raster.dims and k not in meta['coords']
+        ])
+    out_raster.name = meta['name']
+    return out_raster
+
+
+def _save_result(
+    cache_dir: Path,
+    key: str,
+    out_raster: xr.DataArray,
+) -> None:
+    """Saves a result to the cache atomically, then evicts the least recently used results if necessary."""
+    meta = {
+        'name': out_raster.name,
+        'coords': list(out_raster.coords.keys()),
+        'dim': None,
+        'index': None,
+        'index_dtype': None,
+    }
+    if len(out_raster.shape) == 3:
+        dim = out_raster.dims[0]
+        meta.update({
+            'dim': dim,
+            'index': utilities._index_labels(out_raster[dim].values),
+            'index_dtype': out_raster[dim].dtype.str,
+        })
+
+    temp_id = uuid.uuid4().hex
+    temp_raster = cache_dir / f'temp_{temp_id}.tif'
+    temp_meta = cache_dir / f'temp_{temp_id}.json'
+    tools.save_raster(out_raster, temp_raster)
+    with open(temp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temp_meta, cache_dir / f'result_{key}.json')
+    os.replace(temp_raster, cache_dir / f'result_{key}.tif')
+
+    _evict(cache_dir)
+
+
+def _evict(
+    cache_dir: Path,
+) -> None:
+    """Deletes the least recently used results until the cache is within CacheSettings['max_size_bytes']."""
+    with _CACHE_LOCK:
+        rasters = []
+        for path in cache_dir.glob('result_*.tif'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            rasters.append((stat.st_mtime_ns, stat.st_size, path))
+        rasters.sort()
+
+        total_size = sum(i[1] for i in rasters)
+        while total_size > CacheSettings['max_size_bytes'] and len(rasters) > 1:
+            _, size, path = rasters.pop(0)
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+            total_size -= size
+
+
+def cache_result(
+    func: Callable,
+) -> Callable:
+    """Decorator that loads/saves a terrain engine dispatcher's output from/to the result cache (if enabled).
+
+    Example usage:
+
+        @engine_validator.validate_engine(SupportsAccumulateFlow)
+        @cache_result
+        def accumulate_flow(d8_fdr, engine, ...):
+            ...
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def cached_func(*args, **kwargs) -> xr.DataArray:
+        cache_dir = CacheSettings['cache_dir']
+        if cache_dir is None:
+            return func(*args, **kwargs)
+
+        bound_arguments = signature.bind(*args, **kwargs)
+        bound_arguments.apply_defaults()
+        key = _cache_key(func, bound_arguments)
+
+        out_raster = _load_result(cache_dir, key)
+        if out_raster is not None:
+            # save if necessary
+            out_path = bound_arguments.arguments.get('out_path', None)
+            if out_path is not None:
+                tools.save_raster(
+                    out_raster,
+                    out_path,
+                )
+            return out_raster
+
+        out_raster = func(*args, **kwargs)
+
+        # note: (stat, band, y, x) outputs can't be stored as a GeoTIFF
+        if len(out_raster.shape) <= 3:
+            _save_result(cache_dir, key, out_raster)
+        return out_raster
+    return cached_func
@@ -4,20 +4,38 @@ class:TauDEMEngine stores concrete implementation of some terrain engine
 protocols, TauDEM specific helper functions, the engines required D8 format,
 and a dictionary with valid function kwargs.
 
-Note that when using the TauDEM terrain engine temporary files will be saved 
-to the current working directory. Additionally, in HPC environments one may 
+Note that when using the TauDEM terrain engine temporary files are written to 
+an isolated directory that is created for each function call and deleted 
+afterwards. By default this directory is made in the system temporary 
+directory, but a faster location (i.e. RAM-backed '/dev/shm' or local NVMe) 
+can be set for all calls via TauDEMEngine.temp_dir, or for a single call via 
+kwargs={'temp_dir': '/dev/shm'}. Additionally, in HPC environments one may 
 need to pass in kwargs={'mpiCall': 'alternative command line call'} if 
 'mpiexec' (default) is not a valid command line term.
 
+Input rasters that are not per-band parameters (i.e. the D8 FDR) are written 
+to disk once and cached by a fingerprint of their values, transform, and CRS. 
+Repeated calls and bands then reuse the same file, and files in use by a 
+running call are never evicted. Set TauDEMEngine.cache_inputs = False to 
+disable this, or call TauDEMEngine.clear_input_cache() to delete the cached 
+files.
+
+Multi-band functions can run several bands at once by passing a total core 
+budget, i.e. kwargs={'cores': 8, 'max_cores': 32} runs 4 bands at a time 
+with 8 MPI ranks each.
+
 For more information on TauDEM see the projects documentation:
 https://hydrology.usu.edu/taudem/taudem5/
 """
 import tempfile
 import subprocess
 import warnings
-import pathlib
-import tempfile
-from typing import List, Dict, Union, Optional
+import uuid
+import weakref
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple, Union, Optional
 from pathlib import Path
 import numpy as np
 import xarray as xr
@@ -31,44 +49,185 @@ class TauDEMEngine:
 
     d8_format = 'taudem'
 
+    # root directory for per-call temporary directories (None uses the system default)
+    temp_dir: Optional[Union[str, Path]] = None
+
+    # on-disk cache of prepared input rasters, keyed by content fingerprint
+    cache_inputs: bool = True
+    max_cached_inputs: int = 4
+    _input_cache: 'OrderedDict[str, Path]' = OrderedDict()
+    _input_cache_dir: Optional[tempfile.TemporaryDirectory] = None
+    _input_cache_lock = threading.RLock()
+
+    # cached inputs in use by a function call are pinned, and never evicted
+    _input_cache_pins: Dict[str, int] = {}
+    _workspace_inputs: Dict[str, List[str]] = {}
+
     function_kwargs = {
         'accumulate_flow': custom_types.TaudemFACInputDict.__annotations__,
-        'accumulate_parameter': custom_types.TaudemFACInputDict.__annotations__,
+        'accumulate_parameter': custom_types.TaudemBandsFACInputDict.__annotations__,
         'distance_to_stream': custom_types.TaudemDistance_to_streamInputDict.__annotations__,
-        'extreme_upslope_values': custom_types.TaudemMaxUpslopeInputDict.__annotations__,
-        'decay_accumulation': custom_types.TaudemFACInputDict.__annotations__,
+        'extreme_upslope_values': custom_types.TaudemBandsMaxUpslopeInputDict.__annotations__,
+        'decay_accumulation': custom_types.TaudemBandsFACInputDict.__annotations__,
     }
 
+    @staticmethod
+    def _make_workspace(
+        kwargs_dict: Union[Dict[str, str], Dict[str, Dict[str, str]]],
+    ) -> Tuple[Dict[str, str], tempfile.TemporaryDirectory]:
+        """Separates "temp_dir" from TauDEM kwargs and creates an isolated temporary directory for one function call.
+
+        The directory is created within kwargs["temp_dir"] if provided, otherwise within
+        TauDEMEngine.temp_dir, or the system default temporary directory if both are None.
+
+        Returns:
+            A tuple with the remaining kwargs and a tempfile.TemporaryDirectory object.
+        """
+        if 'kwargs' in kwargs_dict.keys():
+            kwargs_dict = kwargs_dict['kwargs']
+        kwargs_dict = dict(kwargs_dict)
+        temp_dir = kwargs_dict.pop('temp_dir', TauDEMEngine.temp_dir)
+
+        if temp_dir is not None:
+            temp_dir = Path(temp_dir)
+            if not temp_dir.is_dir():
+                raise TypeError(
+                    f'param:temp_dir={str(temp_dir)} is not a valid directory!'
+                )
+
+        workspace = tempfile.TemporaryDirectory(
+            prefix='fcpgtools_taudem_',
+            dir=temp_dir,
+        )
+        return kwargs_dict, workspace
+
+    @staticmethod
+    def _temp_path(
+        workspace: tempfile.TemporaryDirectory,
+        prefix: str,
+    ) -> Path:
+        """Returns a unique (not yet existing) .tif file path within a temporary directory."""
+        return Path(workspace.name) / f'{prefix}_{uuid.uuid4().hex}.tif'
+
+    @staticmethod
+    def _cached_input(
+        in_raster: xr.DataArray,
+        workspace: tempfile.TemporaryDirectory,
+    ) -> str:
+        """Returns the path to a cached copy of a raster, writing it only if an identical raster is not cached.
+
+        Cached files are kept in a directory within TauDEMEngine.temp_dir until TauDEMEngine.clear_input_cache()
+        is called or the interpreter exits. The file is pinned until param:workspace is cleared, and the least
+        recently used unpinned files are deleted once there are more than TauDEMEngine.max_cached_inputs.
+        """
+        fingerprint = utilities._fingerprint(in_raster)
+        cache = TauDEMEngine._input_cache
+
+        with TauDEMEngine._input_cache_lock:
+            if fingerprint in cache.keys() and cache[fingerprint].exists():
+                cache.move_to_end(fingerprint)
+                cache_path = cache[fingerprint]
+            else:
+                if TauDEMEngine._input_cache_dir is None:
+                    TauDEMEngine._input_cache_dir = tempfile.TemporaryDirectory(
+                        prefix='fcpgtools_taudem_cache_',
+                        dir=TauDEMEngine.temp_dir,
+                    )
+                cache_path = Path(
+                    TauDEMEngine._input_cache_dir.name,
+                    f'taudem_cached_input_{fingerprint}.tif',
+                )
+                cache_path.unlink(missing_ok=True)
+                tools.save_raster(
+                    in_raster,
+                    cache_path,
+                    profile='none',
+                )
+                if not cache_path.exists():
+                    raise FileNotFoundError('Failed to create cached input file!')
+                cache[fingerprint] = cache_path
+
+            # pin the file for the calling function, released when its workspace is cleared (or garbage collected)
+            TauDEMEngine._input_cache_pins[fingerprint] = TauDEMEngine._input_cache_pins.get(fingerprint, 0) + 1
+            if workspace.name not in TauDEMEngine._workspace_inputs.keys():
+                TauDEMEngine._workspace_inputs[workspace.name] = []
+                weakref.finalize(
+                    workspace,
+                    TauDEMEngine._release_cached_inputs,
+                    workspace.name,
+                )
+            TauDEMEngine._workspace_inputs[workspace.name].append(fingerprint)
+            TauDEMEngine._evict_cached_inputs()
+
+        return str(cache_path)
+
+    @staticmethod
+    def _evict_cached_inputs() -> None:
+        """Deletes the least recently used unpinned cached inputs until at most TauDEMEngine.max_cached_inputs remain."""
+        cache = TauDEMEngine._input_cache
+        with TauDEMEngine._input_cache_lock:
+            for fingerprint in list(cache.keys()):
+                if len(cache) <= max(1, TauDEMEngine.max_cached_inputs):
+                    break
+                if TauDEMEngine._input_cache_pins.get(fingerprint, 0) == 0:
+                    cache.pop(fingerprint).unlink(missing_ok=True)
+
+    @staticmethod
+    def _release_cached_inputs(
+        workspace_name: str,
+    ) -> None:
+        """Unpins the cached inputs used by a function call's workspace, then evicts cached inputs if necessary."""
+        with TauDEMEngine._input_cache_lock:
+            for fingerprint in TauDEMEngine._workspace_inputs.pop(workspace_name, []):
+                pins = TauDEMEngine._input_cache_pins.get(fingerprint, 0) - 1
+                if pins > 0:
+                    TauDEMEngine._input_cache_pins[fingerprint] = pins
+                else:
+                    TauDEMEngine._input_cache_pins.pop(fingerprint, None)
+            TauDEMEngine._evict_cached_inputs()
+
+    @staticmethod
+    def clear_input_cache() -> None:
+        """Deletes all cached TauDEM input rasters."""
+        with TauDEMEngine._input_cache_lock:
+            TauDEMEngine._input_cache.clear()
+            if TauDEMEngine._input_cache_dir is not None:
+                TauDEMEngine._clear_temp_files(TauDEMEngine._input_cache_dir)
+                TauDEMEngine._input_cache_dir = None
+
     @staticmethod
     def _taudem_prepper(
         in_raster: Raster,
+        workspace: tempfile.TemporaryDirectory,
+        cache: bool = False,
     ) -> str:
-        """Converts an input raster into a TauDEM compatible path string.  Creates a temp file if necessary."""
-        if isinstance(in_raster, xr.DataArray):
-            temp_path = Path(
-                tempfile.NamedTemporaryFile(
-                    dir=Path.cwd(),
-                    prefix='taudem_temp_input',
-                    suffix='.tif',
-                ).name
+        """Converts an input raster into a TauDEM compatible path string.  Creates a temp file if necessary.
+
+        If param:cache is True (and TauDEMEngine.cache_inputs), the file is shared via TauDEMEngine._cached_input().
+        """
+        if isinstance(in_raster, xr.DataArray) and cache and TauDEMEngine.cache_inputs:
+            return TauDEMEngine._cached_input(in_raster, workspace)
+
+        elif isinstance(in_raster, xr.DataArray):
+            temp_path = TauDEMEngine._temp_path(
+                workspace,
+                prefix='taudem_temp_input',
             )
             tools.save_raster(
                 in_raster,
                 temp_path,
+                profile='none',
             )
-            in_raster = str(temp_path)
+            if not temp_path.exists():
+                raise FileNotFoundError('Failed to create temporary file!')
+            return str(temp_path)
 
-        elif isinstance(in_raster, pathlib.PathLike):
-            in_raster = str(in_raster)
+        elif isinstance(in_raster, (str, Path)):
+            return str(in_raster)
 
         else:
             raise TypeError(
-                'param:d8_fdr must be a xr.DataArray of a PathLike object.')
-
-        if temp_path.exists():
-            return in_raster
-        else:
-            raise FileNotFoundError('Failed to create temporary file!')
+                'param:in_raster must be a xr.DataArray or a PathLike object.')
 
     @staticmethod
     def _update_taudem_dict(
@@ -85,100 +244,93 @@ class TauDEMEngine:
                     print(f'WARNING: Kwarg argument {key} is invalid.')
         return taudem_dict
 
+    @staticmethod
+    def _pop_core_budget(
+        kwargs_dict: Union[Dict[str, str], Dict[str, Dict[str, str]]],
+    ) -> Tuple[Dict[str, str], Optional[int], int]:
+        """Separates the total core budget from TauDEM kwargs. Returns (kwargs, max_cores, cores per call)."""
+        if 'kwargs' in kwargs_dict.keys():
+            kwargs_dict = kwargs_dict['kwargs']
+        kwargs_dict = dict(kwargs_dict)
+        max_cores = kwargs_dict.pop('max_cores', None)
+        if max_cores is not None:
+            max_cores = int(max_cores)
+        cores = int(kwargs_dict.get('cores', 1))
+        return kwargs_dict, max_cores, cores
+
+    @staticmethod
+    def _run_band_jobs(
+        band_function: Callable[[xr.DataArray], xr.DataArray],
+        raster_bands: Dict[Tuple[int, Union[int, str]], xr.DataArray],
+        max_cores: Optional[int] = None,
+        cores: int = 1,
+    ) -> Dict[Tuple[int, Union[int, str]], xr.DataArray]:
+        """Runs a TauDEM command for each raster band, running as many bands at once as fit in a core budget.
+
+        Results are collected as each band finishes.
+
+        Args:
+            band_function: A function that takes a single band raster and returns the TauDEM output raster.
+            raster_bands: A dictionary of single band rasters, i.e. the output of utilities._split_bands().
+            max_cores: The total # of cores that can be used at once. If None (default), bands are run serially.
+            cores: The # of MPI ranks used by each TauDEM command.
+
+        Returns:
+            A dictionary of output rasters with the same keys (and order) as param:raster_bands.
+        """
+        n_jobs = 1
+        if max_cores is not None:
+            n_jobs = max(1, max_cores // max(1, cores))
+        n_jobs = min(n_jobs, len(raster_bands))
+
+        out_dict = {}
+        if n_jobs <= 1:
+            for index_tuple, array in raster_bands.items():
+                out_dict[index_tuple] = band_function(array)
+            return out_dict
+
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            futures = {
+                executor.submit(band_function, array): index_tuple
+                for index_tuple, array in raster_bands.items()
+            }
+            for future in as_completed(futures):
+                out_dict[futures[future]] = future.result()
+
+        return {key: out_dict[key] for key in raster_bands.keys()}
+
     @staticmethod
     def _clear_temp_files(
-        prefixs: Union[str, List[str]],
-        directory: Path = Path.cwd(),
+        workspace: tempfile.TemporaryDirectory,
     ) -> None:
-        """Deletes all files with a given prefix(s) in a directory path."""
-        if directory != Path.cwd() or not directory.is_dir():
-            raise TypeError(
-                f'param:dir={str(directory)} is not a valid directory!'
-            )
-        if isinstance(prefixs, str):
-            prefixs = [prefixs]
-
-        # delete files with matching prefixes
-        could_not_delete = []
-        for file in directory.iterdir():
-            try:
-                remove = False
-                for prefix in prefixs:
-                    if prefix in str(file):
-                        remove = True
-                if remove:
-                    file.unlink()
-            except PermissionError:
-                could_not_delete.append(file)
-
-        could_not_delete = [f for f in could_not_delete if f.exists()]
-        if len(could_not_delete) > 0:
+        """Deletes a function call's temporary directory and unpins its cached inputs. No other files are touched."""
+        TauDEMEngine._release_cached_inputs(workspace.name)
+        try:
+            workspace.cleanup()
+        except (PermissionError, OSError):
             warnings.warn(
                 message=(
-                    f'Could not delete {len(could_not_delete)} temp files in'
-                    f' {str(directory)} due to a PermissionError.'
+                    f'Could not delete temp directory {workspace.name}'
+                    ' due to a PermissionError.'
                 ),
                 category=UserWarning,
             )
-            del could_not_delete
 
     @staticmethod
-    def accumulate_flow(
-        d8_fdr: Raster,
-        upstream_pour_points: Optional[PourPointValuesDict] = None,
+    def _aread8_cmd(
+        d8_fdr: xr.DataArray,
+        d8_fdr_path: str,
+        workspace: tempfile.TemporaryDirectory,
         weights: Optional[xr.DataArray] = None,
         out_path: Optional[Union[str, Path]] = None,
         **kwargs,
     ) -> xr.DataArray:
-        """Create a Flow Accumulation Cell (FAC) raster from a TauDEM format D8 Flow Direction Raster.
-
-        NOTE: this is a command line wrapper of TauDEM:aread8 and replaces tools.tauFlowAccum() from V1 FCPGtools.
-
-        Args:
-            d8_fdr: A TauDEM format D8 Flow Direction Raster (dtype=Int).
-            upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
-                and updated cell values as the second [1].
-                This allows the FAC to be made with boundary conditions such as upstream basin pour points.
-            weights: A grid defining the value to accumulate from each cell. Default is a grid of 1s.
-            out_path: Defines a path to save the output raster.
-            **kwargs: Can pass in optional TauDEM:aread8 parameter values using "cores", "mpiCall", or "mpiArg" as keys.
-
-        Returns:
-            The output Flow Accumulation Cells (FAC) raster.
-        """
-        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr)
-
-        # get temporary files for necessary inputs
-        if upstream_pour_points is None and weights is None:
-            weight_path = ''
-            wg = ''
-        else:
-            if weights is None:
-                weights = xr.zeros_like(
-                    d8_fdr,
-                    dtype=np.dtype('float64'),
-                ) + 1
-                weights = tools.adjust_parameter_raster(
-                    weights,
-                    d8_fdr,
-                    upstream_pour_points,
-                )
-                weights = tools.make_fac_weights(
-                    weights,
-                    d8_fdr,
-                    -1,
-                )
-            weight_path = TauDEMEngine._taudem_prepper(weights)
-            wg = '-wg '
+        """Back end function that makes the command line call for TauDEM:aread8 w/ an already prepared D8 FDR path"""
+        if weights is not None:
+            weight_path = TauDEMEngine._taudem_prepper(weights, workspace)
 
         if out_path is None:
-            out_path = Path(
-                tempfile.NamedTemporaryFile(
-                    dir=Path.cwd(),
-                    prefix='fac_temp',
-                    suffix='.tif',
-                ).name
-            )
+            out_path = TauDEMEngine._temp_path(workspace, prefix='fac_temp')
         elif isinstance(out_path, str):
             out_path = Path(out_path)
 
@@ -190,8 +342,8 @@ class TauDEMEngine:
             'mpiArg': '-n',
         }
 
-        if wg != '':
-            taudem_dict['finalArg'] = f'{wg}{str(weight_path)} -nc'
+        if weights is not None:
+            taudem_dict['finalArg'] = f'-wg {str(weight_path)} -nc'
         else:
             taudem_dict['finalArg'] = '-nc'
 
@@ -211,7 +363,7 @@ class TauDEMEngine:
                 'Make sure TauDEM is in your virtual environment.'
             )
 
-        out_raster = tools.load_raster(Path(taudem_dict['outFl']))
+        out_raster = tools.load_raster(Path(taudem_dict['outFl'])).load()
         out_raster = out_raster.astype(np.float64)
 
         # convert out of bounds values to np.nan, in bounds nan to 0, and update nodata
@@ -225,14 +377,68 @@ class TauDEMEngine:
             (d8_fdr.values != d8_fdr.rio.nodata),
             np.nan,
         )
+        return out_raster
+
+    @staticmethod
+    def accumulate_flow(
+        d8_fdr: Raster,
+        upstream_pour_points: Optional[PourPointValuesDict] = None,
+        weights: Optional[xr.DataArray] = None,
+        out_path: Optional[Union[str, Path]] = None,
+        **kwargs,
+    ) -> xr.DataArray:
+        """Create a Flow Accumulation Cell (FAC) raster from a TauDEM format D8 Flow Direction Raster.
+
+        NOTE: this is a command line wrapper of TauDEM:aread8 and replaces tools.tauFlowAccum() from V1 FCPGtools.
+
+        Args:
+            d8_fdr: A TauDEM format D8 Flow Direction Raster (dtype=Int).
+            upstream_pour_points: A list of lists each with with coordinate tuples as the first item [0],
+                and updated cell values as the second [1].
+                This allows the FAC to be made with boundary conditions such as upstream basin pour points.
+            weights: A grid defining the value to accumulate from each cell. Default is a grid of 1s.
+            out_path: Defines a path to save the output raster.
+            **kwargs: Can pass in optional TauDEM:aread8 parameter values using "cores", "mpiCall", or "mpiArg" as keys.
+                Additionally, "temp_dir" sets the directory that temporary files are written within.
+
+        Returns:
+            The output Flow Accumulation Cells (FAC) raster.
+        """
+        kwargs, workspace = TauDEMEngine._make_workspace(kwargs)
+        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr, workspace, cache=True)
+
+        # make pour point weights if necessary
+        if upstream_pour_points is not None and weights is None:
+            weights = xr.zeros_like(
+                d8_fdr,
+                dtype=np.dtype('float64'),
+            ) + 1
+            weights = tools.adjust_parameter_raster(
+                weights,
+                d8_fdr,
+                upstream_pour_points,
+            )
+            weights = tools.make_fac_weights(
+                weights,
+                d8_fdr,
+                -1,
+            )
+
+        out_raster = TauDEMEngine._aread8_cmd(
+            d8_fdr,
+            d8_fdr_path,
+            workspace,
+            weights=weights,
+            out_path=out_path,
+            kwargs=kwargs,
+        )
 
         # remove temporary files and return output
         d8_fdr.close()
         out_raster.close()
-        if weights is None:
-            TauDEMEngine._clear_temp_files(prefixs=['fac_temp'])
-        else:
+        if weights is not None:
             weights.close()
+        TauDEMEngine._clear_temp_files(workspace)
 
         return out_raster
 
@@ -258,6 +464,8 @@ class TauDEMEngine:
                 This allows the FAC to be made with boundary conditions such as upstream basin pour points.
             out_path: Defines a path to save the output raster.
             **kwargs: Can pass in optional TauDEM:aread8 parameter values using "cores", "mpiCall", or "mpiArg" as keys.
+                Additionally, "max_cores" sets a total core budget, allowing max_cores // cores bands to run at once,
+                and "temp_dir" sets the directory that temporary files are written within.
 
         Returns:
             The output parameter accumulation raster.
@@ -277,9 +485,24 @@ class TauDEMEngine:
                 upstream_pour_points,
             )
 
-        # prep kwargs to be passed into accumulate_flow()
-        if 'kwargs' in kwargs.keys():
-            kwargs = kwargs['kwargs']
+        # prep kwargs, and write (or find the cached) D8 FDR once for all bands
+        kwargs, max_cores, cores = TauDEMEngine._pop_core_budget(kwargs)
+        kwargs, workspace = TauDEMEngine._make_workspace(kwargs)
+        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr, workspace, cache=True)
+
+        def _accumulate_band(array: xr.DataArray) -> xr.DataArray:
+            # each band's temporary files are deleted as soon as it is done
+            _, band_workspace = TauDEMEngine._make_workspace({'temp_dir': workspace.name})
+            try:
+                return TauDEMEngine._aread8_cmd(
+                    d8_fdr,
+                    d8_fdr_path,
+                    band_workspace,
+                    weights=array,
+                    kwargs=kwargs,
+                )
+            finally:
+                TauDEMEngine._clear_temp_files(band_workspace)
 
         # split if multi-dimensional
         if len(parameter_raster.shape) > 2:
@@ -287,18 +510,13 @@ class TauDEMEngine:
         else:
             raster_bands = {(0, 0): parameter_raster}
 
-        # create weighted accumulation rasters
-        out_dict = {}
-        for index_tuple, array in raster_bands.items():
-            i, dim_name = index_tuple
-
-            accumulated = TauDEMEngine.accumulate_flow(
-                d8_fdr,
-                weights=array,
-                kwargs=kwargs,
-            )
-
-            out_dict[(i, dim_name)] = accumulated
+        # create weighted accumulation rasters (concurrently if a core budget is set)
+        out_dict = TauDEMEngine._run_band_jobs(
+            _accumulate_band,
+            raster_bands,
+            max_cores=max_cores,
+            cores=cores,
+        )
 
         # re-combine into DataArray
         if len(out_dict.keys()) > 1:
@@ -318,14 +536,9 @@ class TauDEMEngine:
 
         # remove temporary files and return output
         d8_fdr.close()
-        accumulated.close()
-        array.close()
         parameter_raster.close()
         out_raster.close()
-
-        TauDEMEngine._clear_temp_files(
-            prefixs=['taudem_temp_input', 'fac_temp']
-        )
+        TauDEMEngine._clear_temp_files(workspace)
 
         return out_raster
 
@@ -333,7 +546,7 @@ class TauDEMEngine:
     def distance_to_stream(
         d8_fdr: Raster,
         fac_raster: Raster,
-        accum_threshold: int,
+        accum_threshold: Union[int, List[int]],
         out_path: Optional[Union[str, Path]] = None,
         **kwargs,
     ) -> xr.DataArray:
@@ -345,28 +558,52 @@ class TauDEMEngine:
             d8_fdr: A TauDEM format D8 Flow Direction Raster (dtype=Int).
             fac_raster: A Flow Accumulation Cell (FAC) raster output from accumulate_flow().
             accum_threshold: The # of upstream/accumulated cells to consider a cell a stream.
+                If a list of thresholds is provided, TauDEM is run once per threshold
+                and a (accum_threshold, y, x) output is returned.
             out_path: Defines a path to save the output raster.
             **kwargs: Can pass in optional TauDEM:D8HDistTostrm parameter values using "cores", "mpiCall", or "mpiArg" as keys.
+                Additionally, "temp_dir" sets the directory that temporary files are written within.
 
         Returns:
             A raster with values of D8 flow distance from each cell to the nearest stream.
         """
-        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr)
+        # run each threshold of a sweep separately, then stack the outputs
+        if not np.isscalar(accum_threshold):
+            out_raster = xr.concat(
+                [
+                    TauDEMEngine.distance_to_stream(
+                        d8_fdr,
+                        fac_raster,
+                        threshold,
+                        **kwargs,
+                    ) for threshold in accum_threshold
+                ],
+                dim='accum_threshold',
+            )
+            out_raster['accum_threshold'] = list(accum_threshold)
+
+            # save if necessary
+            if out_path is not None:
+                tools.save_raster(
+                    out_raster,
+                    out_path,
+                )
+            return out_raster
+
+        kwargs, workspace = TauDEMEngine._make_workspace(kwargs)
+        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr, workspace, cache=True)
 
         # get stream grid as a taudem tempfile
         fac_raster = tools.load_raster(fac_raster)
         fac_raster = fac_raster.fillna(0)
         fac_raster = fac_raster.rio.write_nodata(0)
         fac_raster = fac_raster.astype('int')
-        fac_path = TauDEMEngine._taudem_prepper(fac_raster)
+        fac_path = TauDEMEngine._taudem_prepper(fac_raster, workspace, cache=True)
 
         if out_path is None:
-            out_path = Path(
-                tempfile.NamedTemporaryFile(
-                    dir=Path.cwd(),
-                    prefix='distance_to_stream_temp',
-                    suffix='.tif',
-                ).name
+            out_path = TauDEMEngine._temp_path(
+                workspace,
+                prefix='distance_to_stream_temp',
             )
         elif isinstance(out_path, str):
             out_path = Path(out_path)
@@ -395,7 +632,7 @@ class TauDEMEngine:
                 'TauDEM D8HDistTostrm failed to create an output!')
 
         # update nodata values
-        out_raster = tools.load_raster(out_path)
+        out_raster = tools.load_raster(out_path).load()
         out_raster = utilities._change_nodata_value(
             out_raster,
             np.nan,
@@ -421,8 +658,7 @@ class TauDEMEngine:
         streams.close()
         out_raster.close()
 
-        TauDEMEngine._clear_temp_files(
-            prefixs=['taudem_temp_input', 'distance_to_stream_temp'])
+        TauDEMEngine._clear_temp_files(workspace)
 
         return out_raster
 
@@ -431,20 +667,18 @@ class TauDEMEngine:
         d8_fdr_path: str,
         parameter_raster: xr.DataArray,
         accum_type_str: str,
+        workspace: tempfile.TemporaryDirectory,
         **kwargs,
     ) -> xr.DataArray:
         """Back end function that makes the command line call for TauDEM:D8FlowPathExtremeUp"""
 
-        parameter_raster_path = TauDEMEngine._taudem_prepper(parameter_raster)
+        parameter_raster_path = TauDEMEngine._taudem_prepper(
+            parameter_raster,
+            workspace,
+        )
 
         # make temporary output path
-        out_path = Path(
-            tempfile.NamedTemporaryFile(
-                dir=Path.cwd(),
-                prefix='ext_upslope_temp',
-                suffix='.tif',
-            ).name
-        )
+        out_path = TauDEMEngine._temp_path(workspace, prefix='ext_upslope_temp')
 
         taudem_dict = {
             'fdr': d8_fdr_path,
@@ -466,7 +700,7 @@ class TauDEMEngine:
             raise FileNotFoundError(
                 'TauDEM D8FlowPathExtremeUp failed to create an output!')
 
-        out_raster = tools.load_raster(Path(taudem_dict['outRast']))
+        out_raster = tools.load_raster(Path(taudem_dict['outRast'])).load()
 
         # update nodata and convert -9999 values to nodata
         out_raster = out_raster.where(
@@ -501,18 +735,19 @@ class TauDEMEngine:
             out_path: Defines a path to save the output raster.
             get_min_upslope: If True, the minimum upslope value is assigned to each cell.
             **kwargs: Can pass in optional TauDEM:d8flowpathextremeup parameter values using "cores", "mpiCall", or "mpiArg" as keys.
+                Additionally, "max_cores" sets a total core budget, allowing max_cores // cores bands to run at once,
+                and "temp_dir" sets the directory that temporary files are written within.
 
         Returns:
             A raster with max (or min) upstream value of the parameter grid as each cell's value.
         """
-        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr)
+        kwargs, max_cores, cores = TauDEMEngine._pop_core_budget(kwargs)
+        kwargs, workspace = TauDEMEngine._make_workspace(kwargs)
+
+        d8_fdr_path = TauDEMEngine._taudem_prepper(d8_fdr, workspace, cache=True)
         parameter_raster = tools.load_raster(parameter_raster)
         accum_type_str = '-min' if get_min_upslope else ''
 
-        # prep kwargs to be passed into accumulate_flow()
-        if 'kwargs' in kwargs.keys():
-            kwargs = kwargs['kwargs']
-
         # split if multi-dimensional
         if len(parameter_raster.shape) > 2:
             raster_bands = utilities._split_bands(parameter_raster)
@@ -520,18 +755,18 @@ class TauDEMEngine:
             raster_bands = {(0, 0): parameter_raster}
 
         # create extreme upslope value rasters for each parameter raster band
-        out_dict = {}
-        for index_tuple, array in raster_bands.items():
-            i, dim_name = index_tuple
-
-            upslope_raster = TauDEMEngine._ext_upslope_cmd(
+        out_dict = TauDEMEngine._run_band_jobs(
+            lambda array: TauDEMEngine._ext_upslope_cmd(
                 d8_fdr_path,
                 array,
                 accum_type_str,
+                workspace,
                 kwargs=kwargs,
-            )
-
-            out_dict[(i, dim_name)] = upslope_raster
+            ),
+            raster_bands,
+            max_cores=max_cores,
+            cores=cores,
+        )
 
         # re-combine into DataArray
         if len(out_dict.keys()) > 1:
@@ -571,34 +806,23 @@ class TauDEMEngine:
 
         # clear temporary files and return the output
         d8_fdr.close()
-        upslope_raster.close()
-        array.close()
         parameter_raster.close()
         out_raster.close()
 
-        TauDEMEngine._clear_temp_files(
-            prefixs=['taudem_temp_input', 'ext_upslope_temp']
-        )
+        TauDEMEngine._clear_temp_files(workspace)
         return out_raster
 
     @staticmethod
     def _decay_accumulation_cmd(
         dinf_fdr_path: str,
         decay_raster_path: str,
+        workspace: tempfile.TemporaryDirectory,
         weights: Optional[xr.DataArray] = None,
         **kwargs,
     ) -> xr.DataArray:
 
-        weights_path = TauDEMEngine._taudem_prepper(weights)
-
         # make temporary output path
-        out_path = Path(
-            tempfile.NamedTemporaryFile(
-                dir=Path.cwd(),
-                prefix='decay_accum_temp',
-                suffix='.tif',
-            ).name
-        )
+        out_path = TauDEMEngine._temp_path(workspace, prefix='decay_accum_temp')
 
         # build the input dictionary
         taudem_dict = {
@@ -611,6 +835,7 @@ class TauDEMEngine:
         }
 
         if weights is not None:
+            weights_path = TauDEMEngine._taudem_prepper(weights, workspace)
             taudem_dict['finalArg'] = f'-wg {str(weights_path)} -nc'
         else:
             taudem_dict['finalArg'] = '-nc'
@@ -629,7 +854,7 @@ class TauDEMEngine:
             raise FileNotFoundError(
                 'TauDEM dinfdecayaccum failed to create an output!')
 
-        out_raster = tools.load_raster(Path(taudem_dict['dsca']))
+        out_raster = tools.load_raster(Path(taudem_dict['dsca'])).load()
 
         # update nodata and convert -9999 values to nodata
         out_raster = out_raster.where(
@@ -670,20 +895,22 @@ class TauDEMEngine:
                 This can be multi-dimensional (i.e. f(x, y, t)), and if so, a multi-dimensional output is returned.
             out_path: Defines a path to save the output raster.
             **kwargs: Can pass in optional TauDEM:DinfDecayAccum parameter values using "cores", "mpiCall", or "mpiArg" as keys.
+                Additionally, "max_cores" sets a total core budget, allowing max_cores // cores bands to run at once,
+                and "temp_dir" sets the directory that temporary files are written within.
 
         Returns:
             The output decayed accumulation raster.
         """
+        # prep kwargs to be passed into _decay_accumulation_cmd()
+        kwargs, max_cores, cores = TauDEMEngine._pop_core_budget(kwargs)
+        kwargs, workspace = TauDEMEngine._make_workspace(kwargs)
+
         # prep data for taudem
         d8_fdr = tools.load_raster(d8_fdr)
         dinf_fdr = tools.d8_to_dinfinity(d8_fdr)
 
-        dinf_fdr_path = TauDEMEngine._taudem_prepper(dinf_fdr)
-        decay_raster_path = TauDEMEngine._taudem_prepper(decay_raster)
-
-        # prep kwargs to be passed into accumulate_flow()
-        if 'kwargs' in kwargs.keys():
-            kwargs = kwargs['kwargs']
+        dinf_fdr_path = TauDEMEngine._taudem_prepper(dinf_fdr, workspace, cache=True)
+        decay_raster_path = TauDEMEngine._taudem_prepper(decay_raster, workspace, cache=True)
 
         # prep parameter raster and boundary conditions
         weights = None
@@ -713,19 +940,19 @@ class TauDEMEngine:
             else:
                 raster_bands = {(0, 0): weights}
 
-            # create extreme upslope value rasters for each parameter raster band
-            out_dict = {}
-            for index_tuple, array in raster_bands.items():
-                i, dim_name = index_tuple
-
-                decay_acc_raster = TauDEMEngine._decay_accumulation_cmd(
+            # create decay accumulation rasters for each parameter raster band
+            out_dict = TauDEMEngine._run_band_jobs(
+                lambda array: TauDEMEngine._decay_accumulation_cmd(
                     dinf_fdr_path,
                     decay_raster_path,
+                    workspace,
                     array,
                     kwargs=kwargs,
-                )
-
-                out_dict[(i, dim_name)] = decay_acc_raster
+                ),
+                raster_bands,
+                max_cores=max_cores,
+                cores=cores,
+            )
 
             # re-combine into DataArray
             if len(out_dict.keys()) > 1:
@@ -737,6 +964,7 @@ class TauDEMEngine:
             out_raster = TauDEMEngine._decay_accumulation_cmd(
                 dinf_fdr_path,
                 decay_raster_path,
+                workspace,
                 weights=None,
                 kwargs=kwargs,
             )
@@ -762,9 +990,6 @@ class TauDEMEngine:
 
         # clear temporary files and return the output
         out_raster.close()
-        decay_raster.close()
-        array.close()
-        decay_acc_raster.close()
         dinf_fdr.close()
         d8_fdr.close()
 
@@ -773,7 +998,5 @@ class TauDEMEngine:
         if parameter_raster is not None:
             parameter_raster.close()
 
-        TauDEMEngine._clear_temp_files(
-            prefixs=['taudem_temp_input', 'decay_accum_temp']
-        )
+        TauDEMEngine._clear_temp_files(workspace)
         return out_raster
@@ -0,0 +1,559 @@
+"""Tiled (out-of-core) D8 flow accumulation.
+
+The D8 Flow Direction Raster (FDR) is split into square tiles that are read
+and accumulated independently (and concurrently), so only a few tiles need
+to fit in memory at once. Flow that crosses tile edges is resolved in three
+steps:
+
+1. Each tile is accumulated on its own. Cells that drain into a neighbouring
+   tile ("outlets") record their local accumulation, the cell they drain
+   into, and each tile edge cell records which outlet its flow path leaves
+   the tile through.
+2. The outlets form a small tree (each outlet drains to at most one
+   downstream outlet), which is accumulated with the same topological pass
+   used for cells. This gives the total flow leaving every outlet.
+3. Each tile is accumulated again with the inflow from upstream tiles added
+   to the cells it enters through, and the result is written out.
+
+Flow cycles that cross tile edges show up as cycles in the outlet graph. As
+in FlowGraph, cells on a cycle keep their own weight plus inflow from
+outside the cycle, and pass nothing downstream.
+
+This automates the find_basin_pour_points() -> get_pour_point_values() ->
+upstream_pour_points workflow for a regular grid of tiles.
+"""
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+import xarray as xr
+import numba
+import rasterio
+import rasterio.shutil
+import rasterio.windows
+import fcpgtools.tools as tools
+import fcpgtools.utilities as utilities
+from fcpgtools.custom_types import Raster, D8ConversionDicts
+from fcpgtools.terrainengine.flow_graph import (
+    FlowGraph,
+    _d8_offset_lookup,
+    _d8_receivers,
+    _topological_order,
+)
+from fcpgtools.terrainengine.numba_engine import _accumulate
+
+
+@numba.njit(cache=True, nogil=True)
+def _route_to_outlets(
+    receivers: np.ndarray,
+    order: np.ndarray,
+    is_outlet: np.ndarray,
+) -> np.ndarray:
+    """Finds the outlet cell index each cell drains to within a tile (-1 if none)."""
+    route = np.full(receivers.size, -1, dtype=np.int64)
+    for k in range(order.size - 1, -1, -1):
+        i = order[k]
+        if is_outlet[i]:
+            route[i] = i
+        elif receivers[i] >= 0:
+            route[i] = route[receivers[i]]
+    return route
+
+
+@numba.njit(cache=True, nogil=True)
+def _trace_paths(
+    receivers: np.ndarray,
+    starts: np.ndarray,
+) -> np.ndarray:
+    """Marks every cell on the flow paths starting at param:starts."""
+    on_path = np.zeros(receivers.size, dtype=np.bool_)
+    for start in starts:
+        i = start
+        while i >= 0 and not on_path[i]:
+            on_path[i] = True
+            i = receivers[i]
+    return on_path
+
+
+class _Tile:
+    """A tile's window (without the 1 cell halo) in global row/column coordinates."""
+
+    def __init__(
+        self,
+        row_start: int,
+        row_stop: int,
+        col_start: int,
+        col_stop: int,
+    ) -> None:
+        self.row_start = row_start
+        self.row_stop = row_stop
+        self.col_start = col_start
+        self.col_stop = col_stop
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.row_stop - self.row_start, self.col_stop - self.col_start)
+
+    @property
+    def halo_shape(self) -> Tuple[int, int]:
+        return (self.shape[0] + 2, self.shape[1] + 2)
+
+
+def _make_tiles(
+    shape: Tuple[int, int],
+    tile_size: int,
+) -> List[_Tile]:
+    """Splits a (rows, columns) shape into tiles of at most tile_size x tile_size cells."""
+    return [
+        _Tile(row, min(row + tile_size, shape[0]),
+              col, min(col + tile_size, shape[1]))
+        for row in range(0, shape[0], tile_size)
+        for col in range(0, shape[1], tile_size)
+    ]
+
+
+def _read_window(
+    raster: xr.DataArray,
+    tile: _Tile,
+    fill_value: Union[int, float],
+    dtype: np.dtype = np.float64,
+) -> np.ndarray:
+    """Reads a tile and its 1 cell halo from a (y, x) raster. Halo cells outside the raster are param:fill_value."""
+    n_rows, n_cols = raster.shape
+    row_start = max(tile.row_start - 1, 0)
+    row_stop = min(tile.row_stop + 1, n_rows)
+    col_start = max(tile.col_start - 1, 0)
+    col_stop = min(tile.col_stop + 1, n_cols)
+
+    values = raster[row_start:row_stop, col_start:col_stop].values
+    out = np.full(tile.halo_shape, fill_value, dtype=dtype)
+    row_offset = row_start - (tile.row_start - 1)
+    col_offset = col_start - (tile.col_start - 1)
+    out[
+        row_offset:row_offset + values.shape[0],
+        col_offset:col_offset + values.shape[1],
+    ] = values
+    return out
+
+
+class _TiledAccumulator:
+    """Stores the inputs and boundary data shared by all tiles of a tiled accumulation."""
+
+    def __init__(
+        self,
+        d8_fdr: xr.DataArray,
+        d8_format: str,
+        weights: Optional[xr.DataArray],
+        tile_size: int,
+    ) -> None:
+        self.d8_fdr = d8_fdr
+        self.d8_format = d8_format
+        self.weights = weights
+        self.offset_lookup = _d8_offset_lookup(d8_format)
+        self.n_cols = d8_fdr.shape[1]
+        self.tiles = _make_tiles(d8_fdr.shape, tile_size)
+
+        # global cell index -> inflow from upstream tiles, per tile
+        self.inflows: List[Tuple[np.ndarray, np.ndarray]] = []
+
+        # global cells where a flow cycle enters each tile
+        self.cycle_entries: List[np.ndarray] = []
+
+    def _global_index(
+        self,
+        tile: _Tile,
+        local_index: np.ndarray,
+    ) -> np.ndarray:
+        """Converts flat indices within a tile's halo array into flat global cell indices."""
+        halo_cols = tile.halo_shape[1]
+        rows = local_index // halo_cols + tile.row_start - 1
+        cols = local_index % halo_cols + tile.col_start - 1
+        return rows * self.n_cols + cols
+
+    def _local_index(
+        self,
+        tile: _Tile,
+        global_index: np.ndarray,
+    ) -> np.ndarray:
+        """Converts flat global cell indices into flat indices within a tile's halo array."""
+        halo_cols = tile.halo_shape[1]
+        return (
+            (global_index // self.n_cols - tile.row_start + 1) * halo_cols +
+            (global_index % self.n_cols - tile.col_start + 1)
+        )
+
+    def _in_tile(
+        self,
+        tile: _Tile,
+        global_index: np.ndarray,
+    ) -> np.ndarray:
+        """Returns a mask of the flat global cell indices within a tile (excluding its halo)."""
+        rows = global_index // self.n_cols
+        cols = global_index % self.n_cols
+        return (
+            (rows >= tile.row_start) & (rows < tile.row_stop) &
+            (cols >= tile.col_start) & (cols < tile.col_stop)
+        )
+
+    def _tile_graph(
+        self,
+        tile: _Tile,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Builds a tile's flow graph. Flow into the halo is cut and recorded as outlets.
+
+        Returns:
+            A tuple with (receivers, valid cells, topological order, outlet mask, outlet receivers), all within the halo array.
+        """
+        # uint8 FDRs are read as is, with nodata in the halo
+        if self.d8_fdr.dtype == np.uint8:
+            fdr = _read_window(
+                self.d8_fdr,
+                tile,
+                D8ConversionDicts[self.d8_format]['nodata'],
+                dtype=np.uint8,
+            )
+        else:
+            fdr = _read_window(self.d8_fdr, tile, -1)
+            fdr = np.nan_to_num(fdr, nan=-1).astype(np.int64)
+        receivers, valid = _d8_receivers(fdr, self.offset_lookup)
+
+        core = np.zeros(tile.halo_shape, dtype=np.bool_)
+        core[1:-1, 1:-1] = True
+        core = core.ravel()
+
+        # only core cells are part of the graph
+        valid = valid & core
+        receivers = np.where(valid, receivers, -1)
+
+        # cut edges into the halo, keeping them as outlets
+        has_receiver = receivers >= 0
+        is_outlet = has_receiver.copy()
+        is_outlet[has_receiver] = ~core[receivers[has_receiver]]
+        outlet_receivers = np.where(is_outlet, receivers, -1)
+        receivers = np.where(is_outlet, -1, receivers)
+
+        order = _topological_order(receivers, valid)
+        return receivers, valid, order, is_outlet, outlet_receivers
+
+    def _tile_weights(
+        self,
+        tile: _Tile,
+        valid: np.ndarray,
+    ) -> np.ndarray:
+        """Reads a tile's flat weights, with nodata, np.nan, and invalid cells set to 0."""
+        if self.weights is None:
+            return valid.astype(np.float64)
+        weights = _read_window(self.weights, tile, 0).ravel()
+        nodata = self.weights.rio.nodata
+        if nodata is not None and not np.isnan(nodata):
+            weights[weights == nodata] = 0.0
+        weights[np.isnan(weights) | ~valid] = 0.0
+        return weights
+
+    def local_pass(
+        self,
+        tile: _Tile,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Accumulates a tile on its own and returns its boundary data.
+
+        Returns:
+            A tuple with global (outlet cells, outlet receiver cells, outlet accumulation values,
+            tile edge cells, outlet each tile edge cell drains to (-1 if none)).
+        """
+        receivers, valid, order, is_outlet, outlet_receivers = self._tile_graph(
+            tile)
+        accumulated = _accumulate(
+            receivers,
+            order,
+            self._tile_weights(tile, valid),
+        )
+        route = _route_to_outlets(receivers, order, is_outlet)
+
+        outlets = np.flatnonzero(is_outlet)
+
+        edge = np.zeros(tile.halo_shape, dtype=np.bool_)
+        edge[1:-1, 1:-1] = True
+        edge[2:-2, 2:-2] = False
+        edges = np.flatnonzero(edge.ravel() & valid)
+        edge_routes = route[edges]
+
+        return (
+            self._global_index(tile, outlets),
+            self._global_index(tile, outlet_receivers[outlets]),
+            accumulated[outlets],
+            self._global_index(tile, edges),
+            np.where(
+                edge_routes >= 0,
+                self._global_index(tile, np.maximum(edge_routes, 0)),
+                -1,
+            ),
+        )
+
+    def resolve_boundaries(
+        self,
+        boundary_data: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]],
+    ) -> None:
+        """Accumulates flow along the tree of tile outlets, and stores each tile's inflows."""
+        outlets, outlet_receivers, outlet_values, edges, edge_routes = [
+            np.concatenate(arrays) for arrays in zip(*boundary_data)
+        ]
+        if outlets.size == 0:
+            self.inflows = [
+                (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+                for _ in self.tiles
+            ]
+            self.cycle_entries = [
+                np.empty(0, dtype=np.int64) for _ in self.tiles
+            ]
+            return
+
+        # find the downstream outlet of each outlet (-1 if none)
+        downstream = np.full(outlets.size, -1, dtype=np.int64)
+        edge_sorter = np.argsort(edges)
+        position = np.searchsorted(edges, outlet_receivers, sorter=edge_sorter)
+        position = edge_sorter[np.minimum(position, edges.size - 1)]
+        enters_tile = edges[position] == outlet_receivers
+        next_outlets = np.where(enters_tile, edge_routes[position], -1)
+
+        outlet_sorter = np.argsort(outlets)
+        next_position = np.searchsorted(
+            outlets, next_outlets, sorter=outlet_sorter)
+        next_position = outlet_sorter[np.minimum(
+            next_position, outlets.size - 1)]
+        has_next = (next_outlets >= 0) & (outlets[next_position] == next_outlets)
+        downstream[has_next] = next_position[has_next]
+
+        # accumulate total outflow along the outlet tree
+        order = _topological_order(
+            downstream,
+            np.ones(outlets.size, dtype=np.bool_),
+        )
+        totals = _accumulate(downstream, order, outlet_values)
+
+        # outlets left out of the order are on a flow cycle, which passes nothing on
+        in_cycle = np.ones(outlets.size, dtype=np.bool_)
+        in_cycle[order] = False
+        passes_flow = enters_tile & ~in_cycle
+        cycle_cells = np.unique(outlet_receivers[enters_tile & in_cycle])
+
+        # sum inflows into each entry cell, and assign them to tiles
+        entry_cells, entry_index = np.unique(
+            outlet_receivers[passes_flow],
+            return_inverse=True,
+        )
+        entry_values = np.bincount(
+            entry_index,
+            weights=totals[passes_flow],
+            minlength=entry_cells.size,
+        )
+        for tile in self.tiles:
+            in_tile = self._in_tile(tile, entry_cells)
+            self.inflows.append((entry_cells[in_tile], entry_values[in_tile]))
+            self.cycle_entries.append(
+                cycle_cells[self._in_tile(tile, cycle_cells)])
+
+    def final_pass(
+        self,
+        tile_index: int,
+    ) -> np.ndarray:
+        """Accumulates a tile with inflow from upstream tiles. Returns the (rows, columns) core output."""
+        tile = self.tiles[tile_index]
+        receivers, valid, order, _, _ = self._tile_graph(tile)
+        weights = self._tile_weights(tile, valid)
+
+        entry_cells, entry_values = self.inflows[tile_index]
+        weights[self._local_index(tile, entry_cells)] += entry_values
+
+        # cut the paths of flow cycles through the tile, from entry cell to outlet
+        cycle_entries = self.cycle_entries[tile_index]
+        if cycle_entries.size > 0:
+            on_cycle = _trace_paths(
+                receivers,
+                self._local_index(tile, cycle_entries),
+            )
+            receivers = np.where(on_cycle, -1, receivers)
+            order = _topological_order(receivers, valid)
+
+        accumulated = _accumulate(receivers, order, weights)
+        accumulated[~valid] = np.nan
+        return accumulated.reshape(tile.halo_shape)[1:-1, 1:-1]
+
+
+def accumulate_flow_tiled(
+    d8_fdr: Union[Raster, FlowGraph],
+    weights: Optional[Raster] = None,
+    tile_size: int = 4096,
+    out_path: Optional[Union[str, Path]] = None,
+    max_workers: Optional[int] = None,
+    d8_format: Optional[str] = None,
+    profile: Optional[Union[str, Dict[str, Any]]] = 'tiled',
+    overwrite: bool = False,
+) -> xr.DataArray:
+    """Creates a Flow Accumulation Cell (FAC) or weighted accumulation raster one tile at a time.
+
+    See the module docstring for the algorithm. Results match single pass accumulation (i.e. engine='native').
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int) of any supported D8 format, or a FlowGraph.
+            Path inputs are read one tile at a time (requires dask).
+        weights: A grid aligned with param:d8_fdr defining the value to accumulate from each cell. Default is a grid of 1s.
+        tile_size: The (square) tile width in cells. Peak memory use scales with param:tile_size ** 2 * param:max_workers.
+        out_path: Defines a .tif path to save the output raster. If provided, tiles are written to disk as they finish
+            and the returned raster is read lazily from param:out_path.
+        max_workers: The # of tiles to accumulate at once. Default is the ThreadPoolExecutor default.
+        d8_format: A valid D8 flow direction format name in custom_types.D8ConversionDicts.keys() that
+            overrides the auto-recognized format from param:d8_fdr.
+        profile: A GeoTIFF write profile for param:out_path, see tools.save_raster().
+        overwrite: If True, an existing file at param:out_path is replaced, otherwise a FileExistsError is raised.
+
+    Returns:
+        The output accumulation raster.
+    """
+    # check the output path before any tiles are accumulated
+    if out_path is not None:
+        out_path = Path(out_path)
+        if out_path.suffix != '.tif':
+            raise ValueError(
+                f'param:out_path must be a .tif path, not {out_path.suffix}!'
+            )
+        if out_path.exists() and not overwrite:
+            raise FileExistsError(
+                f'Cannot overwrite {out_path}! Set param:overwrite=True to replace it.'
+            )
+        options = utilities._raster_creation_options(
+            profile,
+            np.dtype('float64'),
+        )
+
+    if isinstance(d8_fdr, FlowGraph):
+        d8_format = d8_fdr.d8_format
+    chunks = {'x': tile_size, 'y': tile_size}
+    if isinstance(d8_fdr, (str, Path)):
+        d8_fdr = tools.load_raster(d8_fdr, chunks=chunks)
+    else:
+        d8_fdr = tools.load_raster(d8_fdr)
+    if len(d8_fdr.shape) != 2:
+        raise TypeError('param:d8_fdr must be a single band raster!')
+
+    if d8_format is None:
+        d8_format = utilities._id_d8_format(d8_fdr)
+    d8_format = d8_format.lower()
+    if d8_format not in D8ConversionDicts.keys():
+        raise TypeError(
+            f'param:d8_format = {d8_format} which is not in '
+            f'{list(D8ConversionDicts.keys())}'
+        )
+
+    if weights is not None:
+        if isinstance(weights, (str, Path)):
+            weights = tools.load_raster(weights, chunks=chunks)
+        else:
+            weights = tools.load_raster(weights)
+        if not utilities._verify_alignment(weights, d8_fdr) or len(weights.shape) != 2:
+            raise TypeError(
+                'param:weights must be a single band raster aligned with param:d8_fdr! '
+                'Please use tools.align_raster() before applying this tool!'
+            )
+
+    accumulator = _TiledAccumulator(
+        d8_fdr,
+        d8_format,
+        weights,
+        tile_size,
+    )
+    tile_indices = range(len(accumulator.tiles))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # accumulate each tile on its own and resolve flow between tiles
+        boundary_data = list(
+            executor.map(accumulator.local_pass, accumulator.tiles))
+        accumulator.resolve_boundaries(boundary_data)
+        del boundary_data
+
+        # accumulate each tile again w/ inflows, writing tiles to disk if necessary
+        if out_path is not None:
+            if out_path.exists():
+                out_path.unlink()
+            write_lock = threading.Lock()
+
+            def _write_tiles(tif_path: Path, tif_options: Dict[str, Any]) -> None:
+                with rasterio.open(
+                    tif_path,
+                    'w',
+                    driver='GTiff',
+                    height=d8_fdr.shape[0],
+                    width=d8_fdr.shape[1],
+                    count=1,
+                    dtype='float64',
+                    crs=d8_fdr.rio.crs,
+                    transform=d8_fdr.rio.transform(),
+                    nodata=np.nan,
+                    **tif_options,
+                ) as dst:
+                    def _write_tile(tile_index: int) -> None:
+                        out_array = accumulator.final_pass(tile_index)
+                        tile = accumulator.tiles[tile_index]
+                        window = rasterio.windows.Window(
+                            tile.col_start,
+                            tile.row_start,
+                            tile.shape[1],
+                            tile.shape[0],
+                        )
+                        with write_lock:
+                            dst.write(out_array, 1, window=window)
+
+                    for _ in executor.map(_write_tile, tile_indices):
+                        pass
+
+            # COGs are streamed to a temporary tiled GeoTIFF, then copied via GDAL's COG driver
+            if str(options.get('driver', 'GTiff')).upper() == 'COG':
+                cog_options = {k: v for k, v in options.items() if k != 'driver'}
+                block_size = cog_options.get('blocksize', 512)
+                with tempfile.TemporaryDirectory(
+                    prefix='fcpgtools_cog_',
+                    dir=out_path.parent,
+                ) as temp_dir:
+                    temp_path = Path(temp_dir, out_path.name)
+                    _write_tiles(
+                        temp_path,
+                        {
+                            'tiled': True,
+                            'blockxsize': block_size,
+                            'blockysize': block_size,
+                            'bigtiff': 'IF_SAFER',
+                        },
+                    )
+                    rasterio.shutil.copy(
+                        temp_path,
+                        out_path,
+                        driver='COG',
+                        **cog_options,
+                    )
+            else:
+                _write_tiles(out_path, options)
+
+            out_raster = tools.load_raster(out_path, chunks=chunks)
+            out_raster.name = 'accumulate'
+            return out_raster
+
+        out_array = np.empty(d8_fdr.shape, dtype=np.float64)
+        for tile, tile_array in zip(
+            accumulator.tiles,
+            executor.map(accumulator.final_pass, tile_indices),
+        ):
+            out_array[
+                tile.row_start:tile.row_stop,
+                tile.col_start:tile.col_stop,
+            ] = tile_array
+
+    out_raster = xr.DataArray(
+        out_array,
+        coords=d8_fdr.coords,
+        dims=d8_fdr.dims,
+        name='accumulate',
+        attrs=d8_fdr.attrs,
+    )
+    out_raster = out_raster.rio.write_nodata(np.nan)
+    return out_raster
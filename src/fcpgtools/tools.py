@@ -6,14 +6,33 @@ All functions can accept inputs either as in memory objects
 Additionally, many functions have a out_path parameter that allows outputs to 
 be saved to a path in addition to the function returning an in-memory object.
 
+Rasters loaded with load_raster(chunks=...) are backed by dask arrays. The 
+element-wise tools (i.e. make_fcpg(), make_decay_raster(), value_mask(), 
+mask_streams(), binarize_nodata(), make_fac_weights(), convert_fdr_formats()) 
+keep such rasters lazy, and save_raster() then writes them block-by-block, 
+allowing rasters larger than memory to be processed. save_raster() writes
+tiled + compressed GeoTIFFs by default, see custom_types.RasterWriteProfiles.
+
 See function specific documentation here:
 https://fcpgtools.readthedocs.io/en/latest/functions.html
 
 See examples of use here:
 https://fcpgtools.readthedocs.io/en/latest/cookbook.html
 """
-from typing import Union, Dict, List, Tuple, Optional
+from typing import Union, Dict, List, Tuple, Optional, Any
 import warnings
+import shutil
+import tempfile
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    wait,
+    as_completed,
+    FIRST_COMPLETED,
+)
 from pathlib import Path
 import xarray as xr
 import rioxarray as rio
@@ -22,23 +41,45 @@ import pandas as pd
 import geopandas as gpd
 from rasterio.enums import Resampling
 import fcpgtools.utilities as utilities
-from fcpgtools.terrainengine import protocols, engine_validator
+from fcpgtools.terrainengine import protocols, engine_validator, result_cache
+from fcpgtools.terrainengine.flow_graph import FlowGraph
+from fcpgtools.terrainengine import tiled_accumulation
 from fcpgtools.custom_types import (
     Raster,
     RasterSuffixes,
+    BatchExecutors,
     Shapefile,
     ShapefileSuffixes,
     D8ConversionDicts,
 )
 from fcpgtools.custom_types import PourPointLocationsDict, PourPointValuesDict
+from fcpgtools.custom_types import CascadeRegionOutputDict
 
 
 def load_raster(
-    in_raster: Raster,
+    in_raster: Union[Raster, FlowGraph],
+    chunks: Optional[Union[int, str, Tuple[int, ...], Dict[str, int]]] = None,
 ) -> xr.DataArray:
-    """Loads a raster into a xarray.DataArray object."""
+    """Loads a raster into a xarray.DataArray object. FlowGraph inputs return their D8 FDR.
+
+    Args:
+        in_raster: A raster (xr.DataArray, or a .tif, .zarr, or .nc path), or a FlowGraph.
+        chunks: If provided, returns a dask backed DataArray with these chunk sizes (i.e. 'auto' or {'x': 4096, 'y': 4096}).
+            Requires dask to be installed.
+
+    Returns:
+        The loaded raster.
+    """
+    if isinstance(in_raster, FlowGraph):
+        in_raster = in_raster.d8_fdr
+        if chunks is not None:
+            in_raster = in_raster.chunk(chunks)
+        return in_raster
     if isinstance(in_raster, xr.DataArray):
-        return utilities._format_nodata(in_raster.squeeze())
+        in_raster = in_raster.squeeze()
+        if chunks is not None:
+            in_raster = in_raster.chunk(chunks)
+        return utilities._format_nodata(in_raster)
     if isinstance(in_raster, str) or in_raster is None:
         in_raster = Path(in_raster)
         if not in_raster.exists():
@@ -48,7 +89,13 @@ def load_raster(
             f'param:in_raster must be of type {Raster}!'
         )
     if in_raster.suffix == '.tif':
-        return utilities._format_nodata(rio.open_rasterio(in_raster).squeeze())
+        return utilities._format_nodata(
+            rio.open_rasterio(in_raster, chunks=chunks).squeeze(),
+        )
+    elif in_raster.suffix in ('.zarr', '.nc'):
+        return utilities._format_nodata(
+            utilities._open_array_store(in_raster, chunks=chunks).squeeze(),
+        )
     else:
         raise ValueError(
             f'{in_raster.suffix} is not a supported raster type. '
@@ -82,31 +129,76 @@ def load_shapefile(
 def save_raster(
     out_raster: xr.DataArray,
     out_path: Union[str, Path],
+    profile: Optional[Union[str, Dict[str, Any]]] = 'tiled',
+    overwrite: bool = False,
+    append_dim: Optional[str] = None,
+    chunks: Optional[Dict[str, int]] = None,
+    **creation_options,
 ) -> None:
-    """Saves an xarray.DataArray to a .tif raster file at location param:out_path"""
+    """Saves an xarray.DataArray to a .tif raster file, .zarr store, or .nc file at location param:out_path.
+
+    In-memory rasters are written window-by-window, and dask backed rasters block-by-block,
+    so the raster is never copied in full for writing.
+
+    Args:
+        out_raster: The raster to save.
+        out_path: A .tif, .zarr, or .nc path to save param:out_raster to.
+        profile: A key in custom_types.RasterWriteProfiles (i.e. 'tiled', 'zstd', 'lzw', 'cog', or 'none'),
+            or a dict of GDAL GeoTIFF creation options. Default is 'tiled' (512x512 blocks, DEFLATE w/ a predictor).
+            'cog' writes a Cloud-Optimized GeoTIFF with overviews. Only used for .tif outputs.
+        overwrite: If True, an existing file at param:out_path is replaced.
+        append_dim: For .zarr and .nc outputs, the dimension (i.e. 'time') to append param:out_raster along
+            if param:out_path exists. New .nc files are made with param:append_dim as an unlimited dimension.
+        chunks: For .zarr and .nc outputs, chunk sizes by dimension. Default is 1 along band/time, and 512 along y and x.
+        **creation_options: GDAL creation options (i.e. compress='LZW', blockxsize=256) overriding param:profile.
+    """
     if isinstance(out_path, str):
         out_path = Path(out_path)
 
-    if Path.exists(out_path):
-        warnings.warn(
-            message=f'Cannot overwrite {out_path}! Saving raster failed.',
-            category=UserWarning,
+    if out_path.suffix not in ('.tif', '.zarr', '.nc'):
+        raise ValueError(
+            f'{out_path.suffix} is not a supported raster output file type. '
+            f'Please choose from {RasterSuffixes}.'
         )
-        return None
 
-    try:
-        if out_path.suffix == '.tif':
-            out_raster.rio.to_raster(out_path)
+    # append to an existing Zarr store or NetCDF file
+    if append_dim is not None and out_path.suffix == '.tif':
+        raise ValueError('param:append_dim is only supported for .zarr and .nc outputs.')
+    if append_dim is not None and Path.exists(out_path) and not overwrite:
+        if out_path.suffix == '.zarr':
+            utilities._write_zarr(out_raster, out_path, chunks, append_dim)
         else:
-            raise ValueError(
-                f'{out_raster.suffix} is not a supported raster output file type. '
-                f'Please choose from {RasterSuffixes}.'
+            utilities._write_netcdf(out_raster, out_path, chunks, append_dim)
+        return None
+
+    if Path.exists(out_path):
+        if not overwrite:
+            warnings.warn(
+                message=f'Cannot overwrite {out_path}! Saving raster failed.',
+                category=UserWarning,
             )
-    except Exception as e:
-        warnings.warn(
-            message=f'Could not save shapefile due to {e}',
-            category=UserWarning,
-        )
+            return None
+        if out_path.is_dir():
+            shutil.rmtree(out_path)
+        else:
+            out_path.unlink()
+
+    if out_path.suffix == '.zarr':
+        utilities._write_zarr(out_raster, out_path, chunks, append_dim)
+        return None
+    elif out_path.suffix == '.nc':
+        utilities._write_netcdf(out_raster, out_path, chunks, append_dim)
+        return None
+
+    options = utilities._raster_creation_options(
+        profile,
+        out_raster.dtype,
+        **creation_options,
+    )
+    if str(options.get('driver', 'GTiff')).upper() == 'COG':
+        utilities._write_cog(out_raster, out_path, options)
+    else:
+        utilities._write_geotiff(out_raster, out_path, options)
 
 
 def save_shapefile(
@@ -349,6 +441,7 @@ def convert_fdr_formats(
     out_format: str,
     in_format: Optional[str] = None,
     out_path: Optional[Union[str, Path]] = None,
+    in_place: bool = False,
 ) -> xr.DataArray:
     """Converts the D8 encoding of Flow Direction Rasters (FDR).
 
@@ -359,11 +452,14 @@ def convert_fdr_formats(
             overrides the auto-recognized format from param:d8_fdr.
             Note: manually inputting param:in_format will improve performance.
         out_path:  Defines a path to save the output raster.
+        in_place: If True and param:d8_fdr is an in-memory uint8 xarray.DataArray, its cell values
+            are overwritten instead of copied, and param:d8_fdr itself is updated and returned.
 
     Returns:
-        The re-encoded D8 Flow Direction Raster (FDR).
+        The re-encoded D8 Flow Direction Raster (FDR) as dtype=uint8.
     """
     # identify the input D8 format
+    in_fdr = d8_fdr
     d8_fdr = load_raster(d8_fdr)
     out_format = out_format.lower()
     if in_format is not None:
@@ -383,41 +479,32 @@ def convert_fdr_formats(
             f'param:out_format = {out_format} which is not in {d8_formats}'
         )
 
-    # remove unexpected d8 values
+    # remove unexpected d8 values and re-encode in a single lookup table pass
     d8_fdr = utilities._remove_unexpected_d8_values(
         d8_fdr,
         in_format,
+        out_format=out_format,
+        in_place=in_place,
     )
 
-    if in_format == out_format:
-        return d8_fdr
-
-    # get the conversion dictionary mapping
-    mapping = dict(
-        zip(
-            D8ConversionDicts[in_format].values(),
-            D8ConversionDicts[out_format].values(),
+    # values overwritten in place also need the input object's nodata value and format updated
+    if (
+        in_place
+        and isinstance(in_fdr, xr.DataArray)
+        and in_fdr is not d8_fdr
+        and not utilities._is_lazy(d8_fdr)
+        and np.shares_memory(in_fdr.values, d8_fdr.values)
+    ):
+        in_fdr.rio.write_nodata(
+            d8_fdr.rio.nodata,
+            inplace=True,
         )
-    )
-
-    # get values in pandas (no clean implementation in xarray)
-    in_df = pd.DataFrame()
-    out_df = pd.DataFrame()
-    in_df[0] = d8_fdr.values.ravel()
-
-    # apply the mapping and convert back to xarray
-    out_df[0] = in_df[0].map(mapping)
-
-    d8_fdr = d8_fdr.copy(
-        data=out_df[0].values.reshape(d8_fdr.shape),
-    )
-
-    # update nodata
-    d8_fdr.rio.write_nodata(
-        D8ConversionDicts[out_format]['nodata'],
-        inplace=True,
-    )
-    d8_fdr = d8_fdr.astype('int')
+        utilities._record_d8_format(
+            in_fdr,
+            out_format,
+            cleaned=True,
+        )
+        d8_fdr = in_fdr
 
     if out_path is not None:
         save_raster(
@@ -428,6 +515,72 @@ def convert_fdr_formats(
     return d8_fdr
 
 
+def prepare_flow_graph(
+    d8_fdr: Raster,
+    d8_format: Optional[str] = None,
+) -> FlowGraph:
+    """Prepares a D8 Flow Direction Raster (FDR) once for repeated use with terrain engine functions.
+
+    The output FlowGraph stores the cleaned FDR, its D8 format, a flat downstream
+    cell index array, a valid cell mask, and a topological (upstream -> downstream)
+    cell ordering. It can be passed as param:d8_fdr to any function in place of a raster,
+    skipping D8 format identification, cleaning, and engine specific setup on each call.
+
+    Args:
+        d8_fdr: The input D8 Flow Direction Raster (FDR).
+        d8_format: A valid D8 flow direction format name in custom_types.D8ConversionDicts.keys() that
+            overrides the auto-recognized format from param:d8_fdr.
+
+    Returns:
+        A FlowGraph object.
+    """
+    return FlowGraph.from_raster(
+        d8_fdr,
+        d8_format=d8_format,
+    )
+
+
+def save_flow_graph(
+    d8_fdr: Union[Raster, FlowGraph],
+    out_dir: Union[str, Path],
+    d8_format: Optional[str] = None,
+) -> FlowGraph:
+    """Saves a prepared D8 Flow Direction Raster (FDR) as memory-mapped files for sharing between processes.
+
+    The output FlowGraph is backed by read-only memory-mapped .npy files in param:out_dir, and is
+    pickled as its directory path. Passing it to process pool (or dask) workers, i.e. via
+    executor.submit(accumulate_parameter, flow_graph, parameter_raster, engine='native'),
+    lets all workers attach to one copy of the FDR and graph arrays instead of each receiving its own.
+
+    Args:
+        d8_fdr: The input D8 Flow Direction Raster (FDR), or a FlowGraph from prepare_flow_graph().
+        out_dir: A directory to save the FlowGraph to (created if necessary).
+        d8_format: A valid D8 flow direction format name in custom_types.D8ConversionDicts.keys() that
+            overrides the auto-recognized format from param:d8_fdr.
+
+    Returns:
+        A memory-mapped FlowGraph object.
+    """
+    return prepare_flow_graph(
+        d8_fdr,
+        d8_format=d8_format,
+    ).to_memmap(out_dir)
+
+
+def load_flow_graph(
+    in_dir: Union[str, Path],
+) -> FlowGraph:
+    """Loads (memory-maps) a FlowGraph saved via save_flow_graph(). Each FlowGraph is only loaded once per process.
+
+    Args:
+        in_dir: The directory the FlowGraph was saved to.
+
+    Returns:
+        A memory-mapped FlowGraph object.
+    """
+    return FlowGraph.from_memmap(in_dir)
+
+
 def make_fac_weights(
     parameter_raster: Raster,
     fdr_raster: Raster,
@@ -470,16 +623,15 @@ def make_fac_weights(
         )
 
     parameter_raster = parameter_raster.where(
-        fdr_raster.values != fdr_raster.rio.nodata,
+        fdr_raster.data != fdr_raster.rio.nodata,
         out_of_bounds_value,
     )
 
     # convert in-bounds nodata to 0
-    if np.isin(og_nodata, parameter_raster.values):
-        parameter_raster = parameter_raster.where(
-            (parameter_raster.values != og_nodata),
-            0,
-        )
+    parameter_raster = parameter_raster.where(
+        (parameter_raster != og_nodata),
+        0,
+    )
 
     # update nodata and crs
     parameter_raster.rio.write_crs(og_crs, inplace=True)
@@ -505,6 +657,8 @@ def adjust_parameter_raster(
 
     The main utility of this function is to enable cascading accumulation values
     from one basin or raster to another via accumulate_parameter().
+    Each value is added to the cell downstream of its pour point (summing values that share a cell),
+    with all pour points and bands updated in one batched operation.
 
     Args:
         parameter_raster: Input parameter raster to update.
@@ -517,46 +671,53 @@ def adjust_parameter_raster(
         The updated parameter raster.
     """
     # pull in data
+    d8_format = None
+    if isinstance(d8_fdr, FlowGraph):
+        d8_format = d8_fdr.d8_format
     parameter_raster = load_raster(parameter_raster)
     d8_fdr = load_raster(d8_fdr)
 
     # pull in pour point data
     pour_point_coords = upstream_pour_points['pour_point_coords']
     pour_point_values = upstream_pour_points['pour_point_values']
+    if len(pour_point_coords) == 0:
+        return parameter_raster
 
-    # update values iteratively
-    for i, coords in enumerate(pour_point_coords):
-        values_list = pour_point_values[i]
+    # get all downstream coordinates at once
+    ds_xs, ds_ys, has_direction = utilities._find_downstream_cells(
+        d8_fdr,
+        pour_point_coords,
+        d8_format=d8_format,
+    )
 
-        # get downstream coordinates
-        ds_coords = utilities._find_downstream_cell(
-            d8_fdr,
-            coords,
+    # verify coverage
+    x_min, y_min, x_max, y_max = parameter_raster.rio.bounds()
+    in_bounds = (
+        (ds_xs > x_min) & (ds_xs < x_max) &
+        (ds_ys > y_min) & (ds_ys < y_max)
+    )
+    for i in np.flatnonzero(~(in_bounds & has_direction)):
+        warnings.warn(
+            message=(
+                f'Cell downstream from pour point coords={pour_point_coords[i]} '
+                f'is out of bounds -> skipped!'
+            ),
+            category=UserWarning
         )
+    keep = in_bounds & has_direction
 
-        # verify coverage
-        if not utilities._verify_coords_coverage(parameter_raster, ds_coords):
-            warnings.warn(
-                message=(
-                    f'Cell downstream from pour point coords={coords} '
-                    f'is out of bounds -> skipped!'
-                ),
-                category=UserWarning
-            )
-            continue
-
-        if len(parameter_raster.shape) == 2:
-            parameter_raster = utilities._update_raster_values(
-                in_raster=parameter_raster,
-                update_points=[(ds_coords, values_list[0])],
-            )
-        else:
-            dim_index_values = parameter_raster[parameter_raster.dims[0]].values
-            for band_index, _value in enumerate(dim_index_values):
-                parameter_raster[band_index, :, :] = utilities._update_raster_values(
-                    in_raster=parameter_raster[band_index, :, :],
-                    update_points=[(ds_coords, values_list[band_index])],
-                )
+    # add values to all bands at once
+    n_bands = parameter_raster.shape[0] if len(parameter_raster.shape) > 2 else 1
+    values = np.array(
+        [list(values_list)[:n_bands] for values_list in pour_point_values],
+        dtype=np.float64,
+    )
+    parameter_raster = utilities._add_raster_values(
+        parameter_raster,
+        ds_xs[keep],
+        ds_ys[keep],
+        values[keep],
+    )
 
     if out_path is not None:
         save_raster(
@@ -595,7 +756,7 @@ def make_decay_raster(
     cell_size = distance_to_stream_raster.rio.resolution()[0]
 
     decay_array = np.exp(
-        (-1 * distance_to_stream_raster.values *
+        (-1 * distance_to_stream_raster.data *
          cell_size) / (cell_size ** decay_factor)
     )
 
@@ -725,7 +886,7 @@ def value_mask(
 
     if in_mask_value is not None:
         out_raster = out_raster.where(
-            (out_raster.values == out_mask_value),
+            (out_raster == out_mask_value),
             in_mask_value,
         )
 
@@ -949,6 +1110,9 @@ def find_basin_pour_points(
 ) -> PourPointLocationsDict:
     """Find pour points (aka outflow cells) in a FAC raster by basin using a shapefile.
 
+    All basins are rasterized once into a label grid (by cell center), and the max FAC cell of
+    every basin is found in a single pass. Basins too small to contain a cell center use all cells they touch.
+
     Args:
         fac_raster: A Flow Accumulation Cell raster (FAC).
         basins_shp: A .shp shapefile containing basin geometries.
@@ -981,14 +1145,17 @@ def find_basin_pour_points(
     else:
         sub_basin_id = basin_id_field
 
-    # iterate over sub basins and fill the
+    # dissolve sub basins and rasterize them all at once into a label grid
     basins_shp = basins_shp.dissolve(by=sub_basin_id).reset_index()
+    basin_ids = list(basins_shp[sub_basin_id])
+    labels = utilities._rasterize_labels(
+        fac_raster,
+        basins_shp,
+    )
 
-    for basin in basins_shp[sub_basin_id].unique():
-        sub_shp = basins_shp.loc[basins_shp[sub_basin_id] == basin]
-
-        # check extents of shapefile bbox and make sure all overlap the FAC raster extent
-        if not utilities._verify_basin_coverage(fac_raster, sub_shp):
+    # check extents of shapefile bbox and make sure all overlap the FAC raster extent
+    for basin, covered in zip(basin_ids, utilities._verify_basins_coverage(fac_raster, basins_shp)):
+        if not covered:
             warnings.warn(
                 message=(
                     f'Sub basin with {sub_basin_id} == {basin} is not'
@@ -997,14 +1164,25 @@ def find_basin_pour_points(
                 category=UserWarning,
             )
 
-        # apply spatial mask and find max accumulation value
-        sub_raster = spatial_mask(
-            fac_raster,
-            sub_shp,
-        )
+    # find the max accumulation cell of each sub basin in one pass
+    max_cells = utilities._get_label_max_cells(
+        fac_raster,
+        labels,
+        len(basin_ids),
+    )
+    # drop sub basins without any valid FAC cells
+    for basin, max_cell in zip(basin_ids, max_cells):
+        if max_cell is None:
+            warnings.warn(
+                message=(
+                    f'Sub basin with {sub_basin_id} == {basin} does not contain any valid '
+                    'param:fac_raster cells! It will be skipped.'
+                ),
+                category=UserWarning,
+            )
+            continue
         pour_point_locations_dict['pour_point_ids'].append(basin)
-        pour_point_locations_dict['pour_point_coords'].append(
-            utilities._get_max_cell(sub_raster))
+        pour_point_locations_dict['pour_point_coords'].append(max_cell)
 
     return pour_point_locations_dict
 
@@ -1038,20 +1216,24 @@ def find_fac_pour_point(
 def get_pour_point_values(
     pour_points_dict: PourPointLocationsDict,
     accumulation_raster: Raster,
-) -> PourPointValuesDict:
+    as_dataframe: bool = False,
+) -> Union[PourPointValuesDict, pd.DataFrame]:
     """Get the accumulation raster values from downstream pour points.
 
     NOTE: This function is intended to feed into accumulate_flow() or 
     parameter_accumulate() param:upstream_pour_points.
+    All pour points and bands are extracted with a single vectorised selection.
 
     Args:
         pour_points_dict: A dictionary of form custom_types.PourPointValuesDict.
         accumulation_raster: A Flow Accumulation Cell raster (FAC) or a 
             parameter accumulation raster.
+        as_dataframe: If True, a pandas.DataFrame is returned with pour point ids as the index,
+            'x' and 'y' coordinate columns, and one column of values per band.
 
     Returns:
         A list of tuples (one for each pour point) storing their coordinates [0]
-            and accumulation value [1].
+            and accumulation value [1]. Or a pandas.DataFrame if param:as_dataframe is True.
     """
     # pull in the accumulation raster
     accumulation_raster = load_raster(accumulation_raster)
@@ -1060,27 +1242,41 @@ def get_pour_point_values(
     if 'pour_point_values' in list(pour_points_dict.keys()):
         del pour_points_dict['pour_point_values']
 
-    # split bands if necessary
-    if len(accumulation_raster.shape) > 2:
-        raster_bands = utilities._split_bands(accumulation_raster)
-    else:
-        raster_bands = {(0, 0): accumulation_raster}
-
-    # iterate over all basins and bands, extract values
-    dict_values_list = []
-    for pour_point_coords in pour_points_dict['pour_point_coords']:
-        basin_values_list = []
-        for band in raster_bands.values():
-            basin_values_list.append(
-                utilities._query_point(
-                    band,
-                    pour_point_coords,
-                )[-1]
-            )
-        dict_values_list.append(basin_values_list)
+    # convert all coordinates to indices at once
+    coords = np.asarray(
+        pour_points_dict['pour_point_coords'],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    rows, cols = utilities._coords_to_indices(
+        accumulation_raster,
+        coords[:, 0],
+        coords[:, 1],
+    )
+
+    # extract all points and bands w/ one pointwise selection
+    point_values = accumulation_raster.isel(
+        y=xr.DataArray(rows, dims='pour_point'),
+        x=xr.DataArray(cols, dims='pour_point'),
+    )
+    values = np.asarray(point_values.values).reshape(-1, coords.shape[0]).T
+
+    if as_dataframe:
+        if len(accumulation_raster.shape) > 2:
+            columns = list(
+                accumulation_raster[accumulation_raster.dims[0]].values)
+        else:
+            columns = [accumulation_raster.name or 'value']
+        values_df = pd.DataFrame(
+            values,
+            index=pd.Index(pour_points_dict['pour_point_ids'], name='pour_point_id'),
+            columns=columns,
+        )
+        values_df.insert(0, 'y', coords[:, 1])
+        values_df.insert(0, 'x', coords[:, 0])
+        return values_df
 
     # convert to custom_types.PourPointValuesDict and return
-    pour_points_dict['pour_point_values'] = dict_values_list
+    pour_points_dict['pour_point_values'] = values.tolist()
     return pour_points_dict
 
 
@@ -1152,9 +1348,43 @@ def check_function_kwargs(
         return kwargs_dict[function.__name__]
 
 
+def enable_result_cache(
+    cache_dir: Union[str, Path],
+    max_size_gb: float = 10.0,
+) -> None:
+    """Enables a persistent on-disk cache of terrain engine outputs.
+
+    Once enabled, accumulate_flow(), accumulate_parameter(), distance_to_stream(),
+    extreme_upslope_values(), extreme_upslope_min_max(), and decay_accumulation() 
+    outputs (with up to 3 dimensions) are saved as compressed 
+    GeoTIFFs in param:cache_dir, keyed by the input raster contents, the engine, and 
+    the engine kwargs. Repeat calls with identical inputs (i.e. re-running a pipeline)
+    load the cached output instead of re-running the engine.
+
+    Args:
+        cache_dir: The directory to store cached outputs in. Can be re-used between sessions.
+        max_size_gb: Once the cache exceeds this size, the least recently used outputs are deleted.
+    """
+    result_cache.enable(
+        cache_dir,
+        max_size_gb=max_size_gb,
+    )
+
+
+def disable_result_cache() -> None:
+    """Disables the terrain engine output cache. Cached files are kept."""
+    result_cache.disable()
+
+
+def clear_result_cache() -> None:
+    """Deletes all cached terrain engine outputs in the enabled cache directory."""
+    result_cache.clear()
+
+
 @engine_validator.validate_engine(protocols.SupportsAccumulateFlow)
+@result_cache.cache_result
 def accumulate_flow(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     engine: protocols.SupportsAccumulateFlow = 'pysheds',
     upstream_pour_points: Optional[PourPointValuesDict] = None,
     weights: Optional[xr.DataArray] = None,
@@ -1164,7 +1394,8 @@ def accumulate_flow(
     """Create a Flow Accumulation Cell (FAC) raster from a D8 Flow Direction Raster.
 
     Args:
-        d8_fdr: A  D8 Flow Direction Raster (dtype=Int).
+        d8_fdr: A  D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
         engine: A terrain engine class that supports flow accumulation.
         upstream_pour_points: A list of lists each with with coordinate tuples 
             as the first item [0], and updated cell values as the second [1].
@@ -1191,9 +1422,57 @@ def accumulate_flow(
     )
 
 
+def accumulate_flow_tiled(
+    d8_fdr: Union[Raster, FlowGraph],
+    weights: Optional[Raster] = None,
+    tile_size: int = 4096,
+    out_path: Optional[Union[str, Path]] = None,
+    max_workers: Optional[int] = None,
+    d8_format: Optional[str] = None,
+    profile: Optional[Union[str, Dict[str, Any]]] = 'tiled',
+    overwrite: bool = False,
+) -> xr.DataArray:
+    """Create a Flow Accumulation Cell (FAC) or weighted accumulation raster one tile at a time.
+
+    Allows accumulation of D8 Flow Direction Rasters that are larger than memory. Tiles are
+    accumulated concurrently, flow crossing tile edges is resolved via a small tile boundary
+    graph, and a final pass per tile adds inflow from upstream tiles. Results match engine='native'.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph from prepare_flow_graph().
+            Path inputs are read one tile at a time (requires dask).
+        weights: A grid aligned with param:d8_fdr defining the value to accumulate from each cell. 
+            Default is a grid of 1s.
+        tile_size: The (square) tile width in cells. Peak memory use scales with 
+            param:tile_size ** 2 * param:max_workers.
+        out_path: Defines a .tif path to save the output raster. If provided, tiles are written as they finish,
+            and the returned raster is read lazily from param:out_path.
+        max_workers: The # of tiles to accumulate at once. Default is the ThreadPoolExecutor default.
+        d8_format: A valid D8 flow direction format name in custom_types.D8ConversionDicts.keys() that
+            overrides the auto-recognized format from param:d8_fdr.
+        profile: A GeoTIFF write profile for param:out_path, see save_raster().
+        overwrite: If True, an existing file at param:out_path is replaced, otherwise a FileExistsError
+            is raised before any tiles are accumulated.
+
+    Returns:
+        The output accumulation raster.
+    """
+    return tiled_accumulation.accumulate_flow_tiled(
+        d8_fdr,
+        weights=weights,
+        tile_size=tile_size,
+        out_path=out_path,
+        max_workers=max_workers,
+        d8_format=d8_format,
+        profile=profile,
+        overwrite=overwrite,
+    )
+
+
 @engine_validator.validate_engine(protocols.SupportsAccumulateParameter)
+@result_cache.cache_result
 def accumulate_parameter(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     parameter_raster: Raster,
     engine: protocols.SupportsAccumulateParameter = 'pysheds',
     upstream_pour_points: Optional[PourPointValuesDict] = None,
@@ -1204,9 +1483,12 @@ def accumulate_parameter(
 
     A key aspect of this function is that the output DataArray will have 
     dimensions matching param:parameter_raster.
+    NOTE: engine='native' accumulates all bands of a multi-dimensional
+    parameter raster with a single traversal of the flow graph.
 
     Args:
-        d8_fdr: A D8 Flow Direction Raster (dtype=Int).
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
         parameter_raster: A parameter raster aligned via tools.align_raster()
             with the us_fdr. This can be multi-dimensional (i.e. f(x, y, t)), 
             and if so, a multi-dimensional output is returned.
@@ -1234,9 +1516,60 @@ def accumulate_parameter(
     )
 
 
+@engine_validator.validate_engine(protocols.SupportsMakeFCPGFromFDR)
+def make_fcpg_from_fdr(
+    d8_fdr: Union[Raster, FlowGraph],
+    parameter_raster: Raster,
+    engine: protocols.SupportsMakeFCPGFromFDR = 'native',
+    fac_upstream_pour_points: Optional[PourPointValuesDict] = None,
+    parameter_upstream_pour_points: Optional[PourPointValuesDict] = None,
+    out_path: Optional[Union[str, Path]] = None,
+    **kwargs,
+) -> xr.DataArray:
+    """Creates a Flow Conditioned Parameter Grid (FCPG) directly from a D8 FDR and a parameter raster.
+
+    Equivalent to running accumulate_flow(), accumulate_parameter(), and make_fcpg() in sequence,
+    but the FAC and all parameter bands are accumulated in a single flow graph traversal and 
+    divided in place (parameter accumulation / (FAC + 1)). The intermediate FAC and parameter 
+    accumulation rasters are never created.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
+        parameter_raster: A parameter raster aligned via tools.align_raster()
+            with the us_fdr. This can be multi-dimensional (i.e. f(x, y, t)), 
+            and if so, a multi-dimensional output is returned.
+        engine: A terrain engine class that supports fused FCPG creation (i.e. 'native').
+        fac_upstream_pour_points: A list of lists each with with coordinate tuples 
+            as the first item [0], and updated FAC cell values as the second [1].
+            This allows the FAC to be made with boundary conditions such as 
+            upstream basin pour points.
+        parameter_upstream_pour_points: Same as param:fac_upstream_pour_points, but with
+            updated parameter accumulation cell values.
+        out_path: Defines a path to save the output raster.
+        **kwargs: keyword arguments, specific options depend on the engine being used.
+
+    Returns:
+        The output FCPG raster.
+    """
+    # reformat param:d8_fdr if necessary
+    d8_fdr = utilities._match_d8_format(d8_fdr, engine)
+
+    # execute function w/ the chosen engine
+    return engine.make_fcpg_from_fdr(
+        d8_fdr,
+        parameter_raster,
+        fac_upstream_pour_points=fac_upstream_pour_points,
+        parameter_upstream_pour_points=parameter_upstream_pour_points,
+        out_path=out_path,
+        **kwargs,
+    )
+
+
 @engine_validator.validate_engine(protocols.SupportsExtremeUpslopeValues)
+@result_cache.cache_result
 def extreme_upslope_values(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     parameter_raster: Raster,
     engine: protocols.SupportsExtremeUpslopeValues = 'taudem',
     mask_streams: Optional[Raster] = None,
@@ -1249,7 +1582,7 @@ def extreme_upslope_values(
     NOTE: Replaces tools.ExtremeUpslopeValue() from V1 FCPGtools. 
 
     Args:
-        d8_fdr: A flow direction raster .
+        d8_fdr: A flow direction raster, or a FlowGraph from prepare_flow_graph().
         parameter_raster: A parameter raster to find the max values from.
         engine: A terrain engine class that supports finding extreme upslope values.
         mask_streams: A stream mask raster from tools.mask_streams().
@@ -1275,23 +1608,73 @@ def extreme_upslope_values(
     )
 
 
+@engine_validator.validate_engine(protocols.SupportsExtremeUpslopeMinMax)
+@result_cache.cache_result
+def extreme_upslope_min_max(
+    d8_fdr: Union[Raster, FlowGraph],
+    parameter_raster: Raster,
+    engine: protocols.SupportsExtremeUpslopeMinMax = 'native',
+    mask_streams: Optional[Raster] = None,
+    out_path: Optional[Union[str, Path]] = None,
+    **kwargs,
+) -> xr.DataArray:
+    """Finds both the min and max value of a parameter grid upstream from each cell.
+
+    Equivalent to running extreme_upslope_values() with get_min_upslope=False and True,
+    but the min and max of all parameter bands are found in a single flow graph traversal.
+
+    NOTE: Outputs from multi-dimensional parameter rasters are (stat, band, y, x), and
+        must be saved to a .zarr or .nc param:out_path.
+
+    Args:
+        d8_fdr: A flow direction raster, or a FlowGraph from prepare_flow_graph().
+        parameter_raster: A parameter raster to find the min/max values from.
+            This can be multi-dimensional (i.e. f(x, y, t)).
+        engine: A terrain engine class that supports finding joint min/max upslope values (i.e. 'native').
+        mask_streams: A stream mask raster from tools.mask_streams().
+            If provided, the output will be masked to only stream cells.
+        out_path: Defines a path to save the output raster.
+        **kwargs: keyword arguments, specific options depend on the engine being used.
+
+    Returns:
+        A raster with a 'stat' dimension storing the min (stat='min') and 
+        max (stat='max') upstream value of the parameter grid as each cell's value.
+    """
+    # reformat param:d8_fdr if necessary
+    d8_fdr = utilities._match_d8_format(d8_fdr, engine)
+
+    # execute function w/ the chosen engine
+    return engine.extreme_upslope_min_max(
+        d8_fdr,
+        parameter_raster,
+        mask_streams=mask_streams,
+        out_path=out_path,
+        **kwargs,
+    )
+
+
 @engine_validator.validate_engine(protocols.SupportsDistanceToStream)
+@result_cache.cache_result
 def distance_to_stream(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     fac_raster: Raster,
-    accum_threshold: int,
+    accum_threshold: Union[int, List[int]],
     engine: protocols.SupportsDistanceToStream = 'taudem',
     out_path: Optional[Union[str, Path]] = None,
     **kwargs,
 ) -> xr.DataArray:
     """Calculates cell distances from accumulation threshold defined streams.
 
-    NOTE: Replaces tools.dist2stream() from V1 FCPGtools.
+    NOTE: Replaces tools.dist2stream() from V1 FCPGtools. engine='native' computes
+    all thresholds of a threshold sweep with a single traversal of the flow graph.
 
     Args:
-        d8_fdr: A D8 Flow Direction Raster (dtype=Int).
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
         fac_raster: A Flow Accumulation Cell (FAC) raster output from accumulate_flow().
         accum_threshold: The # of upstream/accumulated cells to consider a cell a stream.
+            If a list of thresholds is provided (i.e. [100, 500, 1000]), a multi-dimensional
+            output with an 'accum_threshold' dimension is returned.
         engine: A terrain engine class that supports calculating distance to stream.
         out_path: Defines a path to save the output raster.
         **kwargs: keyword arguments, specific options depend on the engine being used.
@@ -1299,6 +1682,9 @@ def distance_to_stream(
     Returns:
         A raster with values of D8 flow distance from each cell to the nearest stream.
     """
+    if not np.isscalar(accum_threshold) and len(accum_threshold) == 0:
+        raise ValueError('param:accum_threshold is an empty list!')
+
     # reformat param:d8_fdr if necessary
     d8_fdr = utilities._match_d8_format(d8_fdr, engine)
 
@@ -1313,8 +1699,9 @@ def distance_to_stream(
 
 
 @engine_validator.validate_engine(protocols.SupportsDecayAccumulation)
+@result_cache.cache_result
 def decay_accumulation(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     decay_raster: Raster,
     engine: protocols.SupportsDecayAccumulation = 'taudem',
     upstream_pour_points: Optional[PourPointValuesDict] = None,
@@ -1325,11 +1712,14 @@ def decay_accumulation(
     """Creates a "decayed" D-Infinity based accumulation raster via a decay raster.
 
     NOTE: Replaces tools.decayAccum() from V1 FCPGtools. This can be used
-    to accumulate a parameter or just cells counts.
+    to accumulate a parameter or just cells counts. engine='native' runs
+    in-process (no TauDEM install required), accumulating all bands in a single 
+    traversal, and supports proportional D-Infinity routing via a 
+    kwargs['dinf_fdr'] D-Infinity flow direction raster.
 
     Args:
-        dinf_fdr: A flow direction raster in D-Infinity format. 
-            This input can be made with d8_to_dinfinity().
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
         decay_raster: A decay 'multiplier' raster calculated from distance 
             to stream via make_decay_raster().
         engine: A terrain engine class that supports decayed accumulation.
@@ -1358,3 +1748,478 @@ def decay_accumulation(
         out_path=out_path,
         **kwargs,
     )
+
+
+def accumulate_cascade(
+    d8_fdrs: Dict[str, Raster],
+    basins_shp: Shapefile,
+    parameter_rasters: Optional[Dict[str, Raster]] = None,
+    engine: str = 'pysheds',
+    basin_id_field: str = 'HUC12',
+    to_basin_field: str = 'ToHUC',
+    region_id_length: int = 4,
+    out_dir: Optional[Union[str, Path]] = None,
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> Dict[str, CascadeRegionOutputDict]:
+    """Accumulates flow (and optionally a parameter) across multiple regional rasters that drain into each other.
+
+    Regions (i.e. HUC4s) are linked using the basin ids and downstream basin ids of param:basins_shp 
+    (i.e. a WBD HUC12 layer w/ a ToHUC field). Regions are run in topological order, with independent
+    regions running in parallel. Once a region finishes, the pour points of its basins that drain into
+    another region are found via find_basin_pour_points(), and their values (via get_pour_point_values())
+    are added to the downstream region's cells that they drain into via adjust_parameter_raster().
+
+    Args:
+        d8_fdrs: A dictionary with region ids as keys (i.e. '1407'), storing each region's D8 Flow Direction Raster.
+        basins_shp: A shapefile with basin geometries, basin ids, and downstream basin ids.
+        parameter_rasters: A dictionary with the same keys as param:d8_fdrs storing parameter rasters
+            aligned with each region's FDR. If provided, parameter accumulation and FCPG rasters are also made.
+        engine: A terrain engine that supports flow and parameter accumulation.
+        basin_id_field: The column in param:basins_shp storing basin ids.
+        to_basin_field: The column in param:basins_shp storing the id of the basin each basin drains to.
+        region_id_length: The # of leading basin id characters that make up a region id (i.e. 4 for HUC4).
+        out_dir: A directory to save outputs to as {region id}_fac.tif, {region id}_accumulate_parameter.tif,
+            and {region id}_fcpg.tif.
+        max_workers: The max # of regions to run at once. Default is the ThreadPoolExecutor default.
+        **kwargs: keyword arguments passed to the terrain engine, specific options depend on the engine being used.
+
+    Returns:
+        A dictionary with region ids as keys, storing each region's outputs.
+    """
+    region_ids = [str(region_id) for region_id in d8_fdrs.keys()]
+    d8_fdrs = {str(key): value for key, value in d8_fdrs.items()}
+    if parameter_rasters is not None:
+        parameter_rasters = {
+            str(key): value for key, value in parameter_rasters.items()
+        }
+        missing = [i for i in region_ids if i not in parameter_rasters.keys()]
+        if len(missing) > 0:
+            raise ValueError(
+                f'param:parameter_rasters is missing region ids: {missing}'
+            )
+
+    if out_dir is not None:
+        out_dir = Path(out_dir)
+        if not out_dir.is_dir():
+            raise TypeError(
+                f'param:out_dir={str(out_dir)} is not a valid directory!'
+            )
+
+    # build the region drainage graph and verify it is acyclic
+    basins_shp = load_shapefile(basins_shp)
+    region_dag = utilities._build_region_dag(
+        basins_shp,
+        region_ids,
+        basin_id_field=basin_id_field,
+        to_basin_field=to_basin_field,
+        region_id_length=region_id_length,
+    )
+    basin_ids = basins_shp[basin_id_field].astype(str)
+
+    ordered = []
+    remaining = {i: set(region_dag[i].keys()) for i in region_ids}
+    while len(ordered) < len(region_ids):
+        ready = [i for i, ups in remaining.items() if len(ups) == 0]
+        if len(ready) == 0:
+            raise ValueError(
+                f'Regions {list(remaining.keys())} drain into each other in a cycle!'
+            )
+        for region_id in ready:
+            del remaining[region_id]
+            ordered.append(region_id)
+        for ups in remaining.values():
+            ups.difference_update(ready)
+
+    outputs: Dict[str, CascadeRegionOutputDict] = {}
+    flow_graphs: Dict[str, FlowGraph] = {}
+
+    def _add_upstream_pour_points(
+        in_raster: xr.DataArray,
+        region_id: str,
+        output_key: str,
+    ) -> xr.DataArray:
+        """Adds the pour point values of all upstream region basins draining into a region to a raster."""
+        for upstream_id, upstream_basins in region_dag[region_id].items():
+            locations = find_basin_pour_points(
+                outputs[upstream_id]['fac'],
+                basins_shp.loc[basin_ids.isin(upstream_basins)],
+                basin_id_field=basin_id_field,
+                use_huc4=False,
+            )
+            upstream_pour_points = get_pour_point_values(
+                locations,
+                outputs[upstream_id][output_key],
+            )
+
+            # the upstream FDR is used since it stores the pour point cell's flow direction
+            in_raster = adjust_parameter_raster(
+                in_raster,
+                flow_graphs[upstream_id],
+                upstream_pour_points,
+            )
+        return in_raster
+
+    def _run_region(
+        region_id: str,
+    ) -> CascadeRegionOutputDict:
+        """Runs all accumulations for a region whose upstream regions are complete."""
+        d8_fdr = flow_graphs[region_id]
+        region_output = {
+            'fac': None,
+            'accumulate_parameter': None,
+            'fcpg': None,
+        }
+
+        weights = None
+        if len(region_dag[region_id]) > 0:
+            weights = xr.zeros_like(
+                d8_fdr.d8_fdr,
+                dtype=np.dtype('float64'),
+            ) + 1
+            weights = _add_upstream_pour_points(weights, region_id, 'fac')
+
+        region_output['fac'] = accumulate_flow(
+            d8_fdr,
+            engine=engine,
+            weights=weights,
+            **kwargs,
+        )
+
+        if parameter_rasters is not None:
+            parameter_raster = load_raster(parameter_rasters[region_id]).copy()
+            parameter_raster = _add_upstream_pour_points(
+                parameter_raster,
+                region_id,
+                'accumulate_parameter',
+            )
+            region_output['accumulate_parameter'] = accumulate_parameter(
+                d8_fdr,
+                parameter_raster,
+                engine=engine,
+                **kwargs,
+            )
+            region_output['fcpg'] = make_fcpg(
+                region_output['accumulate_parameter'],
+                region_output['fac'],
+            )
+
+        # save if necessary
+        if out_dir is not None:
+            for key, out_raster in region_output.items():
+                if out_raster is not None:
+                    save_raster(
+                        out_raster,
+                        out_dir / f'{region_id}_{key}.tif',
+                    )
+        return region_output
+
+    # run regions as soon as all of their upstream regions are complete
+    for region_id in region_ids:
+        flow_graphs[region_id] = prepare_flow_graph(d8_fdrs[region_id])
+
+    remaining = {i: set(region_dag[i].keys()) for i in ordered}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while len(remaining) > 0 or len(running) > 0:
+            ready = [i for i, ups in remaining.items() if len(ups) == 0]
+            for region_id in ready:
+                del remaining[region_id]
+                running[executor.submit(_run_region, region_id)] = region_id
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                region_id = running.pop(future)
+                outputs[region_id] = future.result()
+                for ups in remaining.values():
+                    ups.discard(region_id)
+
+    return {region_id: outputs[region_id] for region_id in region_ids}
+
+
+def update_fcpg(
+    d8_fdr: Union[Raster, FlowGraph],
+    parameter_raster: Raster,
+    out_path: Union[str, Path],
+    engine: str = 'pysheds',
+    fac_raster: Optional[Raster] = None,
+    chunks: Optional[Dict[str, int]] = None,
+    **kwargs,
+) -> xr.DataArray:
+    """Incrementally updates a multi-band (i.e. time series) FCPG .zarr or .nc output with new parameter bands.
+
+    A manifest stored alongside the output (param:out_path + '.manifest.json') records the 
+    band/time index values already processed. Only the missing bands of param:parameter_raster
+    are run through accumulate_parameter() and make_fcpg() (re-using a cached FAC), and the
+    new FCPG bands are appended to param:out_path.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
+        parameter_raster: A parameter raster aligned via tools.align_raster() with param:d8_fdr
+            with a band/time index (i.e. the full record, or only new time steps). A 2D raster
+            must have a scalar 'time' or 'band' coordinate.
+        out_path: A .zarr or .nc path storing the FCPG time series.
+        engine: A terrain engine name that supports accumulate_flow() and accumulate_parameter().
+        fac_raster: A Flow Accumulation Cell (FAC) raster to use. If None, the FAC is made once and
+            cached next to param:out_path (i.e. fcpg_fac.tif for fcpg.zarr).
+        chunks: Output chunk sizes by dimension, see save_raster().
+        **kwargs: keyword arguments passed to accumulate_parameter(), specific options depend on the engine being used.
+
+    Returns:
+        The full FCPG time series, read lazily from param:out_path (requires dask).
+    """
+    if isinstance(out_path, str):
+        out_path = Path(out_path)
+    if out_path.suffix not in ('.zarr', '.nc'):
+        raise ValueError(
+            f'param:out_path must be a .zarr or .nc path, not {out_path.suffix}!'
+        )
+
+    # get the band/time dimension of the parameter raster
+    parameter_raster = load_raster(parameter_raster)
+    if len(parameter_raster.shape) == 2:
+        scalar_dims = [i for i in ('time', 'band') if i in parameter_raster.coords]
+        if len(scalar_dims) == 0:
+            raise ValueError(
+                'param:parameter_raster is 2D, and has no scalar time/band coordinate!'
+            )
+        parameter_raster = parameter_raster.expand_dims(scalar_dims[0])
+    dim = parameter_raster.dims[0]
+
+    # read the manifest, including any bands written by an interrupted update
+    manifest_path = utilities._manifest_path(out_path)
+    manifest = utilities._read_manifest(manifest_path)
+    if manifest is None:
+        manifest = {
+            'dim': dim,
+            'fac_path': str(out_path.with_name(f'{out_path.stem}_fac.tif')),
+            'processed': [],
+        }
+    elif manifest['dim'] != dim:
+        raise ValueError(
+            f'param:parameter_raster dimension {dim} does not match the '
+            f'manifest dimension {manifest["dim"]}!'
+        )
+    processed = set(manifest['processed'])
+    if out_path.exists():
+        with load_raster(out_path, chunks={}) as existing:
+            if dim in existing.dims:
+                processed.update(utilities._index_labels(existing[dim].values))
+            else:
+                processed.update(utilities._index_labels([existing[dim].values]))
+
+    # find the bands that still need to be processed
+    labels = utilities._index_labels(parameter_raster[dim].values)
+    missing = np.array([i not in processed for i in labels])
+
+    if missing.any():
+        # get the FAC (cached between updates)
+        fac_path = Path(manifest['fac_path'])
+        if fac_raster is None and fac_path.exists():
+            # the cached GeoTIFF carries a scalar 'band' coordinate that the FCPG should not
+            fac_raster = load_raster(fac_path).drop_vars('band', errors='ignore')
+        elif fac_raster is None:
+            fac_raster = accumulate_flow(
+                d8_fdr,
+                engine=engine,
+            )
+            save_raster(
+                fac_raster,
+                fac_path,
+            )
+
+        fcpg_raster = make_fcpg(
+            accumulate_parameter(
+                d8_fdr,
+                parameter_raster.isel({dim: np.flatnonzero(missing)}),
+                engine=engine,
+                **kwargs,
+            ),
+            fac_raster,
+        )
+
+        # a single new band comes back 2D, re-add its band/time index to append along
+        if len(fcpg_raster.shape) == 2:
+            fcpg_raster = fcpg_raster.drop_vars(
+                dim,
+                errors='ignore',
+            ).expand_dims({dim: parameter_raster[dim].values[missing]})
+
+        # append the new bands, then record them in the manifest
+        save_raster(
+            fcpg_raster,
+            out_path,
+            append_dim=dim,
+            chunks=chunks,
+        )
+    manifest['processed'] = sorted(processed.union(labels))
+    utilities._write_manifest(manifest, manifest_path)
+
+    return load_raster(out_path, chunks={})
+
+
+def make_fcpgs(
+    d8_fdr: Union[Raster, FlowGraph],
+    parameter_rasters: Union[Dict[str, Raster], List[Raster], str, Path],
+    out_dir: Union[str, Path],
+    engine: str = 'pysheds',
+    executor: Union[str, Executor] = 'threads',
+    max_workers: Optional[int] = None,
+    memory_limit_gb: Optional[float] = None,
+    fac_raster: Optional[Raster] = None,
+    overwrite: bool = False,
+    **kwargs,
+) -> Dict[str, Path]:
+    """Makes Flow Conditioned Parameter Grids (FCPGs) for many parameter rasters sharing a D8 FDR.
+
+    The FDR is prepared (via prepare_flow_graph()) and the FAC is made only once. Parameter
+    accumulation + make_fcpg() is then run for each parameter raster on the chosen executor,
+    and each FCPG is saved to param:out_dir as {parameter name}_fcpg.tif as soon as it finishes.
+    Existing outputs are skipped unless param:overwrite=True, allowing failed batches to be re-run.
+
+    NOTE: executor='processes' starts worker processes via 'spawn', therefore scripts using it
+        must be guarded by if __name__ == '__main__':. Process and dask workers share a single
+        memory-mapped copy of the FlowGraph and FAC (see save_flow_graph()), saved to a temporary
+        directory in param:out_dir.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int), or a FlowGraph
+            from prepare_flow_graph().
+        parameter_rasters: A dictionary with parameter names as keys storing parameter rasters, a
+            list of parameter rasters (named by file or DataArray name), or a directory that is searched
+            for rasters. All must be aligned via tools.align_raster() with param:d8_fdr.
+        out_dir: The directory to save FCPGs to.
+        engine: A terrain engine name that supports accumulate_flow() and accumulate_parameter().
+        executor: One of custom_types.BatchExecutors, or a concurrent.futures.Executor instance.
+            'serial' runs parameters one at a time, 'threads' uses a ThreadPoolExecutor, 'processes'
+            uses a ProcessPoolExecutor, and 'dask' uses a dask.distributed LocalCluster (requires distributed).
+        max_workers: The max # of parameters to run at once. Default is the executor's default.
+        memory_limit_gb: A per-worker memory cap, only used for executor='processes' (as an
+            address space limit, POSIX only) and executor='dask' (as the LocalCluster memory_limit).
+        fac_raster: A Flow Accumulation Cell (FAC) raster made from param:d8_fdr. If None, it is made
+            with param:engine.
+        overwrite: If True, existing FCPGs in param:out_dir are replaced.
+        **kwargs: keyword arguments passed to accumulate_parameter(), specific options depend on the engine being used.
+
+    Returns:
+        A dictionary with parameter names as keys, storing each FCPG's output path.
+    """
+    out_dir = Path(out_dir)
+    if not out_dir.is_dir():
+        raise TypeError(
+            f'param:out_dir={str(out_dir)} is not a valid directory!'
+        )
+    if isinstance(executor, str):
+        executor = executor.lower()
+        if executor not in BatchExecutors:
+            raise ValueError(
+                f'param:executor = {executor} which is not in {list(BatchExecutors)}'
+            )
+    elif not isinstance(executor, Executor):
+        raise TypeError(
+            'param:executor must be a string or a concurrent.futures.Executor instance!'
+        )
+
+    memory_limit_bytes = None
+    if memory_limit_gb is not None:
+        memory_limit_bytes = int(memory_limit_gb * 1024 ** 3)
+        if executor not in ('processes', 'dask'):
+            warnings.warn(
+                message='param:memory_limit_gb is only used with executor=processes or dask, and is ignored.',
+                category=UserWarning,
+            )
+
+    parameter_rasters = utilities._name_parameter_rasters(parameter_rasters)
+    if len(parameter_rasters) == 0:
+        raise ValueError('No parameter rasters were provided or found!')
+    out_paths = {
+        name: out_dir / f'{name}_fcpg.tif' for name in parameter_rasters.keys()
+    }
+
+    # skip parameters with existing outputs (i.e. when re-running a failed batch)
+    names = [i for i in parameter_rasters.keys() if overwrite or not out_paths[i].exists()]
+    if len(names) == 0:
+        return out_paths
+
+    # prepare the FDR and FAC once
+    if not isinstance(d8_fdr, FlowGraph):
+        d8_fdr = prepare_flow_graph(d8_fdr)
+    if fac_raster is None:
+        fac_raster = accumulate_flow(
+            d8_fdr,
+            engine=engine,
+        )
+    fac_raster = load_raster(fac_raster)
+
+    # GDAL compression threads would compete with parallel workers
+    creation_options = {} if executor == 'serial' else {'num_threads': 1}
+
+    with ExitStack() as stack:
+        # other processes memory-map a single copy of the FDR + FAC
+        fac_input = fac_raster
+        if executor not in ('serial', 'threads') and not isinstance(executor, ThreadPoolExecutor):
+            temp_dir = Path(stack.enter_context(
+                tempfile.TemporaryDirectory(dir=out_dir)
+            ))
+            if d8_fdr.memmap_dir is None:
+                d8_fdr = d8_fdr.to_memmap(temp_dir / 'flow_graph')
+            fac_input = temp_dir / 'fac'
+            utilities._save_memmap_raster(fac_raster, fac_input)
+
+        def _submit(submit: callable) -> list:
+            """Submits all parameters to an executor, returning a list of futures."""
+            return [
+                submit(
+                    utilities._make_batch_fcpg,
+                    d8_fdr,
+                    fac_input,
+                    parameter_rasters[name],
+                    engine,
+                    out_paths[name],
+                    creation_options,
+                    kwargs,
+                ) for name in names
+            ]
+
+        if executor == 'serial':
+            for name in names:
+                utilities._make_batch_fcpg(
+                    d8_fdr,
+                    fac_input,
+                    parameter_rasters[name],
+                    engine,
+                    out_paths[name],
+                    creation_options,
+                    kwargs,
+                )
+
+        elif executor == 'dask':
+            from distributed import LocalCluster, Client
+            from distributed import as_completed as dask_as_completed
+            cluster = stack.enter_context(LocalCluster(
+                n_workers=max_workers,
+                threads_per_worker=1,
+                memory_limit=memory_limit_bytes if memory_limit_bytes is not None else 'auto',
+                dashboard_address=None,
+            ))
+            client = stack.enter_context(Client(cluster))
+            for future in dask_as_completed(_submit(client.submit)):
+                future.result()
+
+        else:
+            if executor == 'threads':
+                executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=max_workers)
+                )
+            elif executor == 'processes':
+                executor = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=utilities._init_batch_worker,
+                    initargs=(memory_limit_bytes,),
+                ))
+            for future in as_completed(_submit(executor.submit)):
+                future.result()
+
+    return out_paths
@@ -7,31 +7,299 @@ in future bux-fix releases. Additionally, these functions do not take
 string/path inputs, and do not support saving outputs to a file path.
 """
 import os
+import json
+import hashlib
+import weakref
 import warnings
+import tempfile
+import threading
+from pathlib import Path
 import xarray as xr
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from typing import Union, List, Tuple, Dict
+import rasterio.shutil
+from rasterio.features import rasterize
+from rasterio.warp import transform_bounds
+from typing import Union, List, Tuple, Dict, Optional, Any
 import fcpgtools.tools as tools
+from fcpgtools.terrainengine.flow_graph import FlowGraph, _d8_offset_lookup
 from fcpgtools.custom_types import (
     Raster,
     Shapefile,
     RasterSuffixes,
     ShapefileSuffixes,
     D8ConversionDicts,
+    RasterWriteProfiles,
+    FCPGManifestDict,
 )
 
 
+# value hashes of read-only (i.e. memory-mapped) arrays, remembered for the lifetime of each array
+_FINGERPRINTS: Dict[int, Tuple[weakref.ref, str]] = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+
+def _is_read_only(
+    values: Any,
+) -> bool:
+    """Returns True if param:values and every array it is a view of can not be written to."""
+    while isinstance(values, np.ndarray):
+        if values.flags.writeable:
+            return False
+        values = values.base
+    return True
+
+
+def _values_hash(
+    values: np.ndarray,
+) -> str:
+    """Returns a hash of an in-memory array's values, remembered only if the array is read-only."""
+    read_only = _is_read_only(values)
+    if read_only:
+        with _FINGERPRINTS_LOCK:
+            memo = _FINGERPRINTS.get(id(values))
+            if memo is not None and memo[0]() is values:
+                return memo[1]
+
+    values_hash = hashlib.sha1(
+        memoryview(np.ascontiguousarray(values)),
+    ).hexdigest()
+    if not read_only:
+        return values_hash
+
+    # forget the hashes of garbage collected arrays
+    with _FINGERPRINTS_LOCK:
+        for key in [k for k, v in _FINGERPRINTS.items() if v[0]() is None]:
+            del _FINGERPRINTS[key]
+        _FINGERPRINTS[id(values)] = (
+            weakref.ref(values),
+            values_hash,
+        )
+    return values_hash
+
+
+def _fingerprint(
+    in_raster: xr.DataArray,
+) -> str:
+    """Returns a hash of a raster's values, dtype, dimensions, band/time index, transform, CRS, and nodata value.
+
+    Writable values are hashed on every call, so in-place edits change the fingerprint.
+    The values hash of read-only arrays (i.e. memory-mapped FlowGraph inputs) is remembered.
+    Dask backed rasters are hashed via their dask token, so they are not computed.
+    """
+    crs = in_raster.rio.crs
+    hasher = hashlib.sha1()
+    hasher.update(
+        str((
+            in_raster.dtype.str,
+            in_raster.shape,
+            in_raster.dims,
+            {
+                dim: _index_labels(in_raster[dim].values) for dim in in_raster.dims
+                if dim not in ('x', 'y') and dim in in_raster.coords
+            },
+            tuple(in_raster.rio.transform()),
+            crs.to_wkt() if crs is not None else None,
+            in_raster.rio.nodata,
+        )).encode()
+    )
+    if _is_lazy(in_raster):
+        from dask.base import tokenize
+        hasher.update(tokenize(in_raster.data).encode())
+    else:
+        hasher.update(_values_hash(in_raster.data).encode())
+    return hasher.hexdigest()
+
+
+def _is_lazy(
+    in_raster: xr.DataArray,
+) -> bool:
+    """Returns True if param:in_raster is backed by a (chunked) dask array."""
+    return in_raster.chunks is not None
+
+
+def _unique_values(
+    in_raster: xr.DataArray,
+) -> np.ndarray:
+    """Returns the unique cell values of a raster, block-by-block if param:in_raster is dask backed."""
+    if _is_lazy(in_raster):
+        import dask.array as da
+        return da.unique(in_raster.data.ravel()).compute()
+    return np.unique(in_raster.values)
+
+
+def _d8_lookup_table(
+    in_format: str,
+    out_format: str,
+) -> np.ndarray:
+    """Builds a 256-entry uint8 table mapping param:in_format D8 values to param:out_format values. Unexpected values -> nodata."""
+    lookup = np.full(
+        256,
+        D8ConversionDicts[out_format]['nodata'],
+        dtype=np.uint8,
+    )
+    for direction, value in D8ConversionDicts[in_format].items():
+        lookup[value] = D8ConversionDicts[out_format][direction]
+    return lookup
+
+
+def _d8_lookup_indices(
+    values: np.ndarray,
+    in_nodata: int,
+) -> np.ndarray:
+    """Converts D8 cell values to uint8 lookup table indices. Values that can't be D8 codes (i.e. <0, >255, np.nan) -> param:in_nodata."""
+    if values.dtype == np.uint8:
+        return values
+    valid = (values >= 0) & (values <= 255)
+    if not np.issubdtype(values.dtype, np.integer):
+        valid &= (values == np.floor(values))
+    return np.where(valid, values, in_nodata).astype(np.uint8)
+
+
+def _apply_d8_lookup(
+    d8_fdr: xr.DataArray,
+    in_format: str,
+    out_format: str,
+    in_place: bool = False,
+) -> xr.DataArray:
+    """Cleans and re-encodes a D8 FDR in a single np.take() pass over a uint8 lookup table.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster in param:in_format.
+        in_format: The D8 format of param:d8_fdr.
+        out_format: The output D8 format (can equal param:in_format to only clean the FDR).
+        in_place: If True and param:d8_fdr is an in-memory uint8 raster, its values are overwritten.
+
+    Returns:
+        The uint8 D8 FDR in param:out_format, with unexpected values set to the param:out_format nodata value.
+    """
+    lookup = _d8_lookup_table(in_format, out_format)
+    in_nodata = D8ConversionDicts[in_format]['nodata']
+
+    def _lookup_block(block: np.ndarray) -> np.ndarray:
+        return np.take(lookup, _d8_lookup_indices(block, in_nodata))
+
+    # apply the lookup table (block-by-block if dask backed)
+    if _is_lazy(d8_fdr):
+        out_fdr = d8_fdr.copy(
+            data=d8_fdr.data.map_blocks(_lookup_block, dtype=np.uint8),
+        )
+    elif in_place and d8_fdr.dtype == np.uint8:
+        np.take(lookup, d8_fdr.values, out=d8_fdr.values, mode='clip')
+        out_fdr = d8_fdr
+    else:
+        out_fdr = d8_fdr.copy(data=_lookup_block(d8_fdr.values))
+
+    out_fdr.rio.write_nodata(
+        D8ConversionDicts[out_format]['nodata'],
+        inplace=True,
+    )
+
+    # record the format so later calls skip detection and cleaning
+    _record_d8_format(out_fdr, out_format, cleaned=True)
+    return out_fdr
+
+
+def _find_unexpected_d8_values(
+    d8_fdr: xr.DataArray,
+    d8_format: str,
+) -> List[Union[int, float]]:
+    """Returns the cell values of a D8 FDR that are not valid codes (or nodata) of param:d8_format."""
+    d8_values = D8ConversionDicts[d8_format].values()
+    if _is_lazy(d8_fdr):
+        return [i for i in _unique_values(d8_fdr) if i not in d8_values]
+
+    # count uint8 values directly, otherwise only sort the cells that don't hit a D8 code
+    values = d8_fdr.values
+    if values.dtype == np.uint8:
+        counts = np.bincount(values.ravel(), minlength=256)
+        return [i for i in np.flatnonzero(counts) if i not in d8_values]
+    expected = np.isin(values, list(d8_values))
+    if expected.all():
+        return []
+    return [i for i in np.unique(values[~expected])]
+
+
+def _d8_buffer_key(
+    d8_fdr: xr.DataArray,
+) -> str:
+    """Returns a key identifying the values buffer of a raster (the dask graph name if dask backed).
+
+    xarray carries the encoding over to copies with new data, so a D8 format recorded in the
+    encoding is only trusted while the raster still wraps the buffer it was recorded for.
+    """
+    if _is_lazy(d8_fdr):
+        return d8_fdr.data.name
+    values = d8_fdr.values
+    return f'{values.__array_interface__["data"][0]}:{values.shape}:{values.strides}'
+
+
+def _record_d8_format(
+    d8_fdr: xr.DataArray,
+    d8_format: str,
+    cleaned: bool = False,
+) -> None:
+    """Records the D8 format (and if it was cleaned) of a uint8 FDR in its encoding, tied to its values buffer."""
+    d8_fdr.encoding.update({
+        'd8_format': d8_format,
+        'd8_buffer': _d8_buffer_key(d8_fdr),
+    })
+    if cleaned:
+        d8_fdr.encoding['d8_cleaned'] = True
+    else:
+        d8_fdr.encoding.pop('d8_cleaned', None)
+
+
+def _get_cached_d8_format(
+    d8_fdr: xr.DataArray,
+) -> Optional[str]:
+    """Returns the D8 format recorded in a uint8 FDR's encoding by _record_d8_format(), or None."""
+    d8_format = d8_fdr.encoding.get('d8_format', None)
+    if d8_fdr.dtype != np.uint8 or d8_format not in D8ConversionDicts.keys():
+        return None
+    if d8_fdr.encoding.get('d8_buffer', None) != _d8_buffer_key(d8_fdr):
+        return None
+    return d8_format
+
+
+def _is_clean_d8(
+    d8_fdr: xr.DataArray,
+    d8_format: str,
+) -> bool:
+    """Returns True if param:d8_fdr was already cleaned into param:d8_format (uint8, with the format's nodata value)."""
+    return (
+        _get_cached_d8_format(d8_fdr) == d8_format
+        and d8_fdr.encoding.get('d8_cleaned', False)
+        and d8_fdr.rio.nodata == D8ConversionDicts[d8_format]['nodata']
+    )
+
+
 def _id_d8_format(
     d8_fdr: xr.DataArray,
 ) -> str:
-    """Identifies the D8 flow direction raster and returns one of the string keys in custom_types.D8ConversionDicts (i.e. 'taudem' or 'esri')"""
-    uniques = np.unique(d8_fdr.values)
-    if np.nanmax(uniques) > 8:
-        return 'esri'
-    elif np.nanmax(uniques) <= 8:
-        return 'taudem'
+    """Identifies the D8 flow direction raster and returns one of the string keys in custom_types.D8ConversionDicts (i.e. 'taudem' or 'esri')
+
+    The identified format is recorded in the encoding of uint8 FDRs so that repeat calls skip the scan.
+    """
+    d8_format = _get_cached_d8_format(d8_fdr)
+    if d8_format is not None:
+        return d8_format
+
+    # a bincount ignores the nodata value of uint8 FDRs, otherwise use a max reduction
+    if d8_fdr.dtype == np.uint8 and not _is_lazy(d8_fdr):
+        counts = np.bincount(d8_fdr.values.ravel(), minlength=256)
+        if d8_fdr.rio.nodata is not None and 0 <= d8_fdr.rio.nodata <= 255:
+            counts[int(d8_fdr.rio.nodata)] = 0
+        present = np.flatnonzero(counts)
+        max_value = float(present[-1]) if present.size > 0 else np.nan
+    else:
+        max_value = float(d8_fdr.max(skipna=True))
+
+    if max_value > 8:
+        d8_format = 'esri'
+    elif max_value <= 8:
+        d8_format = 'taudem'
     else:
         raise TypeError(
             'Cant recognize D8 Flow Direction Raster format '
@@ -39,17 +307,35 @@ def _id_d8_format(
             'pyfunc:convert_fdr_formats()'
         )
 
+    if d8_fdr.dtype == np.uint8:
+        _record_d8_format(d8_fdr, d8_format)
+    return d8_format
+
 
 def _remove_unexpected_d8_values(
     d8_fdr: xr.DataArray,
     d8_format: str,
+    out_format: Optional[str] = None,
+    in_place: bool = False,
 ) -> xr.DataArray:
-    """Removes unexpected values from a D8 format. Most often nodata"""
-    d8_values = D8ConversionDicts[d8_format].values()
-    unexpected = [i for i in np.unique(d8_fdr.values) if i not in d8_values]
+    """Removes unexpected values from a D8 format (most often nodata), optionally re-encoding to param:out_format in the same pass."""
+    if out_format is None:
+        out_format = d8_format
+
+    # FDRs that were already cleaned only need re-encoding (if at all)
+    if _is_clean_d8(d8_fdr, d8_format):
+        if out_format == d8_format:
+            return d8_fdr
+        return _apply_d8_lookup(
+            d8_fdr,
+            d8_format,
+            out_format,
+            in_place=in_place,
+        )
 
+    unexpected = _find_unexpected_d8_values(d8_fdr, d8_format)
     if len(unexpected) > 0:
-        nodata = D8ConversionDicts[d8_format]['nodata']
+        nodata = D8ConversionDicts[out_format]['nodata']
         warnings.warn(
             message=(
                 f'Found unexpected values in the input {d8_format} D8-FDR: '
@@ -58,43 +344,51 @@ def _remove_unexpected_d8_values(
             category=UserWarning,
         )
 
-        # replace the values w/ pandas (no clean xarray implementation)
-        df = pd.DataFrame()
-        df[0] = d8_fdr.values.ravel()
-        df[0].loc[(~df[0].isin(d8_values))] = nodata
+    # skip the lookup pass if the FDR is already clean and compact
+    if out_format == d8_format and len(unexpected) == 0 and d8_fdr.dtype == np.uint8:
+        if d8_fdr.rio.nodata != D8ConversionDicts[d8_format]['nodata']:
+            d8_fdr = d8_fdr.rio.write_nodata(D8ConversionDicts[d8_format]['nodata'])
+        else:
+            d8_fdr = d8_fdr.copy(deep=False)
+        _record_d8_format(d8_fdr, d8_format, cleaned=True)
+        return d8_fdr
 
-        # write back to xarray
-        d8_fdr = d8_fdr.copy(
-            data=df[0].values.reshape(d8_fdr.shape),
-        )
-
-        # update nodata value if necessary
-        d8_fdr.rio.write_nodata(
-            nodata,
-            inplace=True,
-        )
-        d8_fdr = d8_fdr.astype('int')
-    return d8_fdr
+    return _apply_d8_lookup(
+        d8_fdr,
+        d8_format,
+        out_format,
+        in_place=in_place,
+    )
 
 
 def _match_d8_format(
-    d8_fdr: Raster,
+    d8_fdr: Union[Raster, FlowGraph],
     engine: object,
-) -> xr.DataArray:
-    """Matches the D8 format to the appropriate terrain engine"""
+) -> Union[xr.DataArray, FlowGraph]:
+    """Matches the D8 format to the appropriate terrain engine.
+
+    FlowGraph inputs are passed through to engines that support them, otherwise
+    the FlowGraph's (cached) FDR in the engine's D8 format is returned.
+    """
+    if isinstance(d8_fdr, FlowGraph):
+        if getattr(engine, 'supports_flow_graph', False):
+            return d8_fdr
+        try:
+            return d8_fdr.as_format(engine.d8_format)
+        except AttributeError:
+            raise AttributeError(
+                f'Terrain engine {engine.__name__} is missing attribute d8_format!')
+
     d8_fdr = tools.load_raster(d8_fdr)
     d8_format = _id_d8_format(d8_fdr)
 
-    # get rid of any unexpected values
-    d8_fdr = _remove_unexpected_d8_values(d8_fdr, d8_format)
-
     try:
-        if d8_format != engine.d8_format:
-            d8_fdr = tools.convert_fdr_formats(
-                d8_fdr,
-                out_format=engine.d8_format,
-                in_format=d8_format,
-            )
+        # get rid of any unexpected values and convert in a single pass
+        d8_fdr = _remove_unexpected_d8_values(
+            d8_fdr,
+            d8_format,
+            out_format=engine.d8_format,
+        )
     except AttributeError:
         raise AttributeError(
             f'Terrain engine {engine.__name__} is missing attribute d8_format!')
@@ -206,7 +500,7 @@ def _change_nodata_value(
         The input raster with nodata values and encoding updated.
     """
     in_raster = in_raster.where(
-        in_raster.values != in_raster.rio.nodata,
+        in_raster.data != in_raster.rio.nodata,
         new_nodata,
     )
     in_raster = in_raster.rio.write_nodata(
@@ -229,6 +523,339 @@ def _intake_ambiguous(
         return in_data
 
 
+def _raster_creation_options(
+    profile: Optional[Union[str, Dict[str, Any]]],
+    dtype: np.dtype,
+    **creation_options,
+) -> Dict[str, Any]:
+    """Resolves a write profile (a key in custom_types.RasterWriteProfiles, or a dict) plus overrides into creation options.
+
+    A 'predictor' of 'auto' becomes floating point prediction for float dtypes and horizontal
+    differencing otherwise, and is dropped if there is no compression.
+    """
+    if profile is None:
+        options = {}
+    elif isinstance(profile, str):
+        if profile.lower() not in RasterWriteProfiles.keys():
+            raise ValueError(
+                f'param:profile = {profile} which is not in '
+                f'{list(RasterWriteProfiles.keys())}'
+            )
+        options = dict(RasterWriteProfiles[profile.lower()])
+    else:
+        options = dict(profile)
+    options.update(creation_options)
+
+    is_cog = str(options.get('driver', 'GTiff')).upper() == 'COG'
+    if options.get('predictor', None) == 'auto':
+        if str(options.get('compress', 'NONE')).upper() == 'NONE':
+            options.pop('predictor')
+        elif np.issubdtype(dtype, np.floating):
+            options['predictor'] = 'FLOATING_POINT' if is_cog else 3
+        else:
+            options['predictor'] = 'STANDARD' if is_cog else 2
+    return options
+
+
+def _write_geotiff(
+    out_raster: xr.DataArray,
+    out_path: Path,
+    creation_options: Dict[str, Any],
+) -> None:
+    """Writes a raster to a GeoTIFF window-by-window (block-by-block if dask backed)."""
+    if _is_lazy(out_raster):
+        # align chunks with GeoTIFF blocks so that compressed blocks are only written once
+        if creation_options.get('tiled', False):
+            chunks = dict(zip(out_raster.dims, out_raster.chunks))
+            aligned = {}
+            for dim, key in ((out_raster.rio.x_dim, 'blockxsize'), (out_raster.rio.y_dim, 'blockysize')):
+                block = creation_options.get(key, 256)
+                aligned[dim] = -(-chunks[dim][0] // block) * block
+            out_raster = out_raster.chunk(aligned)
+
+        out_raster.rio.to_raster(
+            out_path,
+            lock=threading.Lock(),
+            **creation_options,
+        )
+    else:
+        out_raster.rio.to_raster(
+            out_path,
+            windowed=True,
+            **creation_options,
+        )
+
+
+def _write_cog(
+    out_raster: xr.DataArray,
+    out_path: Path,
+    creation_options: Dict[str, Any],
+) -> None:
+    """Writes a Cloud-Optimized GeoTIFF by streaming to a temporary tiled GeoTIFF, then copying via GDAL's COG driver."""
+    cog_options = {k: v for k, v in creation_options.items() if k != 'driver'}
+    block_size = cog_options.get('blocksize', 512)
+
+    with tempfile.TemporaryDirectory(
+        prefix='fcpgtools_cog_',
+        dir=out_path.parent,
+    ) as temp_dir:
+        temp_path = Path(temp_dir, out_path.name)
+        _write_geotiff(
+            out_raster,
+            temp_path,
+            {
+                'tiled': True,
+                'blockxsize': block_size,
+                'blockysize': block_size,
+                'bigtiff': 'IF_SAFER',
+            },
+        )
+        rasterio.shutil.copy(
+            temp_path,
+            out_path,
+            driver='COG',
+            **cog_options,
+        )
+
+
+def _default_array_chunks(
+    out_raster: xr.DataArray,
+    chunks: Optional[Dict[str, int]] = None,
+) -> Dict[str, int]:
+    """Returns Zarr/NetCDF chunk sizes: 1 along the band/time dimension and 512 along y and x, updated by param:chunks."""
+    out_chunks = {}
+    for dim, size in out_raster.sizes.items():
+        if dim in (out_raster.rio.x_dim, out_raster.rio.y_dim):
+            out_chunks[dim] = min(size, 512)
+        else:
+            out_chunks[dim] = 1
+    if chunks is not None:
+        out_chunks.update({k: min(v, out_raster.sizes[k]) for k, v in chunks.items() if k in out_chunks})
+    return out_chunks
+
+
+def _to_array_dataset(
+    out_raster: xr.DataArray,
+    append_dim: Optional[str] = None,
+    name: Optional[str] = None,
+) -> Tuple[xr.Dataset, str, Dict[str, Any]]:
+    """Converts a raster into a single variable xr.Dataset for Zarr/NetCDF writing.
+
+    The nodata value is moved into the variable encoding (GeoTIFF encoding attrs are dropped), and a 2D raster with a scalar
+    param:append_dim coordinate (i.e. from .sel(time=...)) gets that dimension back.
+
+    Returns:
+        A tuple with the dataset, the variable name, and the variable encoding.
+    """
+    if append_dim is not None and append_dim not in out_raster.dims:
+        if append_dim not in out_raster.coords:
+            raise ValueError(
+                f'param:append_dim = {append_dim} is not a dimension or coordinate of param:out_raster!'
+            )
+        out_raster = out_raster.expand_dims(append_dim)
+
+    # drop stray scalar coordinates (i.e. 'band' from a GeoTIFF) so they are not written as variables
+    out_raster = out_raster.drop_vars([
+        k for k, v in out_raster.coords.items()
+        if k not in out_raster.dims and v.ndim == 0 and k != out_raster.rio.grid_mapping
+    ])
+
+    if name is None:
+        name = out_raster.name if out_raster.name is not None else 'raster'
+    out_raster = out_raster.rename(name)
+
+    encoding = {}
+    nodata = out_raster.rio.nodata
+    encoding_attrs = ('_FillValue', 'missing_value', 'scale_factor', 'add_offset', 'coordinates')
+    out_raster.attrs = {k: v for k, v in out_raster.attrs.items() if k not in encoding_attrs}
+    out_raster.encoding = {}
+    if nodata is not None:
+        encoding['_FillValue'] = nodata
+    return out_raster.to_dataset(), name, encoding
+
+
+def _write_zarr(
+    out_raster: xr.DataArray,
+    out_path: Path,
+    chunks: Optional[Dict[str, int]] = None,
+    append_dim: Optional[str] = None,
+) -> None:
+    """Writes a raster to a chunked Zarr store, or appends it along param:append_dim if the store exists."""
+    if append_dim is not None and out_path.exists():
+        with xr.open_zarr(out_path) as existing:
+            name = _array_store_name(existing, out_path)
+        out_ds, name, _ = _to_array_dataset(out_raster, append_dim, name)
+        out_ds = out_ds.chunk(_default_array_chunks(out_ds[name], chunks))
+        out_ds.to_zarr(
+            out_path,
+            append_dim=append_dim,
+        )
+        return None
+
+    out_ds, name, encoding = _to_array_dataset(out_raster, append_dim)
+    out_chunks = _default_array_chunks(out_ds[name], chunks)
+    encoding['chunks'] = tuple(out_chunks[dim] for dim in out_ds[name].dims)
+    out_ds.chunk(out_chunks).to_zarr(
+        out_path,
+        mode='w-',
+        encoding={name: encoding},
+    )
+
+
+# lazily opened NetCDF datasets by absolute path, closed before appending to the file
+_NETCDF_DATASETS: Dict[str, List[xr.Dataset]] = {}
+_NETCDF_DATASETS_LOCK = threading.Lock()
+
+
+def _release_netcdf_handles(
+    in_path: Path,
+) -> None:
+    """Closes the NetCDF datasets opened lazily by _open_array_store() for param:in_path, which block appending.
+
+    Lazy rasters reading param:in_path re-open the file on their next read.
+    """
+    with _NETCDF_DATASETS_LOCK:
+        for in_ds in _NETCDF_DATASETS.get(os.path.abspath(in_path), []):
+            in_ds.close()
+
+
+def _write_netcdf(
+    out_raster: xr.DataArray,
+    out_path: Path,
+    chunks: Optional[Dict[str, int]] = None,
+    append_dim: Optional[str] = None,
+) -> None:
+    """Writes a raster to a chunked + compressed NetCDF4 file, or appends it along param:append_dim if the file exists.
+
+    New files are written with param:append_dim as an unlimited dimension, which is required for appending.
+    """
+    if append_dim is not None and out_path.exists():
+        import netCDF4
+
+        _release_netcdf_handles(out_path)
+        with netCDF4.Dataset(out_path, 'a') as nc:
+            if append_dim not in nc.dimensions or not nc.dimensions[append_dim].isunlimited():
+                raise ValueError(
+                    f'Can not append to {out_path}, param:append_dim = {append_dim} is not an unlimited dimension! '
+                    f'Create the file via save_raster(..., append_dim="{append_dim}") to allow appending.'
+                )
+            name = [
+                k for k, v in nc.variables.items()
+                if append_dim in v.dimensions and 'x' in v.dimensions and 'y' in v.dimensions
+            ][0]
+            out_ds, name, _ = _to_array_dataset(out_raster, append_dim, name)
+            var = nc.variables[name]
+            dim_var = nc.variables[append_dim]
+            start = len(nc.dimensions[append_dim])
+
+            # encode new index values (i.e. dates) like the existing ones
+            index = out_ds[append_dim].values
+            if np.issubdtype(index.dtype, np.datetime64):
+                index, _, _ = xr.coding.times.encode_cf_datetime(
+                    index,
+                    units=dim_var.units,
+                    calendar=getattr(dim_var, 'calendar', 'standard'),
+                )
+
+            # write one step at a time so that dask backed rasters are never loaded in full
+            out_array = out_ds[name].transpose(append_dim, *var.dimensions[1:])
+            for i in range(out_array.sizes[append_dim]):
+                var[start + i, ...] = out_array.isel({append_dim: i}).values
+                dim_var[start + i] = index[i]
+        return None
+
+    out_ds, name, encoding = _to_array_dataset(out_raster, append_dim)
+    out_chunks = _default_array_chunks(out_ds[name], chunks)
+    encoding.update({
+        'chunksizes': tuple(out_chunks[dim] for dim in out_ds[name].dims),
+        'zlib': True,
+        'complevel': 4,
+    })
+    out_ds.to_netcdf(
+        out_path,
+        engine='netcdf4',
+        encoding={name: encoding},
+        unlimited_dims=[append_dim] if append_dim is not None else None,
+    )
+
+
+def _open_array_store(
+    in_path: Path,
+    chunks: Optional[Union[int, str, Tuple[int, ...], Dict[str, int]]] = None,
+) -> xr.DataArray:
+    """Opens the raster variable of a Zarr store or NetCDF file written by save_raster()."""
+    if in_path.suffix == '.zarr':
+        in_ds = xr.open_zarr(
+            in_path,
+            chunks=chunks,
+            mask_and_scale=False,
+            decode_coords='all',
+        )
+    else:
+        in_ds = xr.open_dataset(
+            in_path,
+            chunks=chunks,
+            mask_and_scale=False,
+            decode_coords='all',
+        )
+    out_raster = in_ds[_array_store_name(in_ds, in_path)]
+    if chunks is None:
+        out_raster = out_raster.load()
+        in_ds.close()
+    elif in_path.suffix == '.nc':
+        with _NETCDF_DATASETS_LOCK:
+            _NETCDF_DATASETS.setdefault(os.path.abspath(in_path), []).append(in_ds)
+    return out_raster
+
+
+def _array_store_name(
+    in_ds: xr.Dataset,
+    in_path: Path,
+) -> str:
+    """Returns the name of the raster variable (the first with x and y dimensions) in a Zarr/NetCDF dataset."""
+    names = [k for k, v in in_ds.data_vars.items() if 'x' in v.dims and 'y' in v.dims]
+    if len(names) == 0:
+        raise ValueError(
+            f'{in_path} does not store a raster variable with x and y dimensions!'
+        )
+    return names[0]
+
+
+def _index_labels(
+    index_values: np.ndarray,
+) -> List[str]:
+    """Converts band/time index values into string labels (i.e. for a JSON manifest)."""
+    return [str(i) for i in np.asarray(index_values)]
+
+
+def _manifest_path(
+    out_path: Path,
+) -> Path:
+    """Returns the path of the manifest stored alongside an output raster."""
+    return out_path.with_name(f'{out_path.name}.manifest.json')
+
+
+def _read_manifest(
+    manifest_path: Path,
+) -> Optional[FCPGManifestDict]:
+    """Reads a FCPG manifest, returning None if it doesn't exist."""
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def _write_manifest(
+    manifest: FCPGManifestDict,
+    manifest_path: Path,
+) -> None:
+    """Writes a FCPG manifest atomically (via a temporary file + os.replace)."""
+    temp_path = manifest_path.with_name(f'{manifest_path.name}.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
 def _format_nodata(
     in_raster: xr.DataArray,
 ) -> xr.DataArray:
@@ -240,7 +867,7 @@ def _format_nodata(
         elif 'int' in og_dtype:
             nodata_value = 255
         if 'int8' in og_dtype:
-            if np.min(np.unique(in_raster.values)) < 0:
+            if in_raster.min() < 0:
                 in_raster = in_raster.astype('int16')
             else:
                 in_raster = in_raster.astype('uint8')
@@ -300,7 +927,10 @@ def _update_cell_value(
         The input raster with the updated cell value.
     """
     if _verify_dtype(raster, value):
-        raster.loc[{'x': coords[0], 'y': coords[1]}] = value
+        # use the nearest cell since coordinates from other rasters may differ by floating point error
+        x_index = raster.indexes['x'].get_indexer([coords[0]], method='nearest')[0]
+        y_index = raster.indexes['y'].get_indexer([coords[1]], method='nearest')[0]
+        raster[{'x': x_index, 'y': y_index}] = value
         return raster
     else:
         raise TypeError(
@@ -387,6 +1017,53 @@ def _combine_split_bands(
     )
 
 
+def _coords_to_indices(
+    raster: xr.DataArray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Converts arrays of x and y coordinates into the (row, column) indices of the nearest raster cells."""
+    rows = raster.indexes['y'].get_indexer(np.asarray(ys), method='nearest')
+    cols = raster.indexes['x'].get_indexer(np.asarray(xs), method='nearest')
+    return rows, cols
+
+
+def _find_downstream_cells(
+    d8_fdr: xr.DataArray,
+    coords: List[Tuple[float, float]],
+    d8_format: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Uses a D8 FDR to find the cell center coordinates downstream from many cells at once.
+
+    Args:
+        d8_fdr: A D8 Flow Direction Raster (dtype=Int).
+        coords: A list of (x:float, y:float) coordinates to find the next cell downstream from.
+        d8_format: The D8 format of param:d8_fdr. If None, it is identified via _id_d8_format().
+
+    Returns:
+        A tuple with arrays of downstream x coordinates, y coordinates, and a boolean array
+            that is False where the cell at param:coords has no valid flow direction.
+    """
+    if d8_format is None:
+        d8_format = _id_d8_format(d8_fdr)
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    rows, cols = _coords_to_indices(d8_fdr, coords[:, 0], coords[:, 1])
+
+    # look up (row, column) offsets of each cell's flow direction
+    fdr_values = np.asarray(d8_fdr.values[rows, cols])
+    fdr_values = np.nan_to_num(fdr_values, nan=-1).astype(np.int64)
+    in_lookup = (fdr_values >= 0) & (fdr_values <= 255)
+    offsets = _d8_offset_lookup(d8_format)[np.where(in_lookup, fdr_values, 0)]
+    has_direction = in_lookup & np.any(offsets != 0, axis=1)
+
+    # convert offsets to coordinates (y resolution is negative for north-up rasters)
+    x_res, y_res = d8_fdr.rio.resolution(recalc=True)
+    ds_xs = d8_fdr.indexes['x'].values[cols] + offsets[:, 1] * x_res
+    ds_ys = d8_fdr.indexes['y'].values[rows] + offsets[:, 0] * y_res
+    return ds_xs, ds_ys, has_direction
+
+
 def _find_downstream_cell(
     d8_fdr: xr.DataArray,
     coords: Tuple[float, float],
@@ -403,35 +1080,72 @@ def _find_downstream_cell(
         An output (lat:float, lon:float) representing the cell center coordinates 
             downstream from the cell defined via :param:coords.
     """
-    # identify d8 fdr format
-    d8_format = _id_d8_format(d8_fdr)
-    dir_dict = D8ConversionDicts[d8_format]
-    dir_dict = dict(zip(dir_dict.values(), dir_dict.keys()))
-
-    # get cell size
-    cell_size = np.abs(d8_fdr.rio.resolution(recalc=True)[0])
-
-    # get FDR cell value
-    new_coords, value = _query_point(
+    ds_xs, ds_ys, has_direction = _find_downstream_cells(
         d8_fdr,
-        coords,
+        [coords],
     )
-    value = int(value)
-
-    # find downstream cell coordinates via hashmap and return
-    dxdy_dict = {
-        'east': (cell_size, 0.0),
-        'northeast': (cell_size, cell_size),
-        'north': (0.0, cell_size),
-        'northwest': (cell_size * -1.0, 0.0),
-        'west': (cell_size * -1.0, 0.0),
-        'southwest': (cell_size * -1.0, cell_size * -1.0),
-        'south': (0.0, cell_size * -1.0),
-        'southeast': (cell_size, cell_size * -1.0),
-    }
-    dx_dy_tuple = dxdy_dict[dir_dict[value]]
+    if not has_direction[0]:
+        raise ValueError(
+            f'The D8 FDR cell at coords={coords} has no valid flow direction!'
+        )
+    return (ds_xs[0], ds_ys[0])
 
-    return (new_coords[0] + dx_dy_tuple[0], new_coords[1] + dx_dy_tuple[1])
+
+def _add_raster_values(
+    in_raster: xr.DataArray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    values: np.ndarray,
+) -> xr.DataArray:
+    """Adds values to the raster cells nearest to many coordinates at once, across all bands.
+
+    Values at duplicate cells are summed, and np.nan values are ignored. Cells that are np.nan
+    before the update are treated as 0.
+
+    Args:
+        in_raster: A (y, x) or (band, y, x) raster.
+        xs: An array of N x coordinates.
+        ys: An array of N y coordinates.
+        values: A (N, bands) array of values to add.
+
+    Returns:
+        A copy of param:in_raster with the values added.
+    """
+    if len(xs) == 0:
+        return in_raster.copy()
+
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+    values = values.reshape(len(xs), -1)
+    rows, cols = _coords_to_indices(in_raster, xs, ys)
+
+    # sum values going to the same cell
+    n_cols = in_raster.shape[-1]
+    cells, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+    summed = np.zeros((cells.size, values.shape[1]), dtype=np.float64)
+    np.add.at(summed, inverse, values)
+    rows = cells // n_cols
+    cols = cells % n_cols
+
+    data = np.array(in_raster.values)
+    if np.issubdtype(data.dtype, np.integer):
+        if not np.all(np.mod(summed, 1) == 0):
+            raise TypeError(
+                f'Non-integer values can not be added to a DataArray with dtype = {data.dtype}'
+            )
+        summed = summed.astype(data.dtype)
+
+    if data.ndim == 2:
+        current = data[rows, cols]
+        if np.issubdtype(data.dtype, np.floating):
+            current = np.nan_to_num(current, nan=0.0)
+        data[rows, cols] = current + summed[:, 0]
+    else:
+        current = data[:, rows, cols]
+        if np.issubdtype(data.dtype, np.floating):
+            current = np.nan_to_num(current, nan=0.0)
+        data[:, rows, cols] = current + summed.T
+
+    return in_raster.copy(data=data)
 
 
 def _verify_coords_coverage(
@@ -453,18 +1167,121 @@ def _verify_basin_coverage(
     basin_shapefile: gpd.GeoDataFrame,
 ) -> bool:
     """Returns True if a basin shapefile/GeoDataFrame is completely covered by a raster."""
-    raster = tools.reproject_raster(
-        raster,
-        basin_shapefile,
-    )
+    return bool(np.all(_verify_basins_coverage(raster, basin_shapefile)))
+
+
+def _verify_basins_coverage(
+    raster: xr.DataArray,
+    basins_shp: gpd.GeoDataFrame,
+) -> np.ndarray:
+    """Returns a boolean array that is True for each basin (row) completely covered by a raster.
 
-    raster_bbox = np.array(raster.rio.bounds())
-    shp_bbox = basin_shapefile.geometry.total_bounds
+    Only the raster bounds are transformed into the basins CRS, the raster itself is not reprojected.
+    """
+    raster_bbox = np.array(
+        transform_bounds(
+            raster.rio.crs,
+            basins_shp.crs,
+            *raster.rio.bounds(),
+        )
+    )
+    shp_bboxes = basins_shp.geometry.bounds.values
 
     # compare geometry to verify inclusion
-    diff = np.array(raster_bbox) - np.array(shp_bbox)
+    diff = raster_bbox[np.newaxis, :] - shp_bboxes
     compare = np.sign(diff) == np.array([-1, -1, 1, 1])
-    return np.all(compare)
+    return np.all(compare, axis=1)
+
+
+def _rasterize_labels(
+    raster: xr.DataArray,
+    basins_shp: gpd.GeoDataFrame,
+) -> np.ndarray:
+    """Rasterizes basins into a (y, x) label grid aligned with a raster. Basin i (row order) is labelled i + 1, and 0 is no basin.
+
+    Cells are labelled by cell center. Basins that contain no cell center are labelled by all cells they touch.
+    """
+    shape = raster.shape[-2:]
+    transform = raster.rio.transform(recalc=True)
+    basins_shp = basins_shp.to_crs(raster.rio.crs)
+
+    shapes = [
+        (geometry, i + 1) for i, geometry in enumerate(basins_shp.geometry.values)
+        if geometry is not None and not geometry.is_empty
+    ]
+    if len(shapes) == 0:
+        return np.zeros(shape, dtype=np.int32)
+
+    labels = rasterize(
+        shapes,
+        out_shape=shape,
+        transform=transform,
+        fill=0,
+        all_touched=False,
+        dtype='int32',
+    )
+
+    # label small basins by all touched cells (without overwriting other basins)
+    missing = np.setdiff1d(
+        np.array([label for _, label in shapes]),
+        np.unique(labels),
+    )
+    for geometry, label in shapes:
+        if label not in missing:
+            continue
+        touched = rasterize(
+            [(geometry, label)],
+            out_shape=shape,
+            transform=transform,
+            fill=0,
+            all_touched=True,
+            dtype='int32',
+        )
+        labels = np.where((labels == 0) & (touched > 0), touched, labels)
+    return labels
+
+
+def _get_label_max_cells(
+    raster: xr.DataArray,
+    labels: np.ndarray,
+    n_labels: int,
+) -> List[Optional[Tuple[float, float]]]:
+    """Gets the maximum cell (x, y) coordinates of a single band raster within each label of a label grid.
+
+    Args:
+        raster: A single band raster.
+        labels: A label grid from _rasterize_labels().
+        n_labels: The # of labels (1 to n_labels).
+
+    Returns:
+        A list with the (x, y) coordinates of each label's max cell, or None if a label has no valid cells.
+    """
+    values = np.asarray(raster.values, dtype=np.float64).reshape(-1)
+    flat_labels = labels.reshape(-1)
+    nodata = raster.rio.nodata
+
+    valid = (flat_labels > 0) & ~np.isnan(values)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= values != nodata
+    cells = np.flatnonzero(valid)
+
+    # sort by label, then value, then (descending) cell index -> the last cell of each label is its first max
+    order = np.lexsort((-cells, values[cells], flat_labels[cells]))
+    sorted_labels = flat_labels[cells][order]
+    is_last = np.append(sorted_labels[1:] != sorted_labels[:-1], True)
+    max_cells = dict(zip(sorted_labels[is_last], cells[order][is_last]))
+
+    n_cols = labels.shape[-1]
+    x_values = raster.indexes['x'].values
+    y_values = raster.indexes['y'].values
+    out_list = []
+    for label in range(1, n_labels + 1):
+        if label not in max_cells:
+            out_list.append(None)
+            continue
+        cell = max_cells[label]
+        out_list.append((x_values[cell % n_cols].item(), y_values[cell // n_cols].item()))
+    return out_list
 
 
 def _verify_alignment(
@@ -483,3 +1300,252 @@ def _verify_alignment(
         if np.max(diff) == 0:
             return True
     return False
+
+
+def _build_region_dag(
+    basins_shp: gpd.GeoDataFrame,
+    region_ids: List[str],
+    basin_id_field: str = 'HUC12',
+    to_basin_field: str = 'ToHUC',
+    region_id_length: int = 4,
+) -> Dict[str, Dict[str, List[str]]]:
+    """Builds a region-to-region drainage graph from basins with a downstream basin id field (i.e. WBD HUC12 + ToHUC).
+
+    Args:
+        basins_shp: A GeoDataFrame of basins.
+        region_ids: The region ids to include. A basin's region id is the first param:region_id_length
+            characters of its param:basin_id_field value.
+        basin_id_field: The column storing each basin's id.
+        to_basin_field: The column storing the id of the basin each basin drains to.
+        region_id_length: The # of leading basin id characters that make up a region id (i.e. 4 for HUC4).
+
+    Returns:
+        A dictionary with each region id as keys, storing a dictionary of upstream region ids
+            and the basin ids in that region that drain into it.
+    """
+    for field in [basin_id_field, to_basin_field]:
+        if field not in list(basins_shp.columns):
+            raise ValueError(
+                f'Field {field} is not in param:basins_shp'
+            )
+
+    basins = pd.DataFrame({
+        'basin': basins_shp[basin_id_field].astype(str),
+        'to_basin': basins_shp[to_basin_field].astype(str),
+    })
+    basins['region'] = basins['basin'].str[:region_id_length]
+    basins['to_region'] = basins['to_basin'].str[:region_id_length]
+
+    # keep only basins that drain between two of the input regions
+    crossing = basins.loc[
+        (basins['region'] != basins['to_region']) &
+        (basins['region'].isin(region_ids)) &
+        (basins['to_region'].isin(region_ids))
+    ]
+
+    region_dag = {region_id: {} for region_id in region_ids}
+    for (to_region, region), group in crossing.groupby(['to_region', 'region']):
+        region_dag[to_region][region] = sorted(group['basin'].unique())
+    return region_dag
+
+
+def _name_parameter_rasters(
+    parameter_rasters: Union[Dict[str, Raster], List[Raster], str, Path],
+) -> Dict[str, Raster]:
+    """Names each parameter raster of a batch run via dictionary keys, file names, or DataArray names.
+
+    Args:
+        parameter_rasters: A dictionary of rasters, a list of rasters, or a directory
+            that is searched (recursively) for raster files with a custom_types.RasterSuffixes suffix.
+
+    Returns:
+        A dictionary with unique parameter names as keys, storing each parameter raster.
+    """
+    if isinstance(parameter_rasters, dict):
+        return {str(key): value for key, value in parameter_rasters.items()}
+
+    if isinstance(parameter_rasters, (str, Path)):
+        in_dir = Path(parameter_rasters)
+        if not in_dir.is_dir():
+            raise TypeError(
+                f'param:parameter_rasters={str(in_dir)} is not a valid directory!'
+            )
+        # note: files stored inside .zarr stores are skipped
+        parameter_rasters = sorted(
+            path for path in in_dir.rglob('*')
+            if path.suffix in RasterSuffixes and not any(
+                i.suffix == '.zarr' for i in path.relative_to(in_dir).parents
+            )
+        )
+
+    named_rasters = {}
+    for i, parameter_raster in enumerate(parameter_rasters):
+        if isinstance(parameter_raster, xr.DataArray):
+            name = f'parameter_{i}' if parameter_raster.name is None else str(
+                parameter_raster.name)
+        else:
+            name = Path(parameter_raster).stem
+        if name in named_rasters.keys():
+            raise ValueError(
+                f'Multiple parameter rasters are named {name}! Please provide '
+                'param:parameter_rasters as a dictionary with unique names as keys.'
+            )
+        named_rasters[name] = parameter_raster
+    return named_rasters
+
+
+def _init_batch_worker(
+    memory_limit_bytes: Optional[int],
+) -> None:
+    """Caps the address space of a tools.make_fcpgs() worker process (only supported on POSIX systems)."""
+    if memory_limit_bytes is None:
+        return None
+    try:
+        import resource
+    except ImportError:
+        warnings.warn(
+            message='Per-worker memory limits are not supported on this OS, and are ignored.',
+            category=UserWarning,
+        )
+        return None
+
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    if hard_limit != resource.RLIM_INFINITY:
+        memory_limit_bytes = min(memory_limit_bytes, hard_limit)
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, hard_limit))
+
+
+def _make_batch_fcpg(
+    d8_fdr: FlowGraph,
+    fac_raster: Union[xr.DataArray, Path],
+    parameter_raster: Raster,
+    engine: str,
+    out_path: Path,
+    creation_options: Dict[str, Any],
+    kwargs: Dict[str, Any],
+) -> Path:
+    """Makes and saves the FCPG of a single tools.make_fcpgs() parameter raster.
+
+    Args:
+        d8_fdr: The prepared (optionally memory-mapped) FlowGraph.
+        fac_raster: The FAC raster, or the path of a FAC raster saved via _save_memmap_raster().
+        parameter_raster: The parameter raster.
+        engine: The terrain engine name used for parameter accumulation.
+        out_path: The .tif path to save the FCPG to.
+        creation_options: GeoTIFF creation options passed to tools.save_raster().
+        kwargs: keyword arguments passed to tools.accumulate_parameter().
+
+    Returns:
+        The path of the saved FCPG.
+    """
+    if isinstance(fac_raster, Path):
+        fac_raster = _load_memmap_raster(fac_raster)
+
+    fcpg_raster = tools.make_fcpg(
+        tools.accumulate_parameter(
+            d8_fdr,
+            parameter_raster,
+            engine=engine,
+            **kwargs,
+        ),
+        fac_raster,
+    )
+
+    # write to a temporary file first so that interrupted runs never leave partial outputs
+    temp_path = out_path.with_name(f'temp_{out_path.name}')
+    tools.save_raster(
+        fcpg_raster,
+        temp_path,
+        overwrite=True,
+        **creation_options,
+    )
+    os.replace(temp_path, out_path)
+    return out_path
+
+
+def _json_default(
+    value: Any,
+) -> Any:
+    """Converts numpy scalars/arrays (i.e. in DataArray attributes) into JSON serializable objects."""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    return str(value)
+
+
+def _save_npy(
+    array: np.ndarray,
+    out_path: Path,
+) -> None:
+    """Saves an array to a .npy file via a temporary file + os.replace, so existing memory-maps of param:out_path stay valid."""
+    temp_path = out_path.with_name(f'temp_{out_path.name}')
+    np.save(temp_path, np.ascontiguousarray(array))
+    os.replace(temp_path, out_path)
+
+
+def _save_memmap_raster(
+    in_raster: xr.DataArray,
+    out_path: Path,
+) -> None:
+    """Saves a raster as memory-mappable .npy files, see _load_memmap_raster().
+
+    Args:
+        in_raster: The raster to save (dask backed rasters are computed).
+        out_path: A path without a suffix. The values are saved to {out_path}.npy, each 
+            dimension coordinate to {out_path}_{dim}.npy, and all other metadata to {out_path}.json.
+    """
+    meta = {
+        'name': in_raster.name,
+        'dims': list(in_raster.dims),
+        'coords': [i for i in in_raster.dims if i in in_raster.coords],
+        'attrs': {k: v for k, v in in_raster.attrs.items() if k != '_FillValue'},
+        'crs': None,
+        'nodata': in_raster.rio.nodata,
+        'encoding': {
+            k: in_raster.encoding[k] for k in ('d8_format', 'd8_cleaned')
+            if k in in_raster.encoding.keys()
+        },
+    }
+    crs = in_raster.rio.crs
+    if crs is not None:
+        meta['crs'] = crs.to_wkt()
+
+    _save_npy(in_raster.values, out_path.with_name(f'{out_path.name}.npy'))
+    for dim in meta['coords']:
+        _save_npy(
+            in_raster[dim].values,
+            out_path.with_name(f'{out_path.name}_{dim}.npy'),
+        )
+    with open(out_path.with_name(f'{out_path.name}.json'), 'w') as f:
+        json.dump(meta, f, default=_json_default)
+
+
+def _load_memmap_raster(
+    in_path: Path,
+) -> xr.DataArray:
+    """Loads a raster saved via _save_memmap_raster() with its values memory-mapped (read-only)."""
+    with open(in_path.with_name(f'{in_path.name}.json'), 'r') as f:
+        meta = json.load(f)
+
+    out_raster = xr.DataArray(
+        np.load(in_path.with_name(f'{in_path.name}.npy'), mmap_mode='r'),
+        coords={
+            dim: np.load(in_path.with_name(f'{in_path.name}_{dim}.npy'))
+            for dim in meta['coords']
+        },
+        dims=meta['dims'],
+        name=meta['name'],
+        attrs=meta['attrs'],
+    )
+
+    # note: inplace=True avoids copying the memory-mapped values
+    if meta['crs'] is not None:
+        out_raster.rio.write_crs(meta['crs'], inplace=True)
+    if meta['nodata'] is not None:
+        out_raster.rio.write_nodata(meta['nodata'], inplace=True)
+    if 'd8_format' in meta['encoding'].keys():
+        _record_d8_format(
+            out_raster,
+            meta['encoding']['d8_format'],
+            cleaned=meta['encoding'].get('d8_cleaned', False),
+        )
+    return out_raster